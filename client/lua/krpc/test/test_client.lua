@@ -418,6 +418,7 @@ function TestClient:test_krpc_service_members()
      'set_game_scene',
      'set_paused',
      'set_stream_rate',
+     'set_stream_update_interval',
      'start_stream'})
 end
 
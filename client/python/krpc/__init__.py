@@ -3,13 +3,14 @@ import getpass
 import os
 import sys
 import tempfile
-from typing import cast, Optional
+from typing import cast, Optional, Sequence
 from krpc.connection import Connection, LocalConnection
 from krpc.client import Client
 from krpc.encoder import Encoder
 from krpc.error import ConnectionError  # pylint: disable=redefined-builtin
 from krpc.decoder import Decoder
 from krpc.schema.KRPC_pb2 import ConnectionRequest, ConnectionResponse
+from krpc.wait import wait_any, wait_all
 
 from krpc.version import __version__
 
@@ -43,6 +44,10 @@ def connect(
     stream_port: int = DEFAULT_STREAM_PORT,
     use_pregenerated_stubs: bool = True,
     timeout: Optional[float] = None,
+    pipeline_window: Optional[int] = None,
+    rpc_connections: int = 1,
+    services_cache_dir: Optional[str] = None,
+    stream_update_interval: Optional[float] = None,
 ) -> Client:
     """
     Connect to a kRPC server on the specified IP address and port numbers.
@@ -50,13 +55,32 @@ def connect(
     Optionally give the kRPC server the supplied name to identify the client.
     If timeout is given, gives up after that many seconds of waiting for a
     connection, rather than waiting indefinitely.
+    If pipeline_window is given, up to that many requests can be sent to the
+    server before the response to the first of them has been received.
+    If rpc_connections is more than one, opens that many connections to the RPC
+    server, and calls made from several threads at once are spread over them.
+    If services_cache_dir is given, the definitions of the services the server
+    provides are cached in that directory, and read from there rather than from
+    the server by later connections to the same server.
+    If stream_update_interval is given, the server sends stream updates no more
+    often than that many seconds apart, each carrying the latest result of every
+    stream that changed since the last.
     """
 
-    rpc_connection = Connection(address, rpc_port, timeout)
+    _check_rpc_connections(rpc_connections, pipeline_window)
+    rpc = [Connection(address, rpc_port, timeout) for _ in range(rpc_connections)]
     stream_connection = (
         Connection(address, stream_port, timeout) if stream_port is not None else None
     )
-    return _connect(name, rpc_connection, stream_connection, use_pregenerated_stubs)
+    return _connect(
+        name,
+        rpc,
+        stream_connection,
+        use_pregenerated_stubs,
+        pipeline_window,
+        services_cache_dir,
+        stream_update_interval,
+    )
 
 
 def connect_local(
@@ -64,57 +88,108 @@ def connect_local(
     rpc_path: str = DEFAULT_RPC_PATH,
     stream_path: Optional[str] = DEFAULT_STREAM_PATH,
     use_pregenerated_stubs: bool = True,
+    pipeline_window: Optional[int] = None,
+    rpc_connections: int = 1,
+    services_cache_dir: Optional[str] = None,
+    stream_update_interval: Optional[float] = None,
 ) -> Client:
     """
     Connect to a kRPC server on the same machine, over unix domain sockets named by
     the given paths; an empty path stands for the one the server uses by default. If
     stream_path is None, does not connect to the stream server. Optionally give the
-    kRPC server the supplied name to identify the client.
+    kRPC server the supplied name to identify the client. If pipeline_window is given,
+    up to that many requests can be sent to the server before the response to the
+    first of them has been received. If rpc_connections is more than one, opens that
+    many connections to the RPC server, as for connect. If services_cache_dir is given,
+    the definitions of the services are cached in that directory, as for connect. If
+    stream_update_interval is given, stream updates are sent no more often than that
+    many seconds apart, as for connect.
     """
 
-    rpc_connection = LocalConnection(rpc_path or _default_path("rpc"))
+    _check_rpc_connections(rpc_connections, pipeline_window)
+    rpc_path = rpc_path or _default_path("rpc")
+    rpc: Sequence[Connection] = [
+        LocalConnection(rpc_path) for _ in range(rpc_connections)
+    ]
     stream_connection = (
         LocalConnection(stream_path or _default_path("stream"))
         if stream_path is not None
         else None
     )
-    return _connect(name, rpc_connection, stream_connection, use_pregenerated_stubs)
+    return _connect(
+        name,
+        rpc,
+        stream_connection,
+        use_pregenerated_stubs,
+        pipeline_window,
+        services_cache_dir,
+        stream_update_interval,
+    )
+
+
+def _check_rpc_connections(
+    rpc_connections: int, pipeline_window: Optional[int]
+) -> None:
+    """Check the number of RPC connections asked for, before any of them is opened"""
+    if rpc_connections < 1:
+        raise ValueError("At least one RPC connection is needed")
+    if rpc_connections > 1 and pipeline_window is not None:
+        raise ValueError(
+            "Requests cannot be both pipelined and spread over several connections"
+        )
 
 
 def _connect(
     name: Optional[str],
-    rpc_connection: Connection,
+    rpc_connections: Sequence[Connection],
     stream_connection: Optional[Connection],
     use_pregenerated_stubs: bool,
+    pipeline_window: Optional[int] = None,
+    services_cache_dir: Optional[str] = None,
+    stream_update_interval: Optional[float] = None,
 ) -> Client:
     """Perform the connection handshake over already built connections. The handshake
-    is the same whatever carries it."""
+    is the same whatever carries it. The client is identified by the first of the RPC
+    connections, which its stream connection is paired with."""
 
     # Connect to RPC server
-    rpc_connection.connect()
-    request = ConnectionRequest()
-    request.type = ConnectionRequest.RPC
-    if name is not None:
-        request.client_name = name
-    rpc_connection.send_message(request)
-    response = cast(
-        ConnectionResponse, rpc_connection.receive_message(ConnectionResponse)
-    )
-    if response.status != ConnectionResponse.OK:
-        raise ConnectionError(response.message)
-    client_identifier = response.client_identifier
+    client_identifier = b""
+    for rpc_connection in rpc_connections:
+        request = ConnectionRequest()
+        request.type = ConnectionRequest.RPC
+        if name is not None:
+            request.client_name = name
+        response = _handshake(rpc_connection, request)
+        client_identifier = client_identifier or response.client_identifier
 
     # Connect to Stream server
     if stream_connection is not None:
-        stream_connection.connect()
         request = ConnectionRequest()
         request.type = ConnectionRequest.STREAM
         request.client_identifier = client_identifier
-        stream_connection.send_message(request)
-        response = cast(
-            ConnectionResponse, stream_connection.receive_message(ConnectionResponse)
-        )
-        if response.status != ConnectionResponse.OK:
-            raise ConnectionError(response.message)
+        _handshake(stream_connection, request)
+
+    client = Client(
+        rpc_connections[0],
+        stream_connection,
+        use_pregenerated_stubs,
+        pipeline_window,
+        rpc_connections[1:],
+        services_cache_dir,
+    )
+    if stream_update_interval is not None and stream_connection is not None:
+        client.krpc.set_stream_update_interval(stream_update_interval)
+    return client
 
-    return Client(rpc_connection, stream_connection, use_pregenerated_stubs)
+
+def _handshake(
+    connection: Connection, request: ConnectionRequest
+) -> ConnectionResponse:
+    """Open the connection and make the request over it, returning the server's response
+    if it accepted the connection"""
+    connection.connect()
+    connection.send_message(request)
+    response = cast(ConnectionResponse, connection.receive_message(ConnectionResponse))
+    if response.status != ConnectionResponse.OK:
+        raise ConnectionError(response.message)
+    return response
@@ -0,0 +1,584 @@
+from __future__ import annotations
+from typing import (
+    cast,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+from types import TracebackType
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import socket
+import google.protobuf
+import krpc
+from krpc import envelope, winsock
+from krpc.attributes import Attributes
+from krpc.client import ClientBase
+from krpc.connection import _READ_SIZE
+from krpc.decoder import Decoder
+from krpc.encoder import Encoder
+from krpc.error import ConnectionError  # pylint: disable=redefined-builtin
+from krpc.error import RPCError, StreamError
+from krpc.types import TypeBase
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+class Connection:
+    """A connection to the server carried by asyncio streams. Sending only queues the
+    data to be written, so a request is sent without waiting, and receiving waits for a
+    whole message without blocking the event loop."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        # Data read from the stream that has not been consumed yet
+        self._buffer = bytearray()
+
+    @classmethod
+    async def open(
+        cls, address: str, port: int, timeout: Optional[float] = None
+    ) -> Connection:
+        """Open a connection to a server over TCP/IP"""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port), timeout
+        )
+        sock = writer.get_extra_info("socket")
+        # The protocol is strictly request/response, so waiting for more data to
+        # coalesce with can only add latency
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(reader, writer)
+
+    @classmethod
+    async def open_local(cls, path: str) -> Connection:
+        """Open a connection to a server on the same machine, over a unix domain socket"""
+        # Windows has the address family but the socket module does not expose it, so
+        # there the socket is opened by calling winsock directly and then handed over
+        if not hasattr(socket, "AF_UNIX"):
+            reader, writer = await asyncio.open_connection(sock=winsock.connect(path))
+        else:
+            reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def send_message(self, message: google.protobuf.message.Message) -> None:
+        """Send a protobuf message"""
+        self.send(Encoder.encode_message_with_size(message))
+
+    def send(self, data: bytes) -> None:
+        """Queue data to be sent"""
+        self._writer.write(data)
+
+    async def receive_message(self, typ: type) -> google.protobuf.message.Message:
+        """Receive a protobuf message and decode it"""
+        return cast(
+            google.protobuf.message.Message,
+            await self._receive(lambda data: Decoder.decode_message(data, typ)),
+        )
+
+    async def receive_response(self) -> envelope.Response:
+        """Receive a Response message and decode it"""
+        return cast(envelope.Response, await self._receive(envelope.decode_response))
+
+    async def receive_stream_update(self) -> List[envelope.StreamResult]:
+        """Receive a StreamUpdate message and decode it, into the results it carries"""
+        return cast(
+            List[envelope.StreamResult],
+            await self._receive(envelope.decode_stream_update),
+        )
+
+    async def _receive(self, decode: Callable[[memoryview], object]) -> object:
+        """Receive a message and decode it with the given function"""
+        buffer = self._buffer
+        while True:
+            try:
+                size, prefix_length = Decoder.decode_size_prefix(buffer)
+            except IndexError:
+                await self._fill()
+                continue
+            end = prefix_length + size
+            if len(buffer) >= end:
+                break
+            await self._fill()
+        # Decoding copies the values out of the message, so it is decoded where it lies
+        # rather than copied out of the buffer first
+        with memoryview(buffer) as view:
+            message = decode(view[prefix_length:end])
+        del buffer[:end]
+        return message
+
+    async def _fill(self) -> None:
+        """Read a block from the stream into the buffer"""
+        data = await self._reader.read(_READ_SIZE)
+        if not data:
+            raise socket.error("Connection closed")
+        self._buffer += data
+
+
+class Stream:
+    """A stream, whose value is updated by the server as it changes. Calling it returns
+    the most recent value, and iterating over it with async for waits for each update
+    in turn. An update that arrives while the previous one is still being handled
+    replaces it, so an iteration always sees the most recent value."""
+
+    def __init__(self, client: Client, stream_id: int, return_type: TypeBase) -> None:
+        self._client = client
+        self._stream_id = stream_id
+        self._return_type = return_type
+        self._started = False
+        self._updated = False
+        self._closed = False
+        self._value: object = None
+        self._rate = 0.0
+        # Set, and replaced with a new one, on every update, so that something waiting
+        # for the next update waits on the one current when it started to
+        self._update = asyncio.Event()
+
+    @property
+    def return_type(self) -> TypeBase:
+        return self._return_type
+
+    @property
+    def started(self) -> bool:
+        """Whether the stream has been started"""
+        return self._started
+
+    async def start(self, wait: bool = True) -> None:
+        """Start the stream. If wait is true, waits until the stream has received its
+        first update."""
+        if not self._started:
+            await self._client._call(self._client.krpc.start_stream, self._stream_id)
+            self._started = True
+        if wait and not self._updated:
+            await self.wait()
+
+    @property
+    def rate(self) -> float:
+        """The update rate for the stream in Hertz.
+        Zero if the rate is unlimited."""
+        return self._rate
+
+    async def set_rate(self, value: float) -> None:
+        """Set the update rate for the stream in Hertz.
+        Zero if the rate is unlimited."""
+        self._rate = value
+        await self._client._call(
+            self._client.krpc.set_stream_rate, self._stream_id, value
+        )
+
+    def __call__(self):  # type: ignore[no-untyped-def]
+        """Get the most recent value for this stream."""
+        if not self._updated:
+            raise StreamError("Stream has no value")
+        if isinstance(self._value, Exception):
+            raise self._value
+        return self._value
+
+    async def wait(self) -> None:
+        """Wait until the next stream update, or until the stream is removed or its
+        client closed. Starts the stream if it has not been started."""
+        update = self._update
+        if not self._started:
+            await self.start(wait=False)
+        if not self._closed:
+            await update.wait()
+
+    def __aiter__(self) -> AsyncIterator[object]:
+        return self._values()
+
+    async def _values(self) -> AsyncIterator[object]:
+        """The value of the stream as it is, and then after each update, until the
+        stream is removed or its client closed"""
+        await self.start()
+        while not self._closed:
+            yield self()
+            await self.wait()
+
+    async def remove(self) -> None:
+        """Remove the stream"""
+        if self._client._streams.pop(self._stream_id, None) is not None:
+            await self._client._call(self._client.krpc.remove_stream, self._stream_id)
+        self._close(StreamError("Stream does not exist"))
+
+    def _set_value(self, value: object) -> None:
+        self._value = value
+        self._updated = True
+        update, self._update = self._update, asyncio.Event()
+        update.set()
+
+    def _close(self, error: Exception) -> None:
+        """No further update will ever arrive, so wake anything waiting for one"""
+        self._closed = True
+        self._set_value(error)
+
+
+class Event:
+    """An event, which is triggered on the server"""
+
+    def __init__(self, client: Client, event: KRPC.Event) -> None:
+        self._stream = client._get_stream(event.stream.id, client._types.bool_type)
+
+    @property
+    def stream(self) -> Stream:
+        """The underlying stream for the event"""
+        return self._stream
+
+    async def start(self) -> None:
+        """Start the underlying stream for the event"""
+        await self._stream.start(False)
+
+    async def wait(self) -> None:
+        """Wait until the event is triggered"""
+        stream = self._stream
+        if not stream.started:
+            await self.start()
+        stream._value = False
+        while not stream._closed and not (stream._updated and stream()):
+            await stream.wait()
+        stream()
+
+    async def remove(self) -> None:
+        """Remove the event from the server"""
+        await self._stream.remove()
+
+
+class Client(ClientBase):
+    """
+    A kRPC client for use with asyncio. Services provided by the server are added as
+    they are to krpc.client.Client, and calling a procedure, or reading a property,
+    returns an awaitable for its result rather than waiting for it. Calls are sent as
+    they are made, and any number of them can be waiting for their results at once.
+    Instances should be obtained by awaiting krpc.aio.connect.
+    """
+
+    def __init__(
+        self, rpc_connection: Connection, stream_connection: Optional[Connection]
+    ) -> None:
+        super().__init__()
+        self._rpc_connection = rpc_connection
+        self._stream_connection = stream_connection
+        # The server answers the requests on a connection in the order they were sent,
+        # so each response is for the oldest request still waiting for one
+        self._pending: Deque[
+            Tuple[asyncio.Future, Optional[TypeBase]]  # type: ignore[type-arg]
+        ] = deque()
+        self._streams: Dict[int, Stream] = {}
+        self._error: Optional[Exception] = None
+        # Why no more stream updates will arrive, once none will
+        self._stream_error: Optional[Exception] = None
+        self._rpc_task = asyncio.ensure_future(self._receive_responses())
+        self._stream_task = (
+            asyncio.ensure_future(self._receive_updates())
+            if stream_connection is not None
+            else None
+        )
+
+    async def close(self) -> None:
+        """Close the connections to the server. Calls still waiting for a result, and
+        anything waiting for a stream to update, are woken with an error."""
+        self._fail(socket.error("Connection closed"))
+        self._rpc_connection.close()
+        self._rpc_task.cancel()
+        if self._stream_connection is not None:
+            self._stream_connection.close()
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+        for task in (self._rpc_task, self._stream_task):
+            if task is not None:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def __aenter__(self) -> Client:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def add_stream(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> Stream:
+        """Add a stream to the server"""
+        if self._stream_connection is None:
+            raise StreamError("Not connected to stream server")
+        if func == setattr:
+            raise StreamError("Cannot stream a property setter")
+        return_type = self._get_return_type(func, *args, **kwargs)
+        call = self.get_call(func, *args, **kwargs)
+        stream = await self._call(self.krpc.add_stream, call, False)
+        return self._get_stream(stream.id, return_type)
+
+    @asynccontextmanager
+    async def stream(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> AsyncIterator[Stream]:
+        """'async with' support for add_stream"""
+        stream = await self.add_stream(func, *args, **kwargs)
+        try:
+            yield stream
+        finally:
+            await stream.remove()
+
+    async def set(self, obj: object, name: str, value: object) -> None:
+        """Set a property of a remote object or service, waiting until the server has set
+        it. A property cannot be set by assigning to it, as there would be nothing to
+        wait on, and an error setting it would be lost."""
+        call, _ = self._capture_call(setattr, obj, name, value)
+        await self._send(envelope.encode_request([call.SerializeToString()]), None)
+
+    async def _call(self, func: Callable[..., object], *args: object) -> Any:
+        """Call a procedure through its stub and wait for the result. The stubs are typed
+        for krpc.client.Client, whose calls return their result, whereas on this client
+        they return an awaitable for it."""
+        return await cast(Awaitable[Any], func(*args))
+
+    def _get_stream(self, stream_id: int, return_type: TypeBase) -> Stream:
+        if stream_id not in self._streams:
+            stream = Stream(self, stream_id, return_type)
+            if self._stream_error is not None:
+                stream._close(self._stream_error)
+            self._streams[stream_id] = stream
+        return self._streams[stream_id]
+
+    def _invoke(
+        self,
+        service: str,
+        procedure: str,
+        args: Iterable[object],
+        param_types: Iterable[TypeBase],
+        return_type: Optional[TypeBase],
+    ) -> Optional[asyncio.Future]:  # type: ignore[type-arg]
+        """Send an RPC, returning a future for its result"""
+        if self._capturing and self._record_call(
+            service, procedure, args, param_types, return_type
+        ):
+            return None
+        if Attributes.is_a_property_setter(
+            procedure
+        ) or Attributes.is_a_class_property_setter(procedure):
+            raise RPCError(
+                "A property cannot be set by assigning to it on an asyncio client, as "
+                "nothing would wait for the server to set it; "
+                "use 'await client.set(obj, name, value)' instead"
+            )
+        data = envelope.encode_request(
+            [self._encode_call(service, procedure, args, param_types)]
+        )
+        return self._send(data, return_type)
+
+    def _send(
+        self, data: bytes, return_type: Optional[TypeBase]
+    ) -> asyncio.Future:  # type: ignore[type-arg]
+        """Send an encoded request, returning a future for the result of its call"""
+        future = asyncio.get_running_loop().create_future()
+        if self._error is not None:
+            future.set_exception(self._error)
+            return future
+        self._pending.append((future, return_type))
+        self._rpc_connection.send(data)
+        return future
+
+    async def _receive_responses(self) -> None:
+        """Complete the future for each call as the response to it arrives"""
+        while True:
+            try:
+                response = await self._rpc_connection.receive_response()
+            except Exception as exn:  # pylint: disable=broad-except
+                # Whether the connection was closed or the response could not be read,
+                # the responses still to come can no longer be matched to calls
+                self._fail(exn)
+                return
+            if not self._pending:
+                self._fail(RPCError("Received a response when no call was waiting"))
+                return
+            future, return_type = self._pending.popleft()
+            if not future.cancelled():
+                self._complete(future, response, return_type)
+
+    def _complete(
+        self,
+        future: asyncio.Future,  # type: ignore[type-arg]
+        response: envelope.Response,
+        return_type: Optional[TypeBase],
+    ) -> None:
+        """Complete the future for a call with its result, or the error it failed with.
+        The error is caught here rather than in the task receiving responses, so that its
+        traceback holds no frame of the task. Clearing the frames of a traceback, as
+        unittest's assertRaises does, would otherwise close the task's coroutine."""
+        try:
+            results = self._check_response(response)
+            future.set_result(self._decode_result(results[0], return_type))
+        except Exception as exn:  # pylint: disable=broad-except
+            future.set_exception(exn)
+
+    async def _receive_updates(self) -> None:
+        """Store the new values of the streams as each update arrives"""
+        assert self._stream_connection is not None
+        while True:
+            try:
+                self._update(await self._stream_connection.receive_stream_update())
+            except socket.error:
+                # The connection was closed as the client closes, or by the server
+                error = StreamError("Connection closed")
+                break
+            except Exception as exn:  # pylint: disable=broad-except
+                # An update that cannot be read leaves the connection out of step with the
+                # server, so no later update can be read either. Report it, as nothing else
+                # would, and fail anything waiting for an update rather than leave it blocked.
+                asyncio.get_running_loop().call_exception_handler(
+                    {
+                        "message": "Exception receiving a stream update",
+                        "exception": exn,
+                        "future": self._stream_task,
+                    }
+                )
+                error = StreamError(
+                    "Stream updates are no longer being received: %s" % exn
+                )
+                error.__cause__ = exn
+                break
+        self._stream_connection.close()
+        self._close_streams(error)
+
+    def _update(self, update: List[envelope.StreamResult]) -> None:
+        for stream_id, (error, value, is_null) in update:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                continue
+            if error is not None:
+                stream._set_value(self._build_error(error))
+            elif is_null:
+                stream._set_value(None)
+            else:
+                stream._set_value(Decoder.decode(self, value, stream.return_type))
+
+    def _close_streams(self, error: Exception) -> None:
+        """Wake anything waiting for a stream to update with the error, and close any
+        stream added after this with it"""
+        if self._stream_error is None:
+            self._stream_error = error
+        for stream in self._streams.values():
+            stream._close(self._stream_error)
+
+    def _fail(self, error: Exception) -> None:
+        """Fail every call waiting for a result, and any made after this, and wake
+        anything waiting for a stream to update"""
+        if self._error is None:
+            self._error = error
+        while self._pending:
+            future, _ = self._pending.popleft()
+            if not future.done():
+                future.set_exception(self._error)
+        self._close_streams(StreamError("Connection closed"))
+
+    def _event(self, event: KRPC.Event) -> object:
+        return Event(self, event)
+
+
+async def connect(
+    name: Optional[str] = None,
+    address: str = krpc.DEFAULT_ADDRESS,
+    rpc_port: int = krpc.DEFAULT_RPC_PORT,
+    stream_port: Optional[int] = krpc.DEFAULT_STREAM_PORT,
+    use_pregenerated_stubs: bool = True,
+    timeout: Optional[float] = None,
+) -> Client:
+    """
+    Connect to a kRPC server on the specified IP address and port numbers, returning an
+    asyncio client. The parameters are as for krpc.connect.
+    """
+    rpc_connection = await Connection.open(address, rpc_port, timeout)
+    stream_connection = (
+        await Connection.open(address, stream_port, timeout)
+        if stream_port is not None
+        else None
+    )
+    return await _connect(
+        name, rpc_connection, stream_connection, use_pregenerated_stubs
+    )
+
+
+async def connect_local(
+    name: Optional[str] = None,
+    rpc_path: str = krpc.DEFAULT_RPC_PATH,
+    stream_path: Optional[str] = krpc.DEFAULT_STREAM_PATH,
+    use_pregenerated_stubs: bool = True,
+) -> Client:
+    """
+    Connect to a kRPC server on the same machine, over unix domain sockets, returning
+    an asyncio client. The parameters are as for krpc.connect_local.
+    """
+    rpc_connection = await Connection.open_local(rpc_path or krpc._default_path("rpc"))
+    stream_connection = (
+        await Connection.open_local(stream_path or krpc._default_path("stream"))
+        if stream_path is not None
+        else None
+    )
+    return await _connect(
+        name, rpc_connection, stream_connection, use_pregenerated_stubs
+    )
+
+
+async def _connect(
+    name: Optional[str],
+    rpc_connection: Connection,
+    stream_connection: Optional[Connection],
+    use_pregenerated_stubs: bool,
+) -> Client:
+    """Perform the connection handshake over already opened connections, as krpc does,
+    then load the services the server provides"""
+
+    # Connect to RPC server
+    request = KRPC.ConnectionRequest()
+    request.type = KRPC.ConnectionRequest.RPC
+    if name is not None:
+        request.client_name = name
+    rpc_connection.send_message(request)
+    response = cast(
+        KRPC.ConnectionResponse,
+        await rpc_connection.receive_message(KRPC.ConnectionResponse),
+    )
+    if response.status != KRPC.ConnectionResponse.OK:
+        raise ConnectionError(response.message)
+    client_identifier = response.client_identifier
+
+    # Connect to Stream server
+    if stream_connection is not None:
+        request = KRPC.ConnectionRequest()
+        request.type = KRPC.ConnectionRequest.STREAM
+        request.client_identifier = client_identifier
+        stream_connection.send_message(request)
+        response = cast(
+            KRPC.ConnectionResponse,
+            await stream_connection.receive_message(KRPC.ConnectionResponse),
+        )
+        if response.status != KRPC.ConnectionResponse.OK:
+            raise ConnectionError(response.message)
+
+    client = Client(rpc_connection, stream_connection)
+    services = await client._send(
+        envelope.encode_request([client._encode_call("KRPC", "GetServices", [], [])]),
+        client._types.services_type,
+    )
+    client._load_services(
+        cast(KRPC.Services, services).services, use_pregenerated_stubs
+    )
+    return client
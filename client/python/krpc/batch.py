@@ -0,0 +1,109 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Optional, Tuple, TYPE_CHECKING
+from types import TracebackType
+from krpc.error import RPCError
+from krpc.types import TypeBase
+import krpc.schema.KRPC_pb2 as KRPC
+
+if TYPE_CHECKING:
+    from krpc.client import Client, Invocation
+
+
+class BatchCall:
+    """A remote procedure call that is part of a batch. Its result is available once
+    the batch has been executed."""
+
+    def __init__(self) -> None:
+        self._done = False
+        self._outcome: object = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the batch the call is part of has been executed"""
+        return self._done
+
+    @property
+    def outcome(self) -> object:
+        """The result of the call, or the exception it raised in its place"""
+        if not self._done:
+            raise RPCError("The batch has not been executed")
+        return self._outcome
+
+    def result(self) -> Any:
+        """The result of the call. Raises the exception the call raised, if it did."""
+        outcome = self.outcome
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def _set_outcome(self, outcome: object) -> None:
+        self._outcome = outcome
+        self._done = True
+
+
+class Batch:
+    """A set of remote procedure calls that are sent to the server together, in a
+    single request, rather than one round trip each. A call is added to the batch by
+    naming the function to call and its arguments, as for Client.add_stream, or for a
+    property setter as setattr and its arguments. Its result is read from the object
+    returned once the batch has been executed.
+
+    Used in a with statement, the batch is executed on leaving the block, unless the
+    block raised."""
+
+    def __init__(self, client: Client) -> None:
+        self._client = client
+        self._calls: List[Tuple[KRPC.ProcedureCall, Optional[TypeBase]]] = []
+        self._results: List[BatchCall] = []
+        # The property setters in the batch, whose cached values are dropped once it
+        # has been executed
+        self._setters: List[Invocation] = []
+        self._executed = False
+
+    def add(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> BatchCall:
+        """Add a call to the batch, returning the object its result is read from"""
+        if self._executed:
+            raise RPCError("The batch has already been executed")
+        # The call is built now rather than when the batch is executed, so that an
+        # argument of the wrong type is reported where the call was added
+        if func == setattr:
+            setter = self._client._capture_setter(*args)
+            self._calls.append((self._client._build_call(*setter), None))
+            self._setters.append(setter)
+        else:
+            self._calls.append(self._client._capture_call(func, *args, **kwargs))
+        result = BatchCall()
+        self._results.append(result)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def execute(self) -> None:
+        """Send every call in the batch to the server in a single request, and wait for
+        their results. A call that fails does not prevent the others from running; the
+        exception it raised is what its result is read as."""
+        if self._executed:
+            raise RPCError("The batch has already been executed")
+        self._executed = True
+        if not self._calls:
+            return
+        outcomes = self._client._invoke_many(self._calls)
+        for setter in self._setters:
+            self._client._cache._written(setter)
+        for result, outcome in zip(self._results, outcomes):
+            result._set_outcome(outcome)
+
+    def __enter__(self) -> Batch:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.execute()
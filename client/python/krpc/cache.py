@@ -0,0 +1,281 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from collections import OrderedDict
+import inspect
+import threading
+import time
+from krpc.error import RPCError
+from krpc.types import ClassBase, WrappedClass
+from krpc.envelope import ProcedureResult
+
+if TYPE_CHECKING:
+    from krpc.client import Client, Invocation
+    from krpc.stream import Stream
+
+# How many values a cache holds to begin with, beyond which the least recently used is
+# dropped to make room for another
+DEFAULT_MAX_SIZE = 4096
+
+
+class CachePolicy:
+    """How long a value read through the cache is used for before it is read from the
+    server again"""
+
+    def _stamp(self, cache: Cache) -> object:
+        """What a value read now is marked with, for _valid to check it by"""
+        raise NotImplementedError
+
+    def _valid(self, cache: Cache, stamp: object) -> bool:
+        """Whether a value marked with the given stamp can still be used"""
+        raise NotImplementedError
+
+
+class Immutable(CachePolicy):
+    """The value never changes, so it is read from the server once"""
+
+    def _stamp(self, cache: Cache) -> object:
+        return None
+
+    def _valid(self, cache: Cache, stamp: object) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return "IMMUTABLE"
+
+
+class TimeToLive(CachePolicy):
+    """The value is used for the given number of seconds after it is read"""
+
+    def __init__(self, seconds: float) -> None:
+        if seconds <= 0:
+            raise ValueError("The time to live must be positive")
+        self.seconds = seconds
+
+    def _stamp(self, cache: Cache) -> object:
+        return time.monotonic() + self.seconds
+
+    def _valid(self, cache: Cache, stamp: object) -> bool:
+        return time.monotonic() < stamp  # type: ignore[operator]
+
+    def __repr__(self) -> str:
+        return "TimeToLive(%g)" % self.seconds
+
+
+class UntilGameTimeChanges(CachePolicy):
+    """The value is used until the universal time of the game moves on, so that it is
+    read at most once a physics tick, and not at all while the game is paused"""
+
+    def _stamp(self, cache: Cache) -> object:
+        return cache._game_time_epoch
+
+    def _valid(self, cache: Cache, stamp: object) -> bool:
+        return stamp == cache._game_time_epoch
+
+    def __repr__(self) -> str:
+        return "UNTIL_GAME_TIME_CHANGES"
+
+
+IMMUTABLE = Immutable()
+UNTIL_GAME_TIME_CHANGES = UntilGameTimeChanges()
+
+
+class Cache:
+    """Values read from the server kept by the client and used in place of reading them
+    again. Nothing is cached until a policy is set for a property or method, after which
+    each of its values is kept for as long as the policy allows, one for each object and
+    set of arguments it is read with. Setting the property through the same client drops
+    the value kept for it. When the cache is full, the least recently used value is
+    dropped to make room for another.
+
+    Only calls made directly are cached: those made through a batch, as a stream, by
+    call_async or through a prepared call always go to the server. Setting a property
+    in any of those ways still drops the value kept for it."""
+
+    def __init__(self, client: Client, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self._client = client
+        self._max_size = max_size
+        # The policy for each procedure, by the names of its service and procedure
+        self._policies: Dict[Tuple[str, str], CachePolicy] = {}
+        # The getter of a property whose value is cached, by its setter. Setting the
+        # property drops the value kept for the object it is set on.
+        self._setters: Dict[Tuple[str, str], str] = {}
+        # The encoded result of each call, by the encoded call, with its policy and stamp.
+        # Kept in order of use, least recently used first.
+        self._entries: OrderedDict[
+            bytes, Tuple[ProcedureResult, CachePolicy, object]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._game_time_epoch = 0
+        self._game_time: Optional[Stream] = None
+
+    @property
+    def hits(self) -> int:
+        """The number of calls answered from the cache"""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """The number of calls with a policy that had to be made to the server"""
+        return self._misses
+
+    @property
+    def max_size(self) -> int:
+        """The most values the cache holds at once"""
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int) -> None:
+        if value < 0:
+            raise ValueError("The size of a cache cannot be negative")
+        with self._lock:
+            self._max_size = value
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_policy(self, target: object, name: str, policy: CachePolicy) -> None:
+        """Cache the values of a property or method, given the service, class or object
+        it belongs to and its name, for as long as the policy allows. For example,
+        cache.set_policy(conn.space_center.Part, "name", krpc.cache.IMMUTABLE). Replaces
+        any policy already set for it, and drops the values kept under that one."""
+        getter, setter = self._procedures(target, name)
+        if isinstance(policy, UntilGameTimeChanges):
+            self._watch_game_time()
+        with self._lock:
+            self._policies[getter] = policy
+            if setter is not None:
+                self._setters[setter] = getter[1]
+            self._drop(getter)
+
+    def remove_policy(self, target: object, name: str) -> None:
+        """Stop caching the values of a property or method, and drop those kept"""
+        getter, setter = self._procedures(target, name)
+        with self._lock:
+            self._policies.pop(getter, None)
+            if setter is not None:
+                self._setters.pop(setter, None)
+            self._drop(getter)
+
+    def clear(self) -> None:
+        """Drop every value in the cache, and reset its counts of hits and misses. The
+        policies that have been set are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def _get(self, key: bytes) -> Optional[ProcedureResult]:
+        """The result kept for an encoded call, if there is one that can still be used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, policy, stamp = entry
+                if policy._valid(self, stamp):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return result
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def _put(self, key: bytes, policy: CachePolicy, result: ProcedureResult) -> None:
+        """Keep the result of an encoded call. An error is not kept, so that the call is
+        made again rather than failing for as long as the value would have lasted."""
+        if result[0] is not None:
+            return
+        with self._lock:
+            self._entries[key] = (result, policy, policy._stamp(self))
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _written(self, setter: Invocation) -> None:
+        """Drop the value kept for a property, once a call to its setter has been made"""
+        service, procedure, args, param_types, _ = setter
+        getter = self._setters.get((service, procedure))
+        if getter is not None:
+            # The value set is the last argument, after the object it is set on, if any
+            self._discard(
+                self._client._encode_call(service, getter, args[:-1], param_types[:-1])
+            )
+
+    def _discard(self, key: bytes) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def _drop(self, procedure: Tuple[str, str]) -> None:
+        """Drop every value kept for a procedure"""
+        prefix = self._client._encode_call(procedure[0], procedure[1], [], [])
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def _procedures(
+        self, target: object, name: str
+    ) -> Tuple[Tuple[str, str], Optional[Tuple[str, str]]]:
+        """The procedure a member reads its value with, and the one that sets it, if it
+        is a property that can be set. Each is given by the names of its service and
+        procedure."""
+        obj = _instance(self._client, target)
+        prop = getattr(type(obj), name, None)
+        setter = None
+        if isinstance(prop, property):
+            calls = self._capture(getattr, obj, name)
+            if prop.fset is not None:
+                setters = self._capture(setattr, obj, name, None)
+                if len(setters) == 1:
+                    setter = (setters[0][0], setters[0][1])
+        else:
+            method = getattr(obj, name, None)
+            if not callable(method) or name.startswith("_"):
+                calls = []
+            else:
+                parameters = inspect.signature(method).parameters
+                calls = self._capture(method, *[None] * len(parameters))
+        if len(calls) != 1:
+            raise RPCError(
+                "%s is not a remote procedure or property of %s" % (name, target)
+            )
+        return (calls[0][0], calls[0][1]), setter
+
+    def _capture(self, func: object, *args: object) -> List[Invocation]:
+        try:
+            return self._client._capture_invocations(func, *args)  # type: ignore[arg-type]
+        except NotImplementedError:
+            # A property that can only be set
+            return []
+
+    def _watch_game_time(self) -> None:
+        """Start counting changes to the game's universal time, for the values that are
+        only used until it changes"""
+        with self._lock:
+            if self._game_time is not None:
+                return
+            space_center = getattr(self._client, "space_center", None)
+            if space_center is None:
+                raise RPCError(
+                    "Caching until the game time changes needs the SpaceCenter service"
+                )
+            self._game_time = self._client.add_stream(getattr, space_center, "ut")
+        self._game_time.add_callback(self._game_time_changed)
+
+    def _game_time_changed(self, _: object = None) -> None:
+        with self._lock:
+            self._game_time_epoch += 1
+
+
+def _instance(client: Client, target: object) -> object:
+    """The object to find the procedures of a member on. A class is given an instance
+    that stands in for its objects, as any of them calls the same procedures."""
+    if isinstance(target, WrappedClass):
+        target = target._class_type
+    if isinstance(target, type) and issubclass(target, ClassBase):
+        obj = target.__new__(target)
+        ClassBase.__init__(obj, client, 0)
+        return obj
+    return target
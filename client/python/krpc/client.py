@@ -1,26 +1,72 @@
 from __future__ import annotations
-from typing import cast, Callable, Generator, Iterable, Iterator, Optional, Type
+from typing import (
+    Any,
+    cast,
+    Dict,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
 from types import TracebackType
+from concurrent.futures import Future
 from contextlib import contextmanager
+import functools
+import hashlib
+import os
+import queue
+import re
 import sys
+import tempfile
 import threading
 import warnings
+import weakref
+from krpc import envelope
 from krpc.connection import Connection
 from krpc.definitions import CLASS, ENUMERATION, STRUCT, Definition, register_all
+from krpc.batch import Batch
+from krpc.cache import Cache
+from krpc.pipeline import Pipeline
+from krpc.prepared import PreparedCall
 from krpc.error import StreamError
 from krpc.event import Event
-from krpc.types import Types, TypeBase, DefaultArgument, EXCEPTION_TYPES
+from krpc.types import (
+    Types,
+    TypeBase,
+    ClassBase,
+    DynamicClassBase,
+    DefaultArgument,
+    EXCEPTION_TYPES,
+)
 from krpc.service import create_service, service_definitions
 from krpc.streammanager import StreamManager
 from krpc.stream import Stream
 from krpc.encoder import Encoder
 from krpc.decoder import Decoder
+from krpc.envelope import ProcedureResult, Response
 from krpc.utils import snake_case
 from krpc.error import RPCError
 import krpc.streammanager
 import krpc.schema.KRPC_pb2 as KRPC
 import krpc.services
 
+# The services whose calls have to be made over the connection the client was identified by
+# when it connected. The server knows the client by the connection a call arrives on, and
+# the streams and events of a client, and the user interface and drawing objects it creates,
+# belong to it: a stream added over another connection would have no stream connection to
+# send its updates to, and an object created over one could not be removed over another.
+_PRIMARY_SERVICES = frozenset(["KRPC", "UI", "Drawing"])
+
+# What a call is made through _invoke with: the names of its service and procedure, its
+# arguments and their types, and the type of its result
+Invocation = Tuple[str, str, List[object], List[TypeBase], Optional[TypeBase]]
+
 
 def _stub_definitions(
     service_info: KRPC.Service, service: object
@@ -101,41 +147,141 @@ def _stub_definitions(
         )
 
 
-class Client(krpc.services.Client):
+def _services_cache_path(cache_dir: str, status: KRPC.Status) -> str:
+    """The file the services of a server are cached in, named by the version of the server
+    and the hash of its services"""
+    version = re.sub(r"[^\w.-]", "_", status.version)
+    return os.path.join(cache_dir, "%s-%s.services" % (version, status.services_hash))
+
+
+def _read_services_cache(path: str, services_hash: str) -> Optional[bytes]:
+    """The cached services in the given file, if it holds the ones with the given hash. A
+    file that is missing, cannot be read or holds anything else is passed over, and the
+    services are asked for again."""
+    try:
+        with open(path, "rb") as cache_file:
+            data = cache_file.read()
+    except OSError:
+        return None
+    if hashlib.sha256(data).hexdigest() != services_hash:
+        return None
+    return data
+
+
+def _write_services_cache(path: str, data: bytes) -> None:
+    """Cache the services of a server in the given file. It is written under another name
+    and then moved into place, so that a client connecting at the same time never reads
+    half of it. A cache that cannot be written leaves the client working without one."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path), suffix=".tmp", delete=False
+        ) as cache_file:
+            cache_file.write(data)
+        os.replace(cache_file.name, path)
+    except OSError as exn:
+        warnings.warn("Could not cache the services of the server: %s" % exn)
+
+
+def _deferred_stub_definitions(service_info: KRPC.Service) -> Iterator[Definition]:
+    """The types of a service whose stubs were generated ahead of time, named but not
+    registered. Each is registered from the stubs when the types of the service are first
+    used, so that the stubs are not imported before then."""
+    name = service_info.name
+
+    def register(_: Types) -> None:
+        pass
+
+    for cls in service_info.classes:
+        yield Definition(CLASS, name, cls.name, [], register)
+    for enumeration in service_info.enumerations:
+        yield Definition(ENUMERATION, name, enumeration.name, [], register)
+    for struct in service_info.structs:
+        yield Definition(
+            STRUCT, name, struct.name, [field.type for field in struct.fields], register
+        )
+
+
+class ClientBase(krpc.services.Client):
     """
-    A kRPC client, through which all Remote Procedure Calls are made.
-    Services provided by the server that the client connects
-    to are automatically added. RPCs can be made using
-    client.ServiceName.ProcedureName(parameter)
+    What every kRPC client has in common, however its calls are carried: the services
+    provided by the server, and building calls and decoding their results. Making a
+    call is up to the client.
     """
 
-    def __init__(
-        self,
-        rpc_connection: Connection,
-        stream_connection: Connection,
-        use_pregenerated_stubs: bool = True,
-    ) -> None:
+    def __init__(self) -> None:
         super().__init__()
         self._types = Types()
-        self._rpc_connection = rpc_connection
-        self._rpc_connection_lock = threading.Lock()
-        self._stream_connection = stream_connection
-        self._stream_manager = StreamManager(self)
-
-        services = cast(
-            KRPC.Services,
-            self._invoke("KRPC", "GetServices", [], [], self._types.services_type),
-        ).services
-
-        # Load services
+        # Property setters only exist as calls made through _invoke, so a setter is turned
+        # into a call by running it with _invoke recording the call rather than making it.
+        # The count of threads doing so keeps the check for it off every other call.
+        self._capture = threading.local()
+        self._capturing = 0
+        self._capturing_lock = threading.Lock()
+        # A call names its service and procedure by the ids the server gave them, where
+        # it gave them any, as they are shorter to send and quicker to look up than the
+        # names. The ids may differ between server versions, so only those the server
+        # the client is connected to reports are used.
+        self._procedure_ids: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._service_names: Dict[int, str] = {}
+        # The proxy for each remote object the client has been handed, by its class and
+        # id, so that the same object is always the same proxy rather than a new one for
+        # every result it is in. Held weakly, so a proxy is freed once nothing else holds it.
+        self._objects: weakref.WeakValueDictionary[Tuple[type, int], ClassBase] = (
+            weakref.WeakValueDictionary()
+        )
+        # Held while a proxy is looked for again and added if it is still missing, so that
+        # two threads handed the same object at once cannot each create a proxy for it
+        self._objects_lock = threading.Lock()
+        # The services without pre-generated stubs that have yet to be used, by the name of
+        # the attribute each is used through. Building a service takes far longer than
+        # registering its types, and most programs use few of the services a server
+        # provides, so each is built when first used rather than on connecting.
+        self._unbuilt_services: Dict[str, KRPC.Service] = {}
+        self._unbuilt_services_lock = threading.RLock()
+
+    def _remote_object(self, class_type: type, object_id: int) -> ClassBase:
+        """The proxy for a remote object of the given class and id"""
+        key = (class_type, object_id)
+        obj = self._objects.get(key)
+        if obj is None:
+            if self._unbuilt_services and issubclass(class_type, DynamicClassBase):
+                # The members of a class are added by building its service, and an object
+                # can be handed over by another service before its own has been used
+                service_name = class_type._service_name  # type: ignore[attr-defined]
+                self._build_service(snake_case(service_name))
+            with self._objects_lock:
+                obj = self._objects.get(key)
+                if obj is None:
+                    obj = cast(ClassBase, class_type(self, object_id))
+                    self._objects[key] = obj
+        return obj
+
+    def _load_services(
+        self, services: Iterable[KRPC.Service], use_pregenerated_stubs: bool
+    ) -> None:
+        """Load the services the server provides, given their definitions"""
         definitions = []
         dynamic_services = []
         for service_info in services:
-            service = None
-            if use_pregenerated_stubs:
-                service = self._services.get(service_info.name)
-            if service is not None:
-                definitions.extend(_stub_definitions(service_info, service))
+            if service_info.id:
+                self._service_names[service_info.id] = service_info.name
+                for procedure_info in service_info.procedures:
+                    if procedure_info.id:
+                        self._procedure_ids[
+                            (service_info.name, procedure_info.name)
+                        ] = (
+                            service_info.id,
+                            procedure_info.id,
+                        )
+            if use_pregenerated_stubs and krpc.services.has_stub(service_info.name):
+                # Importing the stubs is left until one of the types of the service is
+                # first used, so its types are only named here for the definitions that
+                # refer to them to be checked against
+                definitions.extend(_deferred_stub_definitions(service_info))
+                self._types.defer(
+                    service_info.name, functools.partial(self._load_stub, service_info)
+                )
             else:
                 dynamic_services.append(service_info)
                 definitions.extend(service_definitions(service_info))
@@ -144,96 +290,41 @@ class Client(krpc.services.Client):
         # service may define, and a default value cannot be decoded before the definition of
         # the enumeration it belongs to has been registered
         register_all(self._types, definitions)
-        # Then dynamically create services for those without pre-generated stubs
+        # Then leave the services without pre-generated stubs to be created when first used,
+        # in place of any stub they would otherwise be used through
         for service_info in dynamic_services:
-            setattr(
-                self, snake_case(service_info.name), create_service(self, service_info)
-            )
-
-        # Set up stream update thread
-        if stream_connection is not None:
-            self._stream_thread_stop = threading.Event()
-            self._stream_thread = threading.Thread(
-                target=krpc.streammanager.update_thread,
-                args=(
-                    self._stream_manager,
-                    stream_connection,
-                    self._stream_thread_stop,
-                ),
-            )
-            self._stream_thread.daemon = True
-            self._stream_thread.start()
-        else:
-            self._stream_thread = None
-
-    def close(self) -> None:
-        self._rpc_connection.close()
-        if self._stream_thread is not None:
-            self._stream_thread_stop.set()
-            # Callbacks run on the update thread, so a client closed from one would be
-            # joining the thread it is running on, which raises
-            if threading.current_thread() is not self._stream_thread:
-                self._stream_thread.join()
-        # No further updates will arrive, so wake anything waiting for one rather than
-        # leaving it blocked for good
-        self._stream_manager.notify_closed()
-
-    def __enter__(self) -> Client:
-        return self
-
-    def __exit__(
-        self,
-        exc_type: Optional[Type[BaseException]],
-        exc_value: Optional[BaseException],
-        exc_tb: Optional[TracebackType],
-    ) -> None:
-        self.close()
-
-    def add_stream(
-        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
-    ) -> Stream:
-        """Add a stream to the server"""
-        if self._stream_connection is None:
-            raise StreamError("Not connected to stream server")
-        if func == setattr:
-            raise StreamError("Cannot stream a property setter")
-        return_type = self._get_return_type(func, *args, **kwargs)
-        call = self.get_call(func, *args, **kwargs)
-        return krpc.stream.Stream.from_call(self, return_type, call)
-
-    @contextmanager
-    def stream(
-        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
-    ) -> Iterator[Stream]:
-        """'with' support for add_stream"""
-        stream = self.add_stream(func, *args, **kwargs)
-        try:
-            yield stream
-        finally:
-            stream.remove()
-
-    @property
-    def stream_update_condition(self) -> threading.Condition:
-        """Condition variable that is notified when
-        a stream update message has finished being processed."""
-        return self._stream_manager.update_condition
-
-    def wait_for_stream_update(self, timeout: Optional[float] = None) -> None:
-        """Wait until the next stream update message or a timeout occurs.
-        The condition variable must be locked before calling this method.
-
-        When timeout is not None, it should be a floating point number
-        specifying the timeout in seconds for the operation."""
-        self._stream_manager.wait_for_update(timeout)
-
-    def add_stream_update_callback(self, callback: Callable[[], None]) -> None:
-        """Add a callback that is invoked whenever
-        a stream update message has finished being processed."""
-        self._stream_manager.add_update_callback(callback)
-
-    def remove_stream_update_callback(self, callback: Callable[[], None]) -> None:
-        """Remove a stream update callback."""
-        self._stream_manager.remove_update_callback(callback)
+            name = snake_case(service_info.name)
+            self.__dict__.pop(name, None)
+            self._unbuilt_services[name] = service_info
+
+    def _load_stub(self, service_info: KRPC.Service) -> None:
+        """Register the types of a service whose stubs were generated ahead of time"""
+        for definition in _stub_definitions(
+            service_info, self._stub(service_info.name)
+        ):
+            definition.register(self._types)
+
+    def _build_service(self, name: str) -> None:
+        """Create the service used through the given attribute, if it has yet to be"""
+        with self._unbuilt_services_lock:
+            service_info = self._unbuilt_services.get(name)
+            if service_info is None:
+                return
+            setattr(self, name, create_service(self, service_info))
+            del self._unbuilt_services[name]
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> object:
+            # Only reached for an attribute the client does not have, which is what a
+            # service that has yet to be built is
+            if name not in self.__dict__.get("_unbuilt_services", ()):
+                return super().__getattr__(name)
+            self._build_service(name)
+            return getattr(self, name)
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(self._unbuilt_services))
 
     @staticmethod
     def get_call(
@@ -254,6 +345,45 @@ class Client(krpc.services.Client):
             )
         return cast(KRPC.ProcedureCall, builder(*args, **kwargs))
 
+    def _capture_call(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> Tuple[KRPC.ProcedureCall, Optional[TypeBase]]:
+        """Convert a remote procedure call to a KRPC.ProcedureCall message and the type of
+        its result, as for get_call, and a property setter too"""
+        if func != setattr:
+            return_type = self._get_return_type(func, *args, **kwargs)
+            return self.get_call(func, *args, **kwargs), return_type
+        return self._build_call(*self._capture_setter(*args)), None
+
+    def _capture_setter(self, *args: object) -> Invocation:
+        """The call that setting a property of a remote object or service makes, given
+        the arguments to setattr, as recorded by _capture_invocations"""
+        obj, name, value = args
+        prop = getattr(type(obj), cast(str, name), None)
+        if not isinstance(prop, property) or prop.fset is None:
+            raise RPCError("%s is not a settable property of %s" % (name, obj))
+        calls = self._capture_invocations(setattr, obj, name, value)
+        if len(calls) != 1:
+            raise RPCError("%s is not a remote property of %s" % (name, obj))
+        return calls[0]
+
+    def _capture_invocations(
+        self, func: Callable, *args: object  # type: ignore[type-arg]
+    ) -> List[Invocation]:
+        """Run a function with the calls it makes through _invoke recorded rather than
+        made, returning what each would have been made with"""
+        calls: List[Invocation] = []
+        self._capture.calls = calls
+        with self._capturing_lock:
+            self._capturing += 1
+        try:
+            func(*args)
+        finally:
+            with self._capturing_lock:
+                self._capturing -= 1
+            self._capture.calls = None
+        return calls
+
     @staticmethod
     def _get_return_type(
         func: Callable,  # type: ignore[type-arg] # pylint: disable=unused-argument
@@ -273,45 +403,52 @@ class Client(krpc.services.Client):
             )
         return cast(TypeBase, return_type_fn())
 
-    def _invoke(
+    def _record_call(
         self,
         service: str,
         procedure: str,
         args: Iterable[object],
         param_types: Iterable[TypeBase],
         return_type: Optional[TypeBase],
+    ) -> bool:
+        """Record a call rather than making it, if this thread is capturing the calls a
+        property setter makes. Returns whether it was recorded."""
+        calls = getattr(self._capture, "calls", None)
+        if calls is None:
+            return False
+        calls.append((service, procedure, list(args), list(param_types), return_type))
+        return True
+
+    def _check_response(self, response: Response) -> List[ProcedureResult]:
+        """Raise the error in a response, if it has one, and return its results
+        otherwise"""
+        error, results = response
+        if error is not None:
+            raise self._build_error(error)
+        return results
+
+    def _decode_result(
+        self, result: ProcedureResult, return_type: Optional[TypeBase]
     ) -> object:
-        """Execute an RPC"""
-
-        # Build the request. A request carries exactly one call, so the call is
-        # filled in where it belongs rather than built on its own and copied in
-        request = KRPC.Request()
-        self._encode_call(request.calls.add(), service, procedure, args, param_types)
-
-        # Send the request
-        with self._rpc_connection_lock:
-            self._rpc_connection.send_message(request)
-            response = cast(
-                KRPC.Response, self._rpc_connection.receive_message(KRPC.Response)
-            )
+        """Decode the result of a call, raising the error it failed with if it did"""
+        error, value, is_null = result
 
-        # Check for an error response
-        if response.HasField("error"):
-            raise self._build_error(response.error)
+        # Check for an error in the procedure result
+        if error is not None:
+            raise self._build_error(error)
 
-        # Check for an error in the procedure results
-        result = response.results[0]
-        if result.HasField("error"):
-            raise self._build_error(result.error)
-
-        # Decode the response and return the (optional) result
-        if return_type is None or result.is_null:
+        # Decode the (optional) result
+        if return_type is None or is_null:
             return None
-        value = Decoder.decode(self, result.value, return_type)
+        value = Decoder.decode(self, value, return_type)
         if isinstance(value, KRPC.Event):
-            value = Event(self, value)
+            value = self._event(value)
         return value
 
+    def _event(self, event: KRPC.Event) -> object:
+        """The object an event returned by a call is given to the caller as"""
+        raise NotImplementedError
+
     def _build_call(
         self,
         service: str,
@@ -321,41 +458,50 @@ class Client(krpc.services.Client):
         return_type: Optional[TypeBase],  # pylint: disable=unused-argument
     ) -> KRPC.ProcedureCall:
         """Build a KRPC.ProcedureCall object"""
-
-        call = KRPC.ProcedureCall()
-        self._encode_call(call, service, procedure, args, param_types)
-        return call
+        return KRPC.ProcedureCall.FromString(
+            self._encode_call(service, procedure, args, param_types)
+        )
 
     def _encode_call(
         self,
-        call: KRPC.ProcedureCall,
         service: str,
         procedure: str,
         args: Iterable[object],
         param_types: Iterable[TypeBase],
-    ) -> None:
-        """Fill in a KRPC.ProcedureCall message with a call and its arguments"""
-
-        call.service = service
-        call.procedure = procedure
-        arguments = call.arguments
+    ) -> bytes:
+        """Encode a call and its arguments as a ProcedureCall message"""
 
+        parts = [
+            envelope.encode_procedure(
+                service, procedure, self._procedure_ids.get((service, procedure))
+            )
+        ]
         for i, (value, typ) in enumerate(zip(args, param_types)):
             if isinstance(value, DefaultArgument):
                 continue
             if value is None:
-                # A null argument is signaled out-of-band; the value field is left unset
-                arguments.add(position=i, is_null=True)
+                parts.append(envelope.encode_null_argument(i))
                 continue
             if not isinstance(value, typ.python_type):
-                try:
-                    value = self._types.coerce_to(value, typ)
-                except ValueError as exc:
-                    raise TypeError(
-                        "%s.%s() argument %d must be a %s, got a %s"
-                        % (service, procedure, i, typ.python_type, type(value))
-                    ) from exc
-            arguments.add(position=i, value=Encoder.encode(value, typ))
+                value = self._coerce_argument(value, typ, service, procedure, i)
+            parts.append(envelope.encode_argument(i, Encoder.encode(value, typ)))
+        return b"".join(parts)
+
+    def _coerce_argument(
+        self, value: object, typ: TypeBase, service: str, procedure: str, position: int
+    ) -> object:
+        """Convert an argument to the python type of its parameter"""
+        try:
+            return self._types.coerce_to(value, typ)
+        except ValueError as exc:
+            raise TypeError(
+                "%s.%s() argument %d must be a %s, got a %s"
+                % (service, procedure, position, typ.python_type, type(value))
+            ) from exc
+
+    def _service_name(self, call: KRPC.ProcedureCall) -> str:
+        """The name of the service a call is to, whether it names it or gives its id"""
+        return call.service or self._service_names.get(call.service_id, "")
 
     def _build_error(self, error: KRPC.Error) -> Exception:
         """Build an exception from an error message that
@@ -392,3 +538,446 @@ class Client(krpc.services.Client):
         if error.stack_trace:
             msg += "\nServer stack trace:\n" + error.stack_trace
         return msg
+
+
+class Client(ClientBase):
+    """
+    A kRPC client, through which all Remote Procedure Calls are made.
+    Services provided by the server that the client connects
+    to are automatically added. RPCs can be made using
+    client.ServiceName.ProcedureName(parameter)
+    """
+
+    # The client holds the state of everything it is connected through
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        rpc_connection: Connection,
+        stream_connection: Connection,
+        use_pregenerated_stubs: bool = True,
+        pipeline_window: Optional[int] = None,
+        extra_rpc_connections: Sequence[Connection] = (),
+        services_cache_dir: Optional[str] = None,
+    ) -> None:
+        super().__init__()
+        if pipeline_window is not None and extra_rpc_connections:
+            raise ValueError(
+                "Requests cannot be both pipelined and spread over several connections"
+            )
+        self._rpc_connection = rpc_connection
+        self._rpc_connection_lock = threading.Lock()
+        # With more than one connection, a call is made over whichever of them is idle,
+        # so that calls from several threads are made at once rather than one at a time.
+        # Each connection is queued with the lock held while a call is made over it. The
+        # most recently used is taken first, which leaves a single thread using just the one.
+        self._extra_rpc_connections = list(extra_rpc_connections)
+        self._idle_rpc_connections: Optional[
+            queue.LifoQueue[Tuple[Connection, threading.Lock]]
+        ] = None
+        if extra_rpc_connections:
+            self._idle_rpc_connections = queue.LifoQueue()
+            for connection in reversed(self._extra_rpc_connections):
+                self._idle_rpc_connections.put((connection, threading.Lock()))
+            self._idle_rpc_connections.put((rpc_connection, self._rpc_connection_lock))
+        self._pipeline = (
+            Pipeline(rpc_connection, pipeline_window)
+            if pipeline_window is not None
+            else None
+        )
+        self._stream_connection = stream_connection
+        self._stream_manager = StreamManager(self)
+        self._cache = Cache(self)
+
+        services = KRPC.Services.FromString(self._services_data(services_cache_dir))
+        self._load_services(services.services, use_pregenerated_stubs)
+
+        # Set up stream update thread
+        if stream_connection is not None:
+            self._stream_thread = threading.Thread(
+                target=krpc.streammanager.update_thread,
+                args=(self._stream_manager, stream_connection),
+            )
+            self._stream_thread.daemon = True
+            self._stream_thread.start()
+        else:
+            self._stream_thread = None
+
+    def close(self) -> None:
+        if self._pipeline is not None:
+            self._pipeline.close()
+        self._rpc_connection.close()
+        for connection in self._extra_rpc_connections:
+            connection.close()
+        if self._stream_thread is not None:
+            # The update thread is blocked reading the next update, and shutting the
+            # connection down is what wakes it
+            self._stream_connection.shutdown()
+            # Callbacks run on the update thread, so a client closed from one would be
+            # joining the thread it is running on, which raises
+            if threading.current_thread() is not self._stream_thread:
+                self._stream_thread.join()
+        # No further updates will arrive, so wake anything waiting for one rather than
+        # leaving it blocked for good
+        self._stream_manager.notify_closed()
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def add_stream(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> Stream:
+        """Add a stream to the server"""
+        if self._stream_connection is None:
+            raise StreamError("Not connected to stream server")
+        if func == setattr:
+            raise StreamError("Cannot stream a property setter")
+        return_type = self._get_return_type(func, *args, **kwargs)
+        call = self.get_call(func, *args, **kwargs)
+        return krpc.stream.Stream.from_call(self, return_type, call)
+
+    def add_streams(
+        self,
+        calls: Iterable[Sequence[object]],
+        rate: Optional[float] = None,
+        start: bool = True,
+    ) -> List[Stream]:
+        """Add several streams to the server, each given as a function followed by its
+        arguments, as for add_stream. They are added in a single request, and their rate
+        set and started in one more if a rate is given. If start is true, waits until
+        every stream has received its first update. If any of them cannot be added, none
+        of them are, and the error is raised."""
+        if self._stream_connection is None:
+            raise StreamError("Not connected to stream server")
+        added = []
+        for call in calls:
+            func, args = cast(Callable[..., object], call[0]), call[1:]
+            if func == setattr:
+                raise StreamError("Cannot stream a property setter")
+            added.append(
+                (self._get_return_type(func, *args), self.get_call(func, *args))
+            )
+        streams = self._stream_manager.add_streams(added, rate, start)
+        if start:
+            self._stream_manager.wait_for_values(streams)
+        return [krpc.stream.Stream(stream) for stream in streams]
+
+    @contextmanager
+    def stream(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> Iterator[Stream]:
+        """'with' support for add_stream"""
+        stream = self.add_stream(func, *args, **kwargs)
+        try:
+            yield stream
+        finally:
+            stream.remove()
+
+    def batch(self) -> Batch:
+        """Create a batch of remote procedure calls, sent to the server together in a
+        single request when the batch is executed"""
+        return Batch(self)
+
+    def call_many(self, calls: Iterable[Sequence[object]]) -> List[object]:
+        """Make several remote procedure calls in a single request. Each call is given
+        as a function followed by its arguments, as for add_stream. Returns the result
+        of each call in order, or the exception it raised in its place."""
+        batch = self.batch()
+        added = [batch.add(*call) for call in calls]  # type: ignore[arg-type]
+        batch.execute()
+        return [call.outcome for call in added]
+
+    def call_async(
+        self, func: Callable, *args: object, **kwargs: object  # type: ignore[type-arg]
+    ) -> Future:  # type: ignore[type-arg]
+        """Make a remote procedure call without waiting for its result, returning a
+        future for it. The call is given as for add_stream, and may also be a property
+        setter. On a client connected with a pipeline window, calls are sent at once and
+        several can be in flight; otherwise the call is made before this returns."""
+        setter: Optional[Invocation] = None
+        if func == setattr:
+            setter = self._capture_setter(*args)
+            call, return_type = self._build_call(*setter), None
+        else:
+            call, return_type = self._capture_call(func, *args, **kwargs)
+        data = envelope.encode_request([call.SerializeToString()])
+
+        def decode(response: Response) -> object:
+            if setter is not None:
+                self._cache._written(setter)
+            return self._decode_result(self._check_response(response)[0], return_type)
+
+        if self._pipeline is not None:
+            return self._pipeline.submit_encoded(data, decode)
+        future: Future = Future()  # type: ignore[type-arg]
+        try:
+            primary = self._primary_only(self._service_name(call), return_type)
+            future.set_result(decode(self._exchange(data, primary)))
+        except Exception as exn:  # pylint: disable=broad-except
+            future.set_exception(exn)
+        return future
+
+    def prepare(self, obj: object, name: str) -> PreparedCall:
+        """Prepare a call to a method or property of a remote object or service, given
+        the object and the name of the member, to be made many times over. The request
+        is encoded once, but for the values of the arguments, rather than every time
+        the call is made. Calling the result with no arguments reads a property, and
+        with a value sets it; a method is called with the arguments it takes."""
+        return PreparedCall(self, obj, name)
+
+    def _services_data(self, cache_dir: Optional[str]) -> bytes:
+        """The encoded definitions of the services the server provides. Given a directory
+        to cache them in, they are read from there when the server reports that they are
+        the ones it provided before, rather than asked for again."""
+        path = None
+        if cache_dir is not None:
+            status = cast(
+                KRPC.Status,
+                self._invoke("KRPC", "GetStatus", [], [], self._types.status_type),
+            )
+            # A server that does not report a hash of its services cannot be checked against
+            if status.services_hash:
+                path = _services_cache_path(cache_dir, status)
+                data = _read_services_cache(path, status.services_hash)
+                if data is not None:
+                    return data
+        request = envelope.encode_request(
+            [self._encode_call("KRPC", "GetServices", [], [])]
+        )
+        error, data, _ = self._send_encoded(request, True)[0]
+        if error is not None:
+            raise self._build_error(error)
+        if path is not None:
+            _write_services_cache(path, data)
+        return data
+
+    @property
+    def cache(self) -> Cache:
+        """The values read from the server that are kept by the client, and the
+        policies for how long each is kept for. Nothing is cached until a policy is set.
+        """
+        return self._cache
+
+    @property
+    def lazy_stream_values(self) -> bool:
+        """Whether the value of a stream is decoded when it is first read, rather than when
+        it is received. A value replaced by the next update before anything reads it is
+        then never decoded, which saves the update thread the work for streams that update
+        more often than they are read. Values passed to stream callbacks are decoded when
+        they are received either way. False by default."""
+        return self._stream_manager.decode_when_read
+
+    @lazy_stream_values.setter
+    def lazy_stream_values(self, value: bool) -> None:
+        self._stream_manager.decode_when_read = value
+
+    @property
+    def stream_callback_executor(self) -> Optional[krpc.streammanager.Executor]:
+        """What runs stream callbacks and stream update callbacks, given as a function
+        that takes a callback with no arguments and arranges for it to be called, such as
+        the submit method of a concurrent.futures.ThreadPoolExecutor or the
+        call_soon_threadsafe method of an asyncio event loop. None, the default, runs them
+        on the stream update thread, which then applies no further updates until they
+        return."""
+        return self._stream_manager.callback_executor
+
+    @stream_callback_executor.setter
+    def stream_callback_executor(
+        self, value: Optional[krpc.streammanager.Executor]
+    ) -> None:
+        self._stream_manager.callback_executor = value
+
+    @property
+    def coalesce_stream_callbacks(self) -> bool:
+        """Whether a callback run by the stream callback executor is only run with the
+        latest value of its stream. A value that arrives while the callback is waiting
+        to run, or running, replaces the one it has yet to be run with, so a callback
+        that falls behind skips values rather than working through a backlog of them, and
+        is never run twice at once. False by default, which runs a callback for every
+        value."""
+        return self._stream_manager.coalesce_callbacks
+
+    @coalesce_stream_callbacks.setter
+    def coalesce_stream_callbacks(self, value: bool) -> None:
+        self._stream_manager.coalesce_callbacks = value
+
+    @property
+    def stream_update_condition(self) -> threading.Condition:
+        """Condition variable that is notified when
+        a stream update message has finished being processed."""
+        return self._stream_manager.update_condition
+
+    def wait_for_stream_update(self, timeout: Optional[float] = None) -> None:
+        """Wait until the next stream update message or a timeout occurs.
+        The condition variable must be locked before calling this method.
+
+        When timeout is not None, it should be a floating point number
+        specifying the timeout in seconds for the operation."""
+        self._stream_manager.wait_for_update(timeout)
+
+    @property
+    def stream_frame(self) -> int:
+        """The number of stream update messages received and processed. Each message
+        carries the new values of every stream that changed since the last."""
+        return self._stream_manager.frame
+
+    def wait_for_frame(
+        self, after: Optional[int] = None, timeout: Optional[float] = None
+    ) -> int:
+        """Wait until a stream update message later than the given frame, or than the
+        current one if it is None, has been processed, or a timeout occurs. Returns the
+        frame, which is no later than after if it timed out or the client was closed.
+        Unlike wait_for_stream_update, no lock needs to be held to call it."""
+        return self._stream_manager.wait_for_frame(after, timeout)
+
+    def snapshot(self, streams: Iterable[Stream]) -> Tuple[int, List[Any]]:
+        """The values of the given streams, all as of the same stream update message,
+        and the frame of that message. Streams that have not been started are started
+        first, waiting for their first update. If the value of a stream is an error,
+        it is raised, as for calling the stream."""
+        streams = list(streams)
+        for stream in streams:
+            stream.start()
+        frame, values = self._stream_manager.snapshot(
+            stream._stream for stream in streams
+        )
+        for value in values:
+            if isinstance(value, Exception):
+                raise value
+        return frame, values
+
+    def add_stream_update_callback(self, callback: Callable[[], None]) -> None:
+        """Add a callback that is invoked whenever
+        a stream update message has finished being processed."""
+        self._stream_manager.add_update_callback(callback)
+
+    def remove_stream_update_callback(self, callback: Callable[[], None]) -> None:
+        """Remove a stream update callback."""
+        self._stream_manager.remove_update_callback(callback)
+
+    def _invoke(
+        self,
+        service: str,
+        procedure: str,
+        args: Iterable[object],
+        param_types: Iterable[TypeBase],
+        return_type: Optional[TypeBase],
+    ) -> object:
+        """Execute an RPC"""
+
+        if self._capturing and self._record_call(
+            service, procedure, args, param_types, return_type
+        ):
+            return None
+
+        if self._cache._policies:
+            return self._invoke_cached(
+                service, procedure, list(args), list(param_types), return_type
+            )
+
+        # Build the request, send it, and decode the (optional) result
+        data = envelope.encode_request(
+            [self._encode_call(service, procedure, args, param_types)]
+        )
+        results = self._send_encoded(data, self._primary_only(service, return_type))
+        return self._decode_result(results[0], return_type)
+
+    def _invoke_cached(
+        self,
+        service: str,
+        procedure: str,
+        args: List[object],
+        param_types: List[TypeBase],
+        return_type: Optional[TypeBase],
+    ) -> object:
+        """Execute an RPC, answering it from the cache if there is a policy for it"""
+        cache = self._cache
+        call = self._encode_call(service, procedure, args, param_types)
+        policy = cache._policies.get((service, procedure))
+        if policy is not None:
+            result = cache._get(call)
+            if result is not None:
+                return self._decode_result(result, return_type)
+        data = envelope.encode_request([call])
+        results = self._send_encoded(data, self._primary_only(service, return_type))
+        value = self._decode_result(results[0], return_type)
+        if policy is not None:
+            cache._put(call, policy, results[0])
+        cache._written((service, procedure, args, param_types, return_type))
+        return value
+
+    def _invoke_encoded(
+        self, data: bytes, return_type: Optional[TypeBase], primary: bool
+    ) -> object:
+        """Execute an RPC whose request has already been encoded, with its size"""
+        return self._decode_result(self._send_encoded(data, primary)[0], return_type)
+
+    def _invoke_many(
+        self, calls: Sequence[Tuple[KRPC.ProcedureCall, Optional[TypeBase]]]
+    ) -> List[object]:
+        """Execute several RPCs in a single request, given each call and the type of
+        its result. Returns the result of each call in order, or the exception it
+        raised in its place: one call failing says nothing about the others, which the
+        server has run regardless."""
+        data = envelope.encode_request([call.SerializeToString() for call, _ in calls])
+        primary = any(
+            self._primary_only(self._service_name(call), return_type)
+            for call, return_type in calls
+        )
+        results: List[object] = []
+        for result, (_, return_type) in zip(self._send_encoded(data, primary), calls):
+            try:
+                results.append(self._decode_result(result, return_type))
+            except Exception as exn:  # pylint: disable=broad-except
+                results.append(exn)
+        return results
+
+    def _primary_only(self, service: str, return_type: Optional[TypeBase]) -> bool:
+        """Whether a call has to be made over the connection the client was identified
+        by, rather than whichever connection is idle. An event belongs to the client that
+        created it, as a stream does."""
+        if self._idle_rpc_connections is None:
+            return False
+        return service in _PRIMARY_SERVICES or return_type is self._types.event_type
+
+    def _send_encoded(
+        self, data: bytes, primary: bool = False
+    ) -> List[ProcedureResult]:
+        """Send a request that has already been encoded, with its size, and wait for
+        the response to it, returning the result of each call. Raises the error the
+        server reports if it could not run the request at all. The request is sent
+        over the primary connection if primary is true."""
+        if self._pipeline is not None:
+            # Waiting on the response in turn still lets other threads send requests
+            # while this one is in flight
+            return cast(
+                List[ProcedureResult],
+                self._pipeline.call(data, self._check_response),
+            )
+        return self._check_response(self._exchange(data, primary))
+
+    def _exchange(self, data: bytes, primary: bool = False) -> Response:
+        """Send an encoded request and receive the response to it, in lock step"""
+        idle = self._idle_rpc_connections
+        if idle is None or primary:
+            with self._rpc_connection_lock:
+                self._rpc_connection.send(data)
+                return self._rpc_connection.receive_response()
+        connection, lock = idle.get()
+        try:
+            with lock:
+                connection.send(data)
+                return connection.receive_response()
+        finally:
+            idle.put((connection, lock))
+
+    def _event(self, event: KRPC.Event) -> object:
+        return Event(self, event)
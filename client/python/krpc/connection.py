@@ -1,9 +1,9 @@
 from __future__ import annotations
-from typing import Optional
+from typing import List, Optional
 import socket
 import select
 import google.protobuf
-from krpc import winsock
+from krpc import envelope, winsock
 from krpc.encoder import Encoder
 from krpc.decoder import Decoder
 
@@ -12,6 +12,12 @@ from krpc.decoder import Decoder
 # rather than one per byte of its size prefix plus one for its body.
 _READ_SIZE = 8192
 
+# Size of the buffer a connection reads into to begin with. It is read into in place and
+# reused from one message to the next, and grows to hold a message that does not fit in
+# it, so that a large one, such as a camera image, is read straight into where it is
+# decoded from.
+_BUFFER_SIZE = 65536
+
 
 class Connection:
     def __init__(
@@ -21,8 +27,13 @@ class Connection:
         self._port = port
         self._timeout = timeout
         self._socket: socket.socket = None  # type: ignore[assignment]
-        # Data read from the socket that has not been consumed yet
-        self._buffer = bytearray()
+        # Data read from the socket that has not been consumed yet lies between _start
+        # and _end of the buffer. Consuming it moves _start along rather than removing it
+        # from the front of the buffer, which would move everything after it.
+        self._buffer = bytearray(_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
 
     def connect(self) -> None:
         self._socket = self._open()
@@ -46,6 +57,16 @@ class Connection:
         if self._socket is not None:
             self._socket.close()
 
+    def shutdown(self) -> None:
+        """Shut the connection down in both directions. Unlike closing it, this wakes a
+        thread blocked reading from it, which then sees the connection as closed."""
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                # Already shut down, or closed by the other end
+                pass
+
     def __del__(self) -> None:
         self.close()
 
@@ -55,24 +76,39 @@ class Connection:
 
     def receive_message(self, typ: type) -> google.protobuf.message.Message:
         """Receive a protobuf message and decode it"""
+        with self._receive_frame() as data:
+            return Decoder.decode_message(data, typ)
+
+    def receive_response(self) -> envelope.Response:
+        """Receive a Response message and decode it"""
+        with self._receive_frame() as data:
+            return envelope.decode_response(data)
+
+    def receive_stream_update(self) -> List[envelope.StreamResult]:
+        """Receive a StreamUpdate message and decode it, into the results it carries"""
+        with self._receive_frame() as data:
+            return envelope.decode_stream_update(data)
+
+    def _receive_frame(self) -> memoryview:
+        """Receive a message, returning a view of where it lies in the buffer. Decoding
+        copies the values out of the message, so the buffer can be reused once the view
+        has been decoded from and released."""
 
         # Read until the buffer holds the size prefix and the whole message it
-        # describes, then take the message out in one go. An incomplete prefix
-        # runs off the end of the buffer, which is an IndexError
-        buffer = self._buffer
+        # describes, then decode the message where it lies. An incomplete prefix
+        # runs off the end of the data, which is an IndexError
         while True:
             try:
-                size, prefix_length = Decoder.decode_size_prefix(buffer)
+                size, prefix_length = Decoder.decode_size_prefix(
+                    self._view[self._start : self._end]
+                )
+                break
             except IndexError:
                 self._fill()
-                continue
-            end = prefix_length + size
-            if len(buffer) >= end:
-                break
-            self._fill()
-        data = bytes(buffer[prefix_length:end])
-        del buffer[:end]
-        return Decoder.decode_message(data, typ)
+        self._fill_to(prefix_length + size)
+        start = self._start + prefix_length
+        self._start = start + size
+        return self._view[start : self._start]
 
     def send(self, data: bytes) -> None:
         """Send data to the connection.
@@ -81,12 +117,43 @@ class Connection:
         self._socket.sendall(data)
 
     def _fill(self) -> None:
-        """Read a block from the socket into the buffer.
-        Blocks until at least one byte has been read."""
-        data = self._socket.recv(_READ_SIZE)
-        if not data:
+        """Read from the socket into the buffer, as much as there is room for after the
+        data already in it. Blocks until at least one byte has been read."""
+        if self._start == self._end:
+            # Nothing is waiting to be consumed, so the buffer is read into from the start
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            self._make_room(self._end - self._start + _READ_SIZE)
+        read = self._socket.recv_into(self._view[self._end :])
+        if not read:
             raise socket.error("Connection closed")
-        self._buffer += data
+        self._end += read
+
+    def _fill_to(self, length: int) -> None:
+        """Read from the socket until the buffer holds the given number of bytes waiting
+        to be consumed. Room is made for all of them first, so they are read in place
+        however many there are."""
+        if self._start + length > len(self._buffer):
+            self._make_room(length)
+        while self._end - self._start < length:
+            self._fill()
+
+    def _make_room(self, length: int) -> None:
+        """Move the data waiting to be consumed to the start of the buffer, growing the
+        buffer if it cannot hold the given length from there"""
+        waiting = bytes(self._view[self._start : self._end])
+        if length > len(self._buffer):
+            self._buffer = bytearray(max(length, 2 * len(self._buffer)))
+            self._view = memoryview(self._buffer)
+        self._buffer[: len(waiting)] = waiting
+        self._start = 0
+        self._end = len(waiting)
+
+    def _consume(self, length: int) -> bytes:
+        """Take the given number of bytes of waiting data out of the buffer"""
+        data = bytes(self._view[self._start : self._start + length])
+        self._start += length
+        return data
 
     def receive(self, length: int) -> bytes:
         """Receive data from the connection.
@@ -94,36 +161,32 @@ class Connection:
         if length == 0:
             return b""
         assert length > 0
-        buffer = self._buffer
-        while len(buffer) < length:
-            self._fill()
-        data = bytes(buffer[:length])
-        del buffer[:length]
-        return data
+        self._fill_to(length)
+        return self._consume(length)
 
-    def partial_receive(self, length: int, timeout: float = 0.01) -> bytes:
-        """Receive up to length bytes of data from the connection.
-        Returns no data if none arrived within the timeout."""
-        assert length > 0
-        buffer = self._buffer
-        if buffer:
-            length = min(length, len(buffer))
-            data = bytes(buffer[:length])
-            del buffer[:length]
-            return data
+    def poll(self, timeout: float = 0.01) -> bool:
+        """Wait for data to arrive, returning whether any has within the timeout"""
+        if self._start < self._end:
+            return True
         try:
             ready = select.select([self._socket], [], [], timeout)
         except ValueError as exn:
             raise socket.error("Connection closed") from exn
-        if ready[0]:
-            data = self._socket.recv(length)
-            # A readable socket that yields nothing has reached end of file. Reporting it
-            # as no data would be indistinguishable from nothing having arrived yet, and
-            # callers retry that immediately and forever.
-            if not data:
-                raise socket.error("Connection closed")
-            return data
-        return b""
+        if not ready[0]:
+            return False
+        # A readable socket that yields nothing has reached end of file. Reporting it as
+        # no data would be indistinguishable from nothing having arrived yet, and callers
+        # retry that immediately and forever.
+        self._fill()
+        return True
+
+    def partial_receive(self, length: int, timeout: float = 0.01) -> bytes:
+        """Receive up to length bytes of data from the connection.
+        Returns no data if none arrived within the timeout."""
+        assert length > 0
+        if not self.poll(timeout):
+            return b""
+        return self._consume(min(length, self._end - self._start))
 
 
 class LocalConnection(Connection):
@@ -90,8 +90,10 @@ class Decoder:
             return typ.python_type(value)
         if isinstance(typ, ClassType):
             object_id_typ = cls._types.uint64_type
-            object_id = cls._decode_value(data, object_id_typ)
-            return typ.python_type(client, object_id)
+            object_id = cast(int, cls._decode_value(data, object_id_typ))
+            if client is None:
+                return typ.python_type(client, object_id)
+            return client._remote_object(typ.python_type, object_id)
         msg: object
         if isinstance(typ, ListType):
             msg = cast(KRPC.List, cls.decode_message(data, KRPC.List))
@@ -138,7 +140,7 @@ class Decoder:
         return _decode_varint(data)[0]
 
     @classmethod
-    def decode_size_prefix(cls, data: bytes) -> Tuple[int, int]:
+    def decode_size_prefix(cls, data: bytes | memoryview) -> Tuple[int, int]:
         """Decode the size prefix of a message, returning the size of the message
         and the number of bytes the prefix itself occupies. Raises IndexError if
         the data does not yet hold a complete prefix."""
@@ -146,7 +148,7 @@ class Decoder:
 
     @classmethod
     def decode_message(
-        cls, data: bytes, typ: Type[google.protobuf.message.Message]
+        cls, data: bytes | memoryview, typ: Type[google.protobuf.message.Message]
     ) -> google.protobuf.message.Message:
         message = typ()
         message.ParseFromString(data)
@@ -169,9 +171,14 @@ class Decoder:
                 raise EncodingError("Invalid type")
             return decode
         if isinstance(typ, ClassType):
-            decode_id = _VALUE_DECODERS[cls._types.uint64_type.code]
+            decode_id = cast(
+                Callable[[bytes], int], _VALUE_DECODERS[cls._types.uint64_type.code]
+            )
             python_type = typ.python_type
-            return lambda data: python_type(client, decode_id(data))
+            if client is None:
+                return lambda data: python_type(client, decode_id(data))
+            remote_object = client._remote_object
+            return lambda data: remote_object(python_type, decode_id(data))
         if isinstance(typ, EnumerationType):
             decode_value = _VALUE_DECODERS[cls._types.sint32_type.code]
             enum_type = typ.python_type
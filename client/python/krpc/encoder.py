@@ -134,6 +134,12 @@ class Encoder:
         size: bytes = protobuf_encoder._VarintBytes(length)  # type: ignore[attr-defined]
         return size + data
 
+    @classmethod
+    def encode_varint(cls, value: int) -> bytes:
+        """Encode an unsigned integer as a varint, as the sizes and keys a message is
+        framed with are"""
+        return _ValueEncoder._encode_varint(value)
+
     @classmethod
     def _item_encoder(cls, typ: TypeBase) -> Callable[[Any], bytes]:
         """A function that encodes one value of the given type.
@@ -0,0 +1,268 @@
+"""Encoding and decoding of the messages a call and a stream update are carried in:
+Request, ProcedureCall and Argument on the way out, and Response, ProcedureResult,
+StreamUpdate and StreamResult on the way back. These are small and always the same
+shape, and every call pays for building and parsing them, so they are written and read
+here directly rather than through protobuf message objects. What is read is returned as
+plain tuples, which cost the least to build and to take apart. An error is rare, and is
+left to protobuf to parse, as are all the other messages."""
+
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple, Union
+from krpc.encoder import Encoder
+import krpc.schema.KRPC_pb2 as KRPC
+
+# The result of a call: the error it failed with, or None, then its value, and whether
+# the value is null
+ProcedureResult = Tuple[Optional[KRPC.Error], bytes, bool]
+
+# The response to a request: the error that stopped the server running the request at
+# all, or None, then the result of each of its calls
+Response = Tuple[Optional[KRPC.Error], List[ProcedureResult]]
+
+# The new result of a stream, after the id of the stream
+StreamResult = Tuple[int, ProcedureResult]
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# The keys of the fields written here. Each is a field number and a wire type, which for
+# all of these fits in a single byte.
+REQUEST_CALL_KEY = b"\x0a"
+CALL_SERVICE_KEY = b"\x0a"
+CALL_PROCEDURE_KEY = b"\x12"
+CALL_ARGUMENT_KEY = b"\x1a"
+CALL_SERVICE_ID_KEY = b"\x20"
+CALL_PROCEDURE_ID_KEY = b"\x28"
+ARGUMENT_POSITION_KEY = b"\x08"
+ARGUMENT_VALUE_KEY = b"\x12"
+ARGUMENT_IS_NULL_KEY = b"\x18"
+
+# The keys of the fields read here
+_RESPONSE_ERROR = 0x0A
+_RESPONSE_RESULTS = 0x12
+_RESULT_ERROR = 0x0A
+_RESULT_VALUE = 0x12
+_RESULT_IS_NULL = 0x18
+_UPDATE_RESULTS = 0x0A
+_STREAM_RESULT_ID = 0x08
+_STREAM_RESULT_RESULT = 0x12
+
+_encode_varint = Encoder.encode_varint
+
+_NULL = b"\x01"
+
+# Size of the largest message that is copied out of the buffer it arrived in before it is
+# decoded. Indexing bytes is cheaper than indexing a view, which is worth the copy for a
+# small message; a larger one, such as a camera image, is decoded where it lies and only
+# its values are copied out.
+_COPY_LIMIT = 4096
+
+
+def encode_argument(position: int, value: bytes) -> bytes:
+    """Encode an argument of a call, with its key"""
+    length = len(value)
+    if position < 0x80 and length < 0x7C:
+        # The position and both lengths fit in a byte each, as they do for nearly every
+        # argument, so the whole argument is put together in one go
+        return b"\x1a%c\x08%c\x12%c%b" % (length + 4, position, length, value)
+    argument = (
+        ARGUMENT_POSITION_KEY
+        + _encode_varint(position)
+        + ARGUMENT_VALUE_KEY
+        + _encode_varint(len(value))
+        + value
+    )
+    return CALL_ARGUMENT_KEY + _encode_varint(len(argument)) + argument
+
+
+def encode_null_argument(position: int) -> bytes:
+    """Encode a null argument of a call, with its key. The value is left out, as a null
+    is signaled out-of-band."""
+    argument = ARGUMENT_POSITION_KEY + _encode_varint(position) + ARGUMENT_IS_NULL_KEY
+    return CALL_ARGUMENT_KEY + _encode_varint(len(argument) + 1) + argument + _NULL
+
+
+def encode_procedure(
+    service: str, procedure: str, ids: Optional[Tuple[int, int]]
+) -> bytes:
+    """Encode the procedure a call is to, by the ids of it and its service where there
+    are ids, and by name otherwise. The arguments of the call follow this."""
+    if ids is not None:
+        if ids[0] < 0x80 and ids[1] < 0x80:
+            return b"\x20%c\x28%c" % ids
+        return (
+            CALL_SERVICE_ID_KEY
+            + _encode_varint(ids[0])
+            + CALL_PROCEDURE_ID_KEY
+            + _encode_varint(ids[1])
+        )
+    service_name = service.encode("utf-8")
+    procedure_name = procedure.encode("utf-8")
+    return (
+        CALL_SERVICE_KEY
+        + _encode_varint(len(service_name))
+        + service_name
+        + CALL_PROCEDURE_KEY
+        + _encode_varint(len(procedure_name))
+        + procedure_name
+    )
+
+
+def encode_request(calls: Sequence[bytes]) -> bytes:
+    """Encode a request made of the given encoded calls, with its size"""
+    if len(calls) == 1 and len(calls[0]) < 0x7E:
+        # A single small call, as nearly every request is
+        return b"%c\x0a%c%b" % (len(calls[0]) + 2, len(calls[0]), calls[0])
+    request = b"".join(
+        REQUEST_CALL_KEY + _encode_varint(len(call)) + call for call in calls
+    )
+    return _encode_varint(len(request)) + request
+
+
+def decode_response(data: Buffer) -> Response:
+    """Decode a Response message"""
+    if len(data) > _COPY_LIMIT:
+        error, results = _response(data)
+        return error, [_copied(result) for result in results]
+    return _response(bytes(data))
+
+
+def decode_stream_update(data: Buffer) -> List[StreamResult]:
+    """Decode a StreamUpdate message, into the results it carries"""
+    if len(data) > _COPY_LIMIT:
+        return [
+            (stream_id, _copied(result)) for stream_id, result in _stream_update(data)
+        ]
+    return _stream_update(bytes(data))
+
+
+def _copied(result: ProcedureResult) -> ProcedureResult:
+    """A result decoded from a view, with its value copied out of it"""
+    error, value, is_null = result
+    return error, bytes(value), is_null
+
+
+def _response(data: Buffer) -> Response:
+    error = None
+    results = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        key = data[pos]
+        pos += 1
+        if key == _RESPONSE_RESULTS:
+            length = data[pos]
+            pos += 1
+            if length & 0x80:
+                length, pos = _varint(data, pos - 1)
+            results.append(_result(data, pos, pos + length))
+            pos += length
+        elif key == _RESPONSE_ERROR:
+            length, pos = _varint(data, pos)
+            error = KRPC.Error.FromString(bytes(data[pos : pos + length]))
+            pos += length
+        else:
+            pos = _skip(data, pos - 1)
+    if pos != end:
+        raise ValueError("Truncated message")
+    return error, results
+
+
+def _stream_update(data: Buffer) -> List[StreamResult]:
+    results = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        if data[pos] != _UPDATE_RESULTS:
+            pos = _skip(data, pos)
+            continue
+        pos += 1
+        length = data[pos]
+        pos += 1
+        if length & 0x80:
+            length, pos = _varint(data, pos - 1)
+        result_end = pos + length
+        stream_id = 0
+        result: ProcedureResult = (None, b"", False)
+        while pos < result_end:
+            key = data[pos]
+            pos += 1
+            if key == _STREAM_RESULT_ID:
+                stream_id = data[pos]
+                pos += 1
+                if stream_id & 0x80:
+                    stream_id, pos = _varint(data, pos - 1)
+            elif key == _STREAM_RESULT_RESULT:
+                length = data[pos]
+                pos += 1
+                if length & 0x80:
+                    length, pos = _varint(data, pos - 1)
+                result = _result(data, pos, pos + length)
+                pos += length
+            else:
+                pos = _skip(data, pos - 1)
+        if pos != result_end:
+            raise ValueError("Truncated message")
+        results.append((stream_id, result))
+    if pos != end:
+        raise ValueError("Truncated message")
+    return results
+
+
+def _result(data: Buffer, pos: int, end: int) -> ProcedureResult:
+    """Decode the ProcedureResult message that lies between the given positions"""
+    error = None
+    value = b""
+    is_null = False
+    while pos < end:
+        key = data[pos]
+        pos += 1
+        if key == _RESULT_VALUE:
+            length = data[pos]
+            pos += 1
+            if length & 0x80:
+                length, pos = _varint(data, pos - 1)
+            value = data[pos : pos + length]
+            pos += length
+        elif key == _RESULT_IS_NULL:
+            flag, pos = _varint(data, pos)
+            is_null = flag != 0
+        elif key == _RESULT_ERROR:
+            length, pos = _varint(data, pos)
+            error = KRPC.Error.FromString(bytes(data[pos : pos + length]))
+            pos += length
+        else:
+            pos = _skip(data, pos - 1)
+    if pos != end:
+        raise ValueError("Truncated message")
+    return error, value, is_null
+
+
+def _varint(data: Buffer, pos: int) -> Tuple[int, int]:
+    """Decode a varint, returning it and the position after it"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip(data: Buffer, pos: int) -> int:
+    """Skip a field that is not read, given the position of its key, returning the
+    position after it. A field added to one of these messages later is passed over, as
+    protobuf would."""
+    key, pos = _varint(data, pos)
+    wire_type = key & 0x7
+    if wire_type == 0:
+        return _varint(data, pos)[1]
+    if wire_type == 2:
+        length, pos = _varint(data, pos)
+        return pos + length
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError("Unexpected wire type %d" % wire_type)
@@ -0,0 +1,522 @@
+"""Expressions evaluated by the server, built with python operators.
+
+An expression is built up on the client, without contacting the server, from remote
+procedure calls, constants and the operators and methods of Expr, and is then created on
+the server with Expr.build. For example, an event that fires once a vessel is above
+70km::
+
+    from krpc.expr import call
+    flight = vessel.flight()
+    event = (call(getattr, flight, "mean_altitude") > 70000).event(conn)
+
+The server creates an expression from one call per node of it, each taking the nodes it
+is made from as arguments. Expr.build makes every call that does not depend on another
+still to be made in a single request, so an expression is created in as many requests as
+it is deep rather than one request for each of its nodes.
+"""
+
+from __future__ import annotations
+import itertools
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TYPE_CHECKING,
+    cast,
+)
+from krpc.types import _protobuf_type
+import krpc.schema.KRPC_pb2 as KRPC
+
+if TYPE_CHECKING:
+    from krpc.client import Client
+    from krpc.event import Event
+
+# The procedures of the KRPC.Type class that create each of the types the server can cast
+# to and give the parameters of a function, by type code, and the type codes they are
+# named by in python
+_TYPE_PROCEDURES = {
+    KRPC.Type.DOUBLE: "double",
+    KRPC.Type.FLOAT: "float",
+    KRPC.Type.SINT32: "int",
+    KRPC.Type.BOOL: "bool",
+    KRPC.Type.STRING: "string",
+}
+_PYTHON_TYPES = {
+    float: KRPC.Type.DOUBLE,
+    int: KRPC.Type.SINT32,
+    bool: KRPC.Type.BOOL,
+    str: KRPC.Type.STRING,
+}
+
+# The procedures of the KRPC.Expression class that create a constant of each type, and the
+# python type its value is converted to
+_CONSTANTS = {
+    KRPC.Type.DOUBLE: ("constant_double", float),
+    KRPC.Type.FLOAT: ("constant_float", float),
+    KRPC.Type.SINT32: ("constant_int", int),
+    KRPC.Type.BOOL: ("constant_bool", bool),
+    KRPC.Type.STRING: ("constant_string", str),
+}
+
+_BOOL = _protobuf_type(KRPC.Type.BOOL)
+_SINT32 = _protobuf_type(KRPC.Type.SINT32)
+_DOUBLE = _protobuf_type(KRPC.Type.DOUBLE)
+
+# Numbers the parameters of the functions made from python functions, so that each has a
+# unique name and a function nested in another does not hide the parameters of the outer
+# one. Expressions can be built on several threads at once, so it is taken under a lock.
+_parameter_numbers = itertools.count()
+_parameter_lock = threading.Lock()
+
+
+def _parameter_name() -> str:
+    with _parameter_lock:
+        return "_p%d" % next(_parameter_numbers)
+
+
+def _type_code(typ: object) -> KRPC.Type.TypeCode:
+    """The type code named by a python type, or a type code itself"""
+    if isinstance(typ, type):
+        if typ not in _PYTHON_TYPES:
+            raise ValueError(
+                "An expression cannot have values of type %s" % typ.__name__
+            )
+        return _PYTHON_TYPES[typ]
+    if typ not in _TYPE_PROCEDURES:
+        raise ValueError("An expression cannot have values of type %s" % typ)
+    return cast(KRPC.Type.TypeCode, typ)
+
+
+def _element_type(typ: Optional[KRPC.Type]) -> Optional[KRPC.Type]:
+    """The type of the elements of a collection, if known"""
+    if typ is None or not typ.types:
+        return None
+    if typ.code == KRPC.Type.DICTIONARY:
+        return typ.types[1]
+    return typ.types[0]
+
+
+class _Node:
+    """A call to one of the static methods of a class of the KRPC service, that creates
+    part of an expression on the server. Its arguments are values, other nodes, or lists
+    and dictionaries of them."""
+
+    def __init__(self, cls: str, method: str, args: Sequence[object]) -> None:
+        self.cls = cls
+        self.method = method
+        self.args: List[Any] = list(args)
+
+    def children(self) -> Iterator[_Node]:
+        for arg in self.args:
+            if isinstance(arg, _Node):
+                yield arg
+            elif isinstance(arg, list):
+                yield from (x for x in arg if isinstance(x, _Node))
+            elif isinstance(arg, dict):
+                yield from (x for x in arg.values() if isinstance(x, _Node))
+
+
+def _type_node(code: KRPC.Type.TypeCode) -> _Node:
+    return _Node("Type", _TYPE_PROCEDURES[code], [])
+
+
+def _levels(root: _Node) -> List[List[_Node]]:
+    """The nodes of an expression, grouped by how far each is from the furthest of the
+    nodes it depends on. Every node in a group depends only on nodes in earlier ones. A
+    node that appears several times in the expression appears once."""
+    depths: Dict[int, int] = {}
+    levels: List[List[_Node]] = []
+
+    def visit(node: _Node) -> int:
+        if id(node) not in depths:
+            depth = max((visit(child) + 1 for child in node.children()), default=0)
+            depths[id(node)] = depth
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(node)
+        return depths[id(node)]
+
+    visit(root)
+    return levels
+
+
+def _resolve(arg: object, built: Dict[int, object]) -> object:
+    if isinstance(arg, _Node):
+        return built[id(arg)]
+    if isinstance(arg, list):
+        return [_resolve(x, built) for x in arg]
+    if isinstance(arg, dict):
+        return {key: _resolve(value, built) for key, value in arg.items()}
+    return arg
+
+
+class Expr(_Node):
+    """An expression, evaluated by the server. The type of its value is known where it
+    can be worked out on the client, and is used to give constants combined with it the
+    same type, as the server requires the operands of an operator to have."""
+
+    def __init__(
+        self, method: str, args: Sequence[object], typ: Optional[KRPC.Type]
+    ) -> None:
+        super().__init__("Expression", method, args)
+        self.type = typ
+
+    def build(self, client: Client) -> Any:
+        """Create the expression on the server, returning the KRPC.Expression object.
+        Every node of it that depends on no other still to be created is created in the
+        same request, so this makes as many requests as the expression is deep."""
+        built: Dict[int, object] = {}
+        for level in _levels(self):
+            batch = client.batch()
+            calls = [
+                (
+                    node,
+                    batch.add(
+                        getattr(getattr(client.krpc, node.cls), node.method),
+                        *[_resolve(arg, built) for arg in node.args],
+                    ),
+                )
+                for node in level
+            ]
+            batch.execute()
+            for node, result in calls:
+                built[id(node)] = result.result()
+        return built[id(self)]
+
+    def event(self, client: Client) -> Event:
+        """Create an event on the server that occurs when this expression is true"""
+        return client.krpc.add_event(self.build(client))  # type: ignore[no-any-return]
+
+    # Comparisons
+
+    def __eq__(self, other: object) -> Expr:  # type: ignore[override]
+        return self._binary("equal", other, _BOOL)
+
+    def __ne__(self, other: object) -> Expr:  # type: ignore[override]
+        return self._binary("not_equal", other, _BOOL)
+
+    def __gt__(self, other: object) -> Expr:
+        return self._binary("greater_than", other, _BOOL)
+
+    def __ge__(self, other: object) -> Expr:
+        return self._binary("greater_than_or_equal", other, _BOOL)
+
+    def __lt__(self, other: object) -> Expr:
+        return self._binary("less_than", other, _BOOL)
+
+    def __le__(self, other: object) -> Expr:
+        return self._binary("less_than_or_equal", other, _BOOL)
+
+    # The comparison operators make an expression, so it cannot be hashed by its value
+    # or used as a truth value, which would otherwise be what chained comparisons and the
+    # and, or and not keywords silently do
+    __hash__ = _Node.__hash__
+
+    def __bool__(self) -> bool:
+        raise TypeError(
+            "An expression has no truth value on the client; use &, | and ~ to combine "
+            "conditions, rather than and, or and not"
+        )
+
+    # Logical operators
+
+    def __and__(self, other: object) -> Expr:
+        return self._binary("and", other, _BOOL)
+
+    def __rand__(self, other: object) -> Expr:
+        return self._binary("and", other, _BOOL, reflected=True)
+
+    def __or__(self, other: object) -> Expr:
+        return self._binary("or", other, _BOOL)
+
+    def __ror__(self, other: object) -> Expr:
+        return self._binary("or", other, _BOOL, reflected=True)
+
+    def __xor__(self, other: object) -> Expr:
+        return self._binary("exclusive_or", other, _BOOL)
+
+    def __rxor__(self, other: object) -> Expr:
+        return self._binary("exclusive_or", other, _BOOL, reflected=True)
+
+    def __invert__(self) -> Expr:
+        return Expr("not", [self], _BOOL)
+
+    # Arithmetic operators
+
+    def __add__(self, other: object) -> Expr:
+        return self._binary("add", other)
+
+    def __radd__(self, other: object) -> Expr:
+        return self._binary("add", other, reflected=True)
+
+    def __sub__(self, other: object) -> Expr:
+        return self._binary("subtract", other)
+
+    def __rsub__(self, other: object) -> Expr:
+        return self._binary("subtract", other, reflected=True)
+
+    def __mul__(self, other: object) -> Expr:
+        return self._binary("multiply", other)
+
+    def __rmul__(self, other: object) -> Expr:
+        return self._binary("multiply", other, reflected=True)
+
+    def __truediv__(self, other: object) -> Expr:
+        return self._binary("divide", other)
+
+    def __rtruediv__(self, other: object) -> Expr:
+        return self._binary("divide", other, reflected=True)
+
+    def __mod__(self, other: object) -> Expr:
+        return self._binary("modulo", other)
+
+    def __rmod__(self, other: object) -> Expr:
+        return self._binary("modulo", other, reflected=True)
+
+    def __pow__(self, other: object) -> Expr:
+        return self._binary("power", other)
+
+    def __rpow__(self, other: object) -> Expr:
+        return self._binary("power", other, reflected=True)
+
+    def __lshift__(self, other: object) -> Expr:
+        return self._binary("left_shift", other)
+
+    def __rshift__(self, other: object) -> Expr:
+        return self._binary("right_shift", other)
+
+    def _binary(
+        self,
+        method: str,
+        other: object,
+        typ: Optional[KRPC.Type] = None,
+        reflected: bool = False,
+    ) -> Expr:
+        other = _as_expr(other, self.type)
+        args = [other, self] if reflected else [self, other]
+        return Expr(method, args, typ or self.type)
+
+    def cast(self, typ: object) -> Expr:
+        """Convert the value to the given type: float, int, bool or str, or the code of
+        one of the types the server can convert to"""
+        code = _type_code(typ)
+        return Expr("cast", [self, _type_node(code)], _protobuf_type(code))
+
+    # Collections
+
+    def __getitem__(self, index: object) -> Expr:
+        key_type = self.type.types[0] if self.type is not None else None
+        if self.type is not None and self.type.code != KRPC.Type.DICTIONARY:
+            key_type = _SINT32
+        return Expr("get", [self, _as_expr(index, key_type)], _element_type(self.type))
+
+    def count(self) -> Expr:
+        """The number of elements in the collection"""
+        return Expr("count", [self], _SINT32)
+
+    def sum(self) -> Expr:
+        """The sum of the elements in the collection"""
+        return Expr("sum", [self], _element_type(self.type))
+
+    def max(self) -> Expr:
+        """The largest element in the collection"""
+        return Expr("max", [self], _element_type(self.type))
+
+    def min(self) -> Expr:
+        """The smallest element in the collection"""
+        return Expr("min", [self], _element_type(self.type))
+
+    def average(self) -> Expr:
+        """The mean of the elements in the collection"""
+        return Expr("average", [self], _DOUBLE)
+
+    def contains(self, value: object) -> Expr:
+        """Whether the collection contains the value"""
+        value = _as_expr(value, _element_type(self.type))
+        return Expr("contains", [self, value], _BOOL)
+
+    def concat(self, other: Expr) -> Expr:
+        """The elements of the collection followed by those of the other"""
+        return Expr("concat", [self, other], self.type)
+
+    def to_list(self) -> Expr:
+        """The elements of the collection, as a list"""
+        return Expr("to_list", [self], self._collection(KRPC.Type.LIST))
+
+    def to_set(self) -> Expr:
+        """The elements of the collection, as a set"""
+        return Expr("to_set", [self], self._collection(KRPC.Type.SET))
+
+    def select(
+        self, fn: Callable[[Expr], object], element_type: Optional[object] = None
+    ) -> Expr:
+        """The result of a function of each element of the collection. The function is
+        called once, on the client, with an expression for the element, and returns the
+        expression to evaluate for each. The type of the elements is given where it is
+        not known from the collection."""
+        fn_expr = self._function(fn, element_type)
+        return Expr("select", [self, fn_expr], _list_of(fn_expr.type))
+
+    def where(
+        self, fn: Callable[[Expr], object], element_type: Optional[object] = None
+    ) -> Expr:
+        """The elements of the collection for which a function of them is true"""
+        return Expr("where", [self, self._function(fn, element_type)], self.type)
+
+    def order_by(
+        self, fn: Callable[[Expr], object], element_type: Optional[object] = None
+    ) -> Expr:
+        """The elements of the collection, ordered by a function of them"""
+        fn_expr = self._function(fn, element_type)
+        return Expr("order_by", [self, fn_expr], self._collection(KRPC.Type.LIST))
+
+    def all(
+        self, fn: Callable[[Expr], object], element_type: Optional[object] = None
+    ) -> Expr:
+        """Whether a function of every element of the collection is true"""
+        return Expr("all", [self, self._function(fn, element_type)], _BOOL)
+
+    def any(
+        self, fn: Callable[[Expr], object], element_type: Optional[object] = None
+    ) -> Expr:
+        """Whether a function of any element of the collection is true"""
+        return Expr("any", [self, self._function(fn, element_type)], _BOOL)
+
+    def aggregate(
+        self,
+        fn: Callable[[Expr, Expr], object],
+        seed: Optional[object] = None,
+        element_type: Optional[object] = None,
+    ) -> Expr:
+        """Combine the elements of the collection, calling a function of what they have
+        been combined into so far and the next element for each. Starts from the given
+        seed, or the first element if there is none."""
+        element = self._element(element_type)
+        if seed is None:
+            fn_expr = _function(fn, element, element)
+            return Expr("aggregate", [self, fn_expr], fn_expr.type)
+        seed = _as_expr(seed, element)
+        fn_expr = _function(fn, _known(seed), element)
+        return Expr("aggregate_with_seed", [self, seed, fn_expr], fn_expr.type)
+
+    def _element(self, element_type: Optional[object]) -> KRPC.Type:
+        if element_type is not None:
+            return _protobuf_type(_type_code(element_type))
+        element = _element_type(self.type)
+        if element is None:
+            raise ValueError(
+                "The type of the elements of the collection is not known, and must be given"
+            )
+        return element
+
+    def _function(
+        self, fn: Callable[..., object], element_type: Optional[object]
+    ) -> Expr:
+        return _function(fn, self._element(element_type))
+
+    def _collection(self, code: KRPC.Type.TypeCode) -> Optional[KRPC.Type]:
+        element = _element_type(self.type)
+        if element is None:
+            return None
+        return _protobuf_type(code, types=[element])
+
+
+def _known(expr: Expr) -> KRPC.Type:
+    if expr.type is None:
+        raise ValueError("The type of %s is not known" % expr.method)
+    return expr.type
+
+
+def _list_of(typ: Optional[KRPC.Type]) -> Optional[KRPC.Type]:
+    return None if typ is None else _protobuf_type(KRPC.Type.LIST, types=[typ])
+
+
+def _function(fn: Callable[..., object], *parameter_types: KRPC.Type) -> Expr:
+    """A function of the server, made by calling a python function with an expression
+    for each of its parameters"""
+    parameters = [param(_parameter_name(), typ.code) for typ in parameter_types]
+    body = _as_expr(fn(*parameters), None)
+    return Expr("function", [parameters, body], body.type)
+
+
+def _as_expr(value: object, typ: Optional[KRPC.Type]) -> Expr:
+    """An expression for a value, which is a constant of the given type, where the type
+    is known and one a constant can have, unless it is an expression already"""
+    if isinstance(value, Expr):
+        return value
+    if typ is not None and _converts(value, typ.code):
+        return const(value, typ.code)
+    return const(value)
+
+
+def _converts(value: object, code: KRPC.Type.TypeCode) -> bool:
+    """Whether a value can be a constant of the given type without losing anything"""
+    if isinstance(value, bool) or code == KRPC.Type.BOOL:
+        return isinstance(value, bool) and code == KRPC.Type.BOOL
+    if code in (KRPC.Type.DOUBLE, KRPC.Type.FLOAT):
+        return isinstance(value, (int, float))
+    if code == KRPC.Type.SINT32:
+        return isinstance(value, int) or (
+            isinstance(value, float) and value.is_integer()
+        )
+    return isinstance(value, str) and code == KRPC.Type.STRING
+
+
+def call(func: Callable, *args: object, **kwargs: object) -> Expr:  # type: ignore[type-arg]
+    """The result of a remote procedure call, made each time the expression is evaluated.
+    The call is given as a function and its arguments, as for Client.add_stream."""
+    # pylint: disable=import-outside-toplevel
+    from krpc.client import Client
+
+    return_type = Client._get_return_type(func, *args, **kwargs)
+    procedure_call = Client.get_call(func, *args, **kwargs)
+    return Expr("call", [procedure_call], return_type.protobuf_type)
+
+
+def const(value: object, typ: Optional[object] = None) -> Expr:
+    """A constant. Its type is the one given, or else worked out from the value: a bool,
+    an int, a float, which is sent as a double, or a str."""
+    if typ is None:
+        typ = type(value)
+    code = _type_code(typ)
+    method, python_type = _CONSTANTS[code]
+    return Expr(method, [python_type(value)], _protobuf_type(code))
+
+
+def param(name: str, typ: object) -> Expr:
+    """A named parameter of a function, of the given type"""
+    code = _type_code(typ)
+    return Expr("parameter", [name, _type_node(code)], _protobuf_type(code))
+
+
+def function(parameters: List[Expr], body: Expr) -> Expr:
+    """A function of the given parameters"""
+    return Expr("function", [parameters, body], body.type)
+
+
+def invoke(fn: Expr, args: Dict[str, object]) -> Expr:
+    """The result of calling a function, given the value of each of its parameters by name"""
+    values = {name: _as_expr(value, None) for name, value in args.items()}
+    return Expr("invoke", [fn, values], fn.type)
+
+
+def list_of(*values: object) -> Expr:
+    """A list of the values"""
+    elements = [_as_expr(value, None) for value in values]
+    element_type = elements[0].type if elements else None
+    return Expr("create_list", [elements], _list_of(element_type))
+
+
+def tuple_of(*elements: object) -> Expr:
+    """A tuple of the elements"""
+    exprs = [_as_expr(element, None) for element in elements]
+    types = [x.type for x in exprs if x.type is not None]
+    typ = None
+    if len(types) == len(exprs):
+        typ = _protobuf_type(KRPC.Type.TUPLE, types=types)
+    return Expr("create_tuple", [exprs], typ)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from array import array
+from typing import Any, List, Optional, Tuple, Union
+import threading
+from krpc.types import TypeBase, TupleType
+import krpc.schema.KRPC_pb2 as KRPC
+
+# The array typecode each type of number is kept as. Bools are kept in a list, as an
+# array would give them back as the numbers 0 and 1.
+_TYPECODES = {
+    KRPC.Type.DOUBLE: "d",
+    KRPC.Type.FLOAT: "f",
+    KRPC.Type.SINT32: "i",
+    KRPC.Type.SINT64: "q",
+    KRPC.Type.UINT32: "I",
+    KRPC.Type.UINT64: "Q",
+}
+
+Values = Union["array[Any]", List[object]]
+
+
+def _storage(typ: TypeBase) -> Tuple[Optional[str], int]:
+    """The array typecode the values of a type are kept as, and how many numbers make up
+    each of them. A tuple whose elements are all the same type of number, such as a vector,
+    is kept as that many numbers per value. No typecode if the values are not numbers.
+    """
+    if typ.code in _TYPECODES:
+        return _TYPECODES[typ.code], 1
+    if isinstance(typ, TupleType):
+        codes = {value_type.code for value_type in typ.value_types}
+        if len(codes) == 1 and typ.value_types[0].code in _TYPECODES:
+            return _TYPECODES[typ.value_types[0].code], len(typ.value_types)
+    return None, 1
+
+
+class History:
+    """The last values of a stream, and the times they were received, in a ring buffer
+    allocated up front. Numbers, and tuples of them, are kept in an array rather than as
+    python objects, and are read out as one, copied as a whole."""
+
+    def __init__(self, capacity: int, typ: TypeBase) -> None:
+        if capacity < 1:
+            raise ValueError("History capacity must be at least one")
+        self._capacity = capacity
+        typecode, self._width = _storage(typ)
+        self._times = array("d", [0.0]) * capacity
+        self._values: Values
+        if typecode is None:
+            self._values = [None] * capacity
+        else:
+            self._values = array(typecode, [0]) * (capacity * self._width)
+        # The slot the next value is stored in, and how many slots hold a value
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """The most values kept"""
+        return self._capacity
+
+    @property
+    def width(self) -> int:
+        """How many numbers make up each value in the array of them"""
+        return self._width
+
+    def append(self, time: float, value: Any) -> None:
+        """Store a value received at the given time, over the oldest one once full."""
+        with self._lock:
+            slot = self._next
+            self._times[slot] = time
+            if self._width == 1:
+                self._values[slot] = value
+            else:
+                start = slot * self._width
+                self._values[start : start + self._width] = array(
+                    self._values.typecode, value  # type: ignore[union-attr]
+                )
+            self._next = (slot + 1) % self._capacity
+            if self._count < self._capacity:
+                self._count += 1
+
+    def last(self, n: Optional[int] = None) -> Tuple["array[float]", Values]:
+        """The times the last n values were received, or all of those kept, and the
+        values, oldest first. Each is a slice of the buffer, or two joined where it wraps
+        around, so no value is copied on its own."""
+        with self._lock:
+            count = self._count if n is None else max(0, min(n, self._count))
+            start = (self._next - count) % self._capacity
+            end = start + count
+            width = self._width
+            if end <= self._capacity:
+                return (
+                    self._times[start:end],
+                    self._values[start * width : end * width],
+                )
+            end -= self._capacity
+            return (
+                self._times[start:] + self._times[:end],
+                self._values[start * width :] + self._values[: end * width],  # type: ignore[operator]
+            )
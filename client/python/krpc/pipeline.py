@@ -0,0 +1,134 @@
+from __future__ import annotations
+from typing import Callable, Deque, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future
+import socket
+import threading
+from krpc.connection import Connection
+from krpc.encoder import Encoder
+from krpc.envelope import Response
+from krpc.error import RPCError
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+class Pipeline:
+    """Sends requests over a connection without waiting for the response to one before
+    sending the next. The server reads the requests from a connection in the order they
+    were sent and answers each of them in turn, so responses are matched to requests by
+    order alone: a thread receives them and completes the future for the oldest request
+    still waiting. Up to window requests are in flight at once, beyond which submitting
+    another blocks until a response makes room for it."""
+
+    def __init__(self, connection: Connection, window: int) -> None:
+        if window < 1:
+            raise ValueError("A pipeline must allow at least one request in flight")
+        self._connection = connection
+        self._window = threading.Semaphore(window)
+        # Futures for the requests that have been sent, oldest first, each with the
+        # function that turns its response into the future's result
+        self._pending: Deque[
+            Tuple[Future, Callable[[Response], object]]  # type: ignore[type-arg]
+        ] = deque()
+        # Held while a request is sent, so that requests reach the socket in the order
+        # their futures were queued in. The queue has a lock of its own, as sending can
+        # block until the server reads, which it may only do once it has been able to
+        # send the responses the receiving thread is taking off the queue
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._receive)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(
+        self, request: KRPC.Request, decode: Callable[[Response], object]
+    ) -> Future:  # type: ignore[type-arg]
+        """Send a request, returning a future for its response. The response is passed
+        through decode on the receiving thread, and the future completes with what it
+        returns or the exception it raises."""
+        return self.submit_encoded(Encoder.encode_message_with_size(request), decode)
+
+    def submit_encoded(
+        self, data: bytes, decode: Callable[[Response], object]
+    ) -> Future:  # type: ignore[type-arg]
+        """Send a request that has already been encoded, with its size, as for
+        submit"""
+        future: Future = Future()  # type: ignore[type-arg]
+        # Released when the response is received, rather than on leaving a block
+        self._window.acquire()  # pylint: disable=consider-using-with
+        with self._send_lock:
+            with self._pending_lock:
+                if self._error is not None:
+                    self._window.release()
+                    raise self._error
+                # Queued before it is sent, as the response could otherwise arrive first
+                self._pending.append((future, decode))
+            try:
+                self._connection.send(data)
+            except socket.error as exn:
+                error: Optional[Exception] = exn
+            else:
+                error = None
+        # A request that could not be sent in full leaves the connection out of step
+        # with the server, so it, and everything waiting behind it, fails
+        if error is not None:
+            self._fail(error)
+        return future
+
+    def call(self, data: bytes, decode: Callable[[Response], object]) -> object:
+        """Send a request that has already been encoded, with its size, and wait for its
+        response, returning what decode returns for it"""
+        # A future's callbacks run on the receiving thread, so a call waited on from one
+        # would be waiting for a response only that same thread can receive
+        if threading.current_thread() is self._thread:
+            raise RPCError(
+                "Cannot wait for the result of a call from a future's callback; "
+                "use call_async instead"
+            )
+        return self.submit_encoded(data, decode).result()
+
+    def close(self) -> None:
+        """Stop receiving responses. Requests still waiting for one fail."""
+        self._fail(socket.error("Connection closed"))
+        self._connection.shutdown()
+        # A future's callbacks run on the receiving thread, so a pipeline closed from one
+        # would be joining the thread it is running on
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                response = self._connection.receive_response()
+            except Exception as exn:  # pylint: disable=broad-except
+                # Whether the connection was closed or the response could not be read,
+                # the responses still to come can no longer be matched to requests
+                self._fail(exn)
+                return
+            with self._pending_lock:
+                if not self._pending:
+                    break
+                future, decode = self._pending.popleft()
+            self._window.release()
+            # A future the caller has cancelled still has its response to take off the
+            # connection, but nothing to complete
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(decode(response))
+            except Exception as exn:  # pylint: disable=broad-except
+                future.set_exception(exn)
+        self._fail(RPCError("Received a response when no request was waiting"))
+
+    def _fail(self, error: Exception) -> None:
+        """Fail every request waiting for a response, and any submitted after this"""
+        pending = []
+        with self._pending_lock:
+            if self._error is None:
+                self._error = error
+            while self._pending:
+                pending.append(self._pending.popleft()[0])
+                self._window.release()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(self._error)
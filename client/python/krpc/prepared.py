@@ -0,0 +1,193 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import inspect
+from krpc import envelope
+from krpc.encoder import Encoder
+from krpc.error import RPCError
+from krpc.types import DefaultArgument, TypeBase
+
+if TYPE_CHECKING:
+    from krpc.client import Client, Invocation
+
+_encode_varint = Encoder.encode_varint
+
+
+class _Placeholder:
+    """Stands in for an argument when a call is prepared, marking where the value it is
+    made with goes"""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+class _CallTemplate:
+    """A call to one procedure, encoded but for the arguments it is made with. Those are
+    encoded on their own and spliced in after the rest of the call, as the fields of a
+    message can come in any order."""
+
+    __slots__ = (
+        "_client",
+        "_service",
+        "_procedure",
+        "_prefix",
+        "_arguments",
+        "_defaults",
+        "_names",
+        "invocation",
+        "return_type",
+        "primary",
+    )
+
+    def __init__(
+        self,
+        client: Client,
+        invocation: Invocation,
+        defaults: Sequence[object] = (),
+        names: Sequence[str] = (),
+    ) -> None:
+        service, procedure, args, param_types, return_type = invocation
+        self._client = client
+        self._service = service
+        self._procedure = procedure
+        # The call with only the arguments it was prepared with, such as the object a
+        # method is called on
+        fixed = [
+            DefaultArgument("") if isinstance(arg, _Placeholder) else arg
+            for arg in args
+        ]
+        self.invocation: Invocation = (
+            service,
+            procedure,
+            fixed,
+            list(param_types),
+            return_type,
+        )
+        self._prefix = client._encode_call(service, procedure, fixed, param_types)
+        # For each argument the call is made with, in order: its position in the call,
+        # its type, the start of its encoding up to the value, and the whole encoding of
+        # the argument if it is null
+        arguments: Dict[int, Tuple[int, TypeBase, bytes, bytes]] = {}
+        for position, (arg, typ) in enumerate(zip(args, param_types)):
+            if isinstance(arg, _Placeholder):
+                arguments[arg.index] = (
+                    position,
+                    typ,
+                    envelope.ARGUMENT_POSITION_KEY
+                    + _encode_varint(position)
+                    + envelope.ARGUMENT_VALUE_KEY,
+                    envelope.encode_null_argument(position),
+                )
+        self._arguments = [arguments[index] for index in sorted(arguments)]
+        self._defaults = list(defaults)
+        self._names = list(names)
+        self.return_type = return_type
+        self.primary = client._primary_only(service, return_type)
+
+    def encode(self, args: Tuple[object, ...], kwargs: Dict[str, object]) -> bytes:
+        """Encode a request for the call made with the given arguments, with its size"""
+        arguments = self._arguments
+        if kwargs or len(args) != len(arguments):
+            args = self._complete(args, kwargs)
+        parts = [self._prefix]
+        for value, (position, typ, header, null) in zip(args, arguments):
+            if value is None:
+                parts.append(null)
+                continue
+            if isinstance(value, DefaultArgument):
+                continue
+            if not isinstance(value, typ.python_type):
+                value = self._client._coerce_argument(
+                    value, typ, self._service, self._procedure, position
+                )
+            encoded = Encoder.encode(value, typ)
+            argument = header + _encode_varint(len(encoded)) + encoded
+            parts.append(
+                envelope.CALL_ARGUMENT_KEY + _encode_varint(len(argument)) + argument
+            )
+        return envelope.encode_request([b"".join(parts)])
+
+    def _complete(
+        self, args: Tuple[object, ...], kwargs: Dict[str, object]
+    ) -> Tuple[object, ...]:
+        """The value of every argument, given those passed, filling in the defaults of
+        any that were not"""
+        count = len(self._arguments)
+        if len(args) > count:
+            raise TypeError(
+                "%s.%s() takes %d arguments, %d were given"
+                % (self._service, self._procedure, count, len(args))
+            )
+        values: List[object] = list(args) + self._defaults[len(args) : count]
+        for name, value in kwargs.items():
+            if name not in self._names:
+                raise TypeError(
+                    "%s.%s() got an unexpected argument '%s'"
+                    % (self._service, self._procedure, name)
+                )
+            values[self._names.index(name)] = value
+        for name, value in zip(self._names, values):
+            if value is inspect.Parameter.empty:
+                raise TypeError(
+                    "%s.%s() missing argument '%s'"
+                    % (self._service, self._procedure, name)
+                )
+        return tuple(values)
+
+
+class PreparedCall:
+    """A remote procedure call, or property, whose request is encoded ahead of time but
+    for the values of its arguments. Calling it makes the call with the given arguments,
+    which costs less than calling the method or property it was prepared from. A
+    property is read when called with no arguments, and set to the value it is called
+    with otherwise. Created by Client.prepare."""
+
+    def __init__(self, client: Client, obj: object, name: str) -> None:
+        self._client = client
+        self._name = name
+        self._call: Optional[_CallTemplate] = None
+        self._setter: Optional[_CallTemplate] = None
+        prop = getattr(type(obj), name, None)
+        if isinstance(prop, property):
+            if prop.fget is not None:
+                try:
+                    calls = client._capture_invocations(getattr, obj, name)
+                except NotImplementedError:
+                    # A property that can only be set
+                    calls = []
+                if len(calls) == 1:
+                    self._call = _CallTemplate(client, calls[0])
+            if prop.fset is not None:
+                calls = client._capture_invocations(setattr, obj, name, _Placeholder(0))
+                if len(calls) == 1:
+                    self._setter = _CallTemplate(client, calls[0])
+        else:
+            method = getattr(obj, name, None)
+            if callable(method):
+                parameters = list(inspect.signature(method).parameters.values())
+                calls = client._capture_invocations(
+                    method, *[_Placeholder(i) for i in range(len(parameters))]
+                )
+                if len(calls) == 1:
+                    self._call = _CallTemplate(
+                        client,
+                        calls[0],
+                        [parameter.default for parameter in parameters],
+                        [parameter.name for parameter in parameters],
+                    )
+        if self._call is None and self._setter is None:
+            raise RPCError(
+                "%s is not a remote procedure or property of %s" % (name, obj)
+            )
+
+    def __call__(self, *args: object, **kwargs: object) -> Any:
+        template = self._call
+        if self._setter is not None and (args or kwargs):
+            template = self._setter
+        if template is None:
+            raise RPCError("%s is a property that can only be set" % self._name)
+        result = self._client._invoke_encoded(
+            template.encode(args, kwargs), template.return_type, template.primary
+        )
+        if template is self._setter:
+            self._client._cache._written(template.invocation)
+        return result
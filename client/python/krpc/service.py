@@ -4,6 +4,7 @@ from typing import (
     Any,
     Callable,
     DefaultDict,
+    Dict,
     Iterable,
     Iterator,
     List,
@@ -29,6 +30,7 @@ from krpc.types import (
     DynamicType,
     DynamicClassBase,
     DefaultArgument,
+    LazyDoc,
     UnknownTypeError,
     check_type_is_known,
     is_a_known_type,
@@ -82,6 +84,60 @@ def _update_names(*names: str) -> List[str]:
     return newnames
 
 
+# The factories that build functions to invoke remote procedures, by the shape of the function
+# they build: the names of its parameters, and which of them take a default. Procedures share
+# a handful of shapes between them, so the source for one is compiled once per shape rather
+# than once for every procedure, and the constants a procedure needs are passed to its factory.
+_FUNCTION_FACTORIES: Dict[
+    Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[bool, ...]],
+    Callable,  # type: ignore[type-arg]
+] = {}
+
+
+def _function_factory(
+    prefix_param_names: Tuple[str, ...],
+    param_names: Tuple[str, ...],
+    param_required: Tuple[bool, ...],
+) -> Callable:  # type: ignore[type-arg]
+    """The factory for functions with the given parameters. The names it binds start
+    with an underscore, so that the name of a parameter cannot hide them."""
+    key = (prefix_param_names, param_names, param_required)
+    factory = _FUNCTION_FACTORIES.get(key)
+    if factory is None:
+        params = list(prefix_param_names)
+        defaults: List[str] = []
+        for name, required in zip(param_names, param_required):
+            if required:
+                params.append(name)
+            else:
+                default = "_default%d" % len(defaults)
+                params.append(name + "=" + default)
+                defaults.append(default)
+        constants = [
+            "_invoke",
+            "_service_name",
+            "_procedure_name",
+            "_param_types",
+            "_return_type",
+        ]
+        code = (
+            "def factory(%s):\n"
+            "    def func(%s):\n"
+            "        return _invoke(_service_name, _procedure_name, [%s], _param_types, "
+            "_return_type)\n"
+            "    return func\n"
+        ) % (
+            ", ".join(constants + defaults),
+            ", ".join(params),
+            ", ".join(param_names),
+        )
+        context: Dict[str, object] = {}
+        exec(code, context)  # pylint: disable=exec-used
+        factory = cast(Callable, context["factory"])  # type: ignore[type-arg]
+        _FUNCTION_FACTORIES[key] = factory
+    return factory
+
+
 def _construct_func(
     invoke: Callable,  # type: ignore[type-arg]
     service_name: str,
@@ -97,37 +153,23 @@ def _construct_func(
 
     prefix_param_names = _update_names(*prefix_param_names)
     param_names = _update_names(*param_names)
+    param_types = list(param_types)
+    param_required = tuple(param_required)
 
-    params = []
-    for name, required, default, typ in zip(
-        param_names, param_required, param_default, param_types
-    ):
-        if not required:
-            name += " = DefaultArgument(" + repr(_as_literal(default, typ)) + ")"
-        params.append(name)
-
-    invoke_args = [
-        "'" + str(service_name) + "'",
-        "'" + str(procedure_name) + "'",
-        "[" + ",".join(param_names) + "]",
-        "param_types",
-        "return_type",
+    defaults = [
+        DefaultArgument(_as_literal(default, typ))
+        for required, default, typ in zip(param_required, param_default, param_types)
+        if not required
     ]
-    code = (
-        "lambda "
-        + ", ".join(prefix_param_names + params)
-        + ": invoke("
-        + ", ".join(invoke_args)
-        + ")"
+    factory = _function_factory(
+        tuple(prefix_param_names), tuple(param_names), param_required
+    )
+    return cast(
+        Callable,  # type: ignore[type-arg]
+        factory(
+            invoke, service_name, procedure_name, param_types, return_type, *defaults
+        ),
     )
-    context = {
-        "invoke": invoke,
-        "DefaultArgument": DefaultArgument,
-        "param_types": param_types,
-        "return_type": return_type,
-    }
-    fn = eval(code, context)  # pylint: disable=eval-used
-    return cast(Callable, fn)  # type: ignore[type-arg]
 
 
 def _parse_deprecation_reason(reason: str, service_name: str) -> str:
@@ -266,6 +308,25 @@ def _documentation(member: Any, service_name: str) -> str:
     return doc
 
 
+def _lazy_documentation(member: Any, service_name: str) -> LazyDoc:
+    """The documentation of a service member, worked out when it is first read"""
+    return LazyDoc(lambda: _documentation(member, service_name))
+
+
+def _property_documentation(
+    getter: Optional[KRPC.Procedure],
+    setter: Optional[KRPC.Procedure],
+    service_name: str,
+) -> str:
+    """The documentation of a property, from its getter if it has one and its setter if not,
+    including a notice when either of them is deprecated"""
+    doc = _parse_documentation(cast(KRPC.Procedure, getter or setter).documentation)
+    for accessor in (getter, setter):
+        if accessor is not None and accessor.deprecated:
+            return _deprecated_doc(doc, accessor.deprecated_reason, service_name)
+    return doc
+
+
 def service_definitions(service: KRPC.Service) -> Iterator[Definition]:
     """The types a service defines, as records that can be registered in a type registry.
 
@@ -274,7 +335,7 @@ def service_definitions(service: KRPC.Service) -> Iterator[Definition]:
     name = service.name
 
     def register_class(cls: KRPC.Class) -> Callable[[Types], None]:
-        doc = _documentation(cls, name)
+        doc = _lazy_documentation(cls, name)
 
         def register(types: Types) -> None:
             types.class_type(name, cls.name, doc)
@@ -282,11 +343,11 @@ def service_definitions(service: KRPC.Service) -> Iterator[Definition]:
         return register
 
     def register_enumeration(enumeration: KRPC.Enumeration) -> Callable[[Types], None]:
-        doc = _documentation(enumeration, name)
+        doc = _lazy_documentation(enumeration, name)
         values = dict(
             (
                 str(snake_case(value.name)),
-                {"value": value.value, "doc": _documentation(value, name)},
+                {"value": value.value, "doc": _lazy_documentation(value, name)},
             )
             for value in enumeration.values
         )
@@ -297,7 +358,7 @@ def service_definitions(service: KRPC.Service) -> Iterator[Definition]:
         return register
 
     def register_exception(exception: KRPC.Exception) -> Callable[[Types], None]:
-        doc = _documentation(exception, name)
+        doc = _lazy_documentation(exception, name)
 
         def register(types: Types) -> None:
             types.exception_type(name, exception.name, doc)
@@ -305,7 +366,7 @@ def service_definitions(service: KRPC.Service) -> Iterator[Definition]:
         return register
 
     def register_struct(struct: KRPC.Struct) -> Callable[[Types], None]:
-        doc = _documentation(struct, name)
+        doc = _lazy_documentation(struct, name)
         field_names = _update_names(
             *[snake_case(field.name) for field in struct.fields]
         )
@@ -364,9 +425,7 @@ def _skipping_unknown_types(
 
 def create_service(client: Client, service: KRPC.Service) -> object:
     """Create a new service type"""
-    doc = _parse_documentation(service.documentation)
-    if service.deprecated:
-        doc = _deprecated_doc(doc, service.deprecated_reason, service.name)
+    doc = _lazy_documentation(service, service.name)
     cls = cast(
         ServiceBase,
         type(
@@ -583,12 +642,11 @@ class ServiceBase(DynamicType):
             return_type,
         )
         name = _member_name(procedure.name)
-        doc = _parse_documentation(procedure.documentation)
+        doc = _lazy_documentation(procedure, cls._name)
         if procedure.deprecated:
             func = _wrap_deprecated(
                 func, cls._name + "." + name, procedure.deprecated_reason, cls._name
             )
-            doc = _deprecated_doc(doc, procedure.deprecated_reason, cls._name)
         cls._add_class_method(name, func, doc=doc)
         cls._add_class_method("_build_call_" + name, build_call)
         cls._add_class_method("_return_type_" + name, lambda cls: return_type)
@@ -603,15 +661,7 @@ class ServiceBase(DynamicType):
         """Add a property"""
         member_name = _member_name(name)
         qualified_name = cls._name + "." + member_name
-        doc = None
-        if getter:
-            doc = _parse_documentation(getter.documentation)
-        elif setter:
-            doc = _parse_documentation(setter.documentation)
-        if getter and getter.deprecated:
-            doc = _deprecated_doc(doc or "", getter.deprecated_reason, cls._name)
-        elif setter and setter.deprecated:
-            doc = _deprecated_doc(doc or "", setter.deprecated_reason, cls._name)
+        doc = LazyDoc(lambda: _property_documentation(getter, setter, cls._name))
         getter_fn = None
         setter_fn = None
         if getter:
@@ -705,7 +755,7 @@ class ServiceBase(DynamicType):
             return_type,
         )
         name = _member_name(method_name)
-        doc = _parse_documentation(procedure.documentation)
+        doc = _lazy_documentation(procedure, cls._name)
         if procedure.deprecated:
             func = _wrap_deprecated(
                 func,
@@ -713,7 +763,6 @@ class ServiceBase(DynamicType):
                 procedure.deprecated_reason,
                 cls._name,
             )
-            doc = _deprecated_doc(doc, procedure.deprecated_reason, cls._name)
         class_cls._add_method(name, func, doc=doc)
         class_cls._add_method("_build_call_" + name, build_call)
         class_cls._add_method("_return_type_" + name, lambda self: return_type)
@@ -753,7 +802,7 @@ class ServiceBase(DynamicType):
             return_type,
         )
         name = _member_name(method_name)
-        doc = _parse_documentation(procedure.documentation)
+        doc = _lazy_documentation(procedure, cls._name)
         if procedure.deprecated:
             func = _wrap_deprecated(
                 func,
@@ -761,7 +810,6 @@ class ServiceBase(DynamicType):
                 procedure.deprecated_reason,
                 cls._name,
             )
-            doc = _deprecated_doc(doc, procedure.deprecated_reason, cls._name)
         class_cls._add_class_method(name, func, doc=doc)
         class_cls._add_class_method("_build_call_" + name, build_call)
         class_cls._add_class_method("_return_type_" + name, lambda cls: return_type)
@@ -781,15 +829,7 @@ class ServiceBase(DynamicType):
         )
         member_name = _member_name(property_name)
         qualified_name = cls._name + "." + class_name + "." + member_name
-        doc = None
-        if getter:
-            doc = _parse_documentation(getter.documentation)
-        elif setter:
-            doc = _parse_documentation(setter.documentation)
-        if getter and getter.deprecated:
-            doc = _deprecated_doc(doc or "", getter.deprecated_reason, cls._name)
-        elif setter and setter.deprecated:
-            doc = _deprecated_doc(doc or "", setter.deprecated_reason, cls._name)
+        doc = LazyDoc(lambda: _property_documentation(getter, setter, cls._name))
         getter_fn: Optional[Callable] = None  # type: ignore[type-arg]
         setter_fn: Optional[Callable] = None  # type: ignore[type-arg]
         if getter:
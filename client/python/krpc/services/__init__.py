@@ -1,4 +1,13 @@
-try:
+"""The stubs generated ahead of time for the services a server can provide. The module holding
+a service's stubs is imported the first time they are used, rather than when krpc is: the
+stubs for a large service take far longer to import than a short program takes to run."""
+
+from __future__ import annotations
+import importlib
+import importlib.util
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
     from krpc.services.krpc import KRPC
     from krpc.services.testservice import TestService
     from krpc.services.spacecenter import SpaceCenter
@@ -10,44 +19,101 @@ try:
     from krpc.services.lidar import LiDAR
     from krpc.services.dockingcamera import DockingCamera
     from krpc.services.debug import Debug
-except ImportError as exn:
-    KRPC = lambda _: None
-    TestService = lambda _: None
-    SpaceCenter = lambda _: None
-    Drawing = lambda _: None
-    UI = lambda _: None
-    InfernalRobotics = lambda _: None
-    KerbalAlarmClock = lambda _: None
-    RemoteTech = lambda _: None
-    LiDAR = lambda _: None
-    DockingCamera = lambda _: None
-    Debug = lambda _: None
+
+# The module the stubs for each service are generated in, the class of its stub, and the
+# attribute of a client it is used through, by the name of the service
+_STUBS: Dict[str, Tuple[str, str, str]] = {
+    "KRPC": ("krpc", "KRPC", "krpc"),
+    "TestService": ("testservice", "TestService", "test_service"),
+    "SpaceCenter": ("spacecenter", "SpaceCenter", "space_center"),
+    "Drawing": ("drawing", "Drawing", "drawing"),
+    "UI": ("ui", "UI", "ui"),
+    "InfernalRobotics": ("infernalrobotics", "InfernalRobotics", "infernal_robotics"),
+    "KerbalAlarmClock": ("kerbalalarmclock", "KerbalAlarmClock", "kerbal_alarm_clock"),
+    "RemoteTech": ("remotetech", "RemoteTech", "remote_tech"),
+    "LiDAR": ("lidar", "LiDAR", "lidar"),
+    "DockingCamera": ("dockingcamera", "DockingCamera", "docking_camera"),
+    "Debug": ("debug", "Debug", "debug"),
+}
+
+# The modules of the stub classes, by the name of the class
+_MODULES = dict((cls, module) for module, cls, _ in _STUBS.values())
+
+# The names of the services, by the attribute of a client each is used through
+_ATTRIBUTES = dict((attribute, name) for name, (_, _, attribute) in _STUBS.items())
+
+
+def _stub_class(name: str) -> Callable[[Client], object]:
+    """The class of a service's stub, given its name, imported the first time it is asked
+    for. Where the stubs were not generated, it makes no stub at all."""
+    stub = globals().get(name)
+    if stub is None:
+        try:
+            module = importlib.import_module("krpc.services." + _MODULES[name])
+            stub = getattr(module, name)
+        except ImportError:
+            stub = _no_stub
+        globals()[name] = stub
+    return stub
+
+
+def _no_stub(_: Client) -> None:
+    """Stands in for the class of a stub that was not generated"""
+    return None
+
+
+def has_stub(service_name: str) -> bool:
+    """Whether stubs were generated for the given service, found without importing them"""
+    stub = _STUBS.get(service_name)
+    if stub is None:
+        return False
+    return importlib.util.find_spec("krpc.services." + stub[0]) is not None
+
+
+if not TYPE_CHECKING:
+
+    def __getattr__(name: str) -> object:
+        if name not in _MODULES:
+            raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+        return _stub_class(name)
 
 
 class Client:
-    def __init__(self) -> None:
-        self.krpc = KRPC(self)
-        self.test_service = TestService(self)
-        self.space_center = SpaceCenter(self)
-        self.drawing = Drawing(self)
-        self.ui = UI(self)
-        self.infernal_robotics = InfernalRobotics(self)
-        self.kerbal_alarm_clock = KerbalAlarmClock(self)
-        self.remote_tech = RemoteTech(self)
-        self.lidar = LiDAR(self)
-        self.docking_camera = DockingCamera(self)
-        self.debug = Debug(self)
-
-        self._services = {
-            "KRPC": self.krpc,
-            "TestService": self.test_service,
-            "SpaceCenter": self.space_center,
-            "Drawing": self.drawing,
-            "UI": self.ui,
-            "InfernalRobotics": self.infernal_robotics,
-            "KerbalAlarmClock": self.kerbal_alarm_clock,
-            "RemoteTech": self.remote_tech,
-            "LiDAR": self.lidar,
-            "DockingCamera": self.docking_camera,
-            "Debug": self.debug,
-        }
+    """The services with stubs generated ahead of time, each created the first time it is
+    used through the client"""
+
+    if TYPE_CHECKING:
+        krpc: KRPC
+        test_service: TestService
+        space_center: SpaceCenter
+        drawing: Drawing
+        ui: UI
+        infernal_robotics: InfernalRobotics
+        kerbal_alarm_clock: KerbalAlarmClock
+        remote_tech: RemoteTech
+        lidar: LiDAR
+        docking_camera: DockingCamera
+        debug: Debug
+
+    else:
+
+        def __getattr__(self, name: str) -> object:
+            # Only reached for an attribute the client does not have, which is what a
+            # service that has yet to be used is
+            service_name = _ATTRIBUTES.get(name)
+            if service_name is None:
+                raise AttributeError(
+                    "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+                )
+            service = _stub_class(_STUBS[service_name][1])(self)
+            return self.__dict__.setdefault(name, service)
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(_ATTRIBUTES))
+
+    def _stub(self, service_name: str) -> object:
+        """The stub for the given service, or None if it has none"""
+        stub = _STUBS.get(service_name)
+        if stub is None:
+            return None
+        return getattr(self, stub[2])
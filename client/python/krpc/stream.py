@@ -1,11 +1,14 @@
 from __future__ import annotations
 import threading
-from typing import Any, Callable, Optional, TYPE_CHECKING
+from typing import Any, Callable, Optional, Tuple, TYPE_CHECKING
+from krpc.error import StreamError
 from krpc.types import TypeBase
 import krpc.schema.KRPC_pb2 as KRPC
 
 if TYPE_CHECKING:
+    from array import array
     from krpc.client import Client
+    from krpc.history import Values
     from krpc.streammanager import StreamImpl
 
 
@@ -88,6 +91,24 @@ class Stream:
         """Remove a callback."""
         self._stream.remove_callback(callback)
 
+    def keep_history(self, capacity: int) -> None:
+        """Keep the last capacity values the stream receives, and the times they were
+        received, to be read with :meth:`history`. Replaces any history already kept."""
+        self._stream.keep_history(capacity)
+
+    def history(self, n: Optional[int] = None) -> Tuple["array[float]", Values]:
+        """The last n values the stream received, or all of those kept, oldest first,
+        and the times they were received as given by :func:`time.monotonic`.
+
+        The times are an :class:`array.array` of floats. Where the stream returns
+        numbers, or tuples of the same type of number such as vectors, the values are an
+        :class:`array.array` of them, with the numbers of each tuple one after another;
+        otherwise they are a list."""
+        history = self._stream.history
+        if history is None:
+            raise StreamError("Stream history is not being kept")
+        return history.last(n)
+
     def remove(self) -> None:
         """Remove the stream"""
         self._stream.remove()
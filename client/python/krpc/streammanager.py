@@ -1,12 +1,27 @@
 from __future__ import annotations
-from typing import cast, Callable, Iterable, List, Optional, TYPE_CHECKING
+from typing import (
+    cast,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+)
+import functools
+import socket
 import sys
 import threading
+import time
+from krpc.history import History
 from krpc.stream import Stream
 from krpc.types import TypeBase
 from krpc.decoder import Decoder
 from krpc.error import StreamError
 from krpc.connection import Connection
+from krpc.envelope import StreamResult
 import krpc.schema.KRPC_pb2 as KRPC
 
 if TYPE_CHECKING:
@@ -17,8 +32,9 @@ def _invoke_callback(fn: Callable[..., None], *args: object) -> None:
     """Run a stream callback, reporting anything it raises rather than letting it
     propagate. It runs on the update thread, which has no caller to propagate to and
     would end if it escaped, stopping every stream on the connection from updating
-    again. Report it through the thread excepthook, so it is visible by default and an
-    application can route it elsewhere."""
+    again, or on whatever thread the callback executor runs it on, which has no caller
+    expecting it either. Report it through the thread excepthook, so it is visible by
+    default and an application can route it elsewhere."""
     try:
         fn(*args)
     except Exception:  # pylint: disable=broad-except
@@ -27,7 +43,90 @@ def _invoke_callback(fn: Callable[..., None], *args: object) -> None:
         )
 
 
+# Runs a callback, given as a function of no arguments, on behalf of the update thread:
+# the submit method of a thread pool, call_soon_threadsafe of an asyncio event loop, or
+# anything else that takes a function and arranges for it to be called
+Executor = Callable[[Callable[[], None]], object]
+
+
+def _submit(executor: Executor, fn: Callable[[], None]) -> bool:
+    """Hand a callback to an executor, reporting it if the executor refuses it, as one
+    that has been shut down does, rather than letting it end the update thread"""
+    try:
+        executor(fn)
+        return True
+    except Exception:  # pylint: disable=broad-except
+        threading.excepthook(
+            threading.ExceptHookArgs(sys.exc_info() + (threading.current_thread(),))
+        )
+        return False
+
+
+class _Latest:
+    """A callback that is only ever run with the latest value it has been given. While it
+    waits to run, or is running, a new value replaces the one it has yet to be run with,
+    so a callback that falls behind skips the values that are already out of date rather
+    than working through all of them. It is never run twice at once."""
+
+    def __init__(self, fn: Callable[..., None]) -> None:
+        self._fn = fn
+        self._lock = threading.Lock()
+        self._args: Tuple[object, ...] = ()
+        # Whether there are arguments it has not been run with yet, and whether a run of it
+        # has been handed to the executor and not yet finished
+        self._fresh = False
+        self._scheduled = False
+
+    def dispatch(self, executor: Executor, *args: object) -> None:
+        with self._lock:
+            self._args = args
+            self._fresh = True
+            if self._scheduled:
+                return
+            self._scheduled = True
+        if not _submit(executor, self._run):
+            with self._lock:
+                self._scheduled = False
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._fresh:
+                    self._scheduled = False
+                    return
+                args = self._args
+                self._fresh = False
+            _invoke_callback(self._fn, *args)
+
+
+class _Encoded:
+    """The value of a stream as it was received, decoded the first time it is read"""
+
+    __slots__ = ("_client", "_data", "_return_type", "_value")
+
+    def __init__(self, client: Client, data: bytes, return_type: TypeBase) -> None:
+        self._client = client
+        self._data: Optional[bytes] = data
+        self._return_type = return_type
+        self._value: object = None
+
+    def decode(self) -> object:
+        # Readers take no lock, so two of them can both decode the value. The value is
+        # stored before the data is dropped, so that neither sees the data gone and the
+        # value not there yet.
+        data = self._data
+        if data is None:
+            return self._value
+        value = Decoder.decode(self._client, data, self._return_type)
+        self._value = value
+        self._data = None
+        return value
+
+
 class StreamImpl:
+    # The state of a stream, its value and what is done with each as it arrives
+    # pylint: disable=too-many-instance-attributes
+
     def __init__(
         self,
         client: Client,
@@ -42,9 +141,17 @@ class StreamImpl:
         self._started = False
         self._updated = False
         self._value: Optional[object] = None
+        self._frame = 0
+        self._triggered = 0
         self._condition = threading.Condition()
         self._callbacks: List[Callable[[object], None]] = []
         self._rate = 0.0
+        self._history: Optional[History] = None
+        self._latest: Dict[Callable[[object], None], _Latest] = {}
+
+    @property
+    def stream_id(self) -> int:
+        return self._stream_id
 
     @property
     def return_type(self) -> TypeBase:
@@ -68,11 +175,22 @@ class StreamImpl:
     def started(self) -> bool:
         return self._started
 
+    def configured(self, rate: Optional[float], started: bool) -> None:
+        """Record the rate set and whether the stream was started, for a stream configured
+        by the manager rather than through this object"""
+        if rate is not None:
+            self._rate = rate
+        if started:
+            self._started = True
+
     @property
     def value(self) -> object:
         if not self._updated:
             raise StreamError("Stream has no value")
-        return self._value
+        value = self._value
+        if isinstance(value, _Encoded):
+            return value.decode()
+        return value
 
     @value.setter
     def value(self, value: object) -> None:
@@ -87,10 +205,38 @@ class StreamImpl:
     def updated(self) -> bool:
         return self._updated
 
+    @property
+    def frame(self) -> int:
+        """The frame of the last update that carried a value for the stream"""
+        return self._frame
+
+    @property
+    def triggered(self) -> int:
+        """The frame of the last update that set the stream to true, as one does when the
+        event it belongs to is triggered"""
+        return self._triggered
+
+    def store(self, value: object, frame: int) -> None:
+        """Store a value received in the given frame"""
+        self.value = value
+        self._frame = frame
+        if value is True:
+            self._triggered = frame
+
     @property
     def condition(self) -> threading.Condition:
         return self._condition
 
+    @property
+    def history(self) -> Optional[History]:
+        return self._history
+
+    def keep_history(self, capacity: int) -> History:
+        history = History(capacity, self._return_type)
+        with self._update_lock:
+            self._history = history
+        return history
+
     @property
     def callbacks(self) -> List[Callable[[object], None]]:
         with self._update_lock:
@@ -109,8 +255,16 @@ class StreamImpl:
     ) -> List[Callable[[object], None]]:
         with self._update_lock:
             self._callbacks = [x for x in self._callbacks if x != callback]
+            self._latest.pop(callback, None)
             return self._callbacks
 
+    def latest(self, callback: Callable[[object], None]) -> _Latest:
+        """The callback, run only with the latest value of the stream"""
+        with self._update_lock:
+            if callback not in self._latest:
+                self._latest[callback] = _Latest(callback)
+            return self._latest[callback]
+
     def remove(self) -> None:
         self._client._stream_manager.remove_stream(self._stream_id)
         with self._condition:
@@ -119,15 +273,31 @@ class StreamImpl:
             # No further update will ever arrive for this stream, so anything waiting on it
             # has to be woken here or it waits forever. It sees the error above on waking.
             self._condition.notify_all()
+        self._client._stream_manager.notify_changed()
 
 
 class StreamManager:
+    # The streams of a client, and how their updates are applied and passed on
+    # pylint: disable=too-many-instance-attributes
+
     def __init__(self, client: Client) -> None:
         self._client = client
         self._update_lock = threading.RLock()
         self._condition = threading.Condition()
         self._streams: dict[int, StreamImpl] = {}
         self._callbacks: list[Callable[[], None]] = []
+        self._decode_when_read = False
+        # Twice the number of updates stored, plus one while an update is being stored.
+        # Only the update thread changes it, so a reader that sees the same even number
+        # before and after reading several values read them all from the same update.
+        self._sequence = 0
+        self._closed = False
+        # What stopped the update thread, if it was anything other than the connection
+        # being closed
+        self._error: Optional[Exception] = None
+        self._executor: Optional[Executor] = None
+        self._coalesce = False
+        self._latest: Dict[Callable[[], None], _Latest] = {}
 
     def add_stream(self, return_type: TypeBase, call: KRPC.ProcedureCall) -> StreamImpl:
         stream_id = self._client.krpc.add_stream(call, False).id
@@ -138,6 +308,60 @@ class StreamManager:
                 )
             return self._streams[stream_id]
 
+    def add_streams(
+        self,
+        calls: Sequence[Tuple[TypeBase, KRPC.ProcedureCall]],
+        rate: Optional[float],
+        start: bool,
+    ) -> List[StreamImpl]:
+        krpc = self._client.krpc
+        # Streams with no rate to set are started as they are added. The update lock is
+        # held until they are registered, so that the update thread cannot be handed their
+        # first values before then and drop them as being for streams it does not know.
+        start_when_added = start and rate is None
+        with self._update_lock:
+            outcomes = self._client.call_many(
+                (krpc.add_stream, call, start_when_added) for _, call in calls
+            )
+            errors = [x for x in outcomes if isinstance(x, Exception)]
+            if errors:
+                # Leave none of the new streams behind if any could not be added. The
+                # server returns the existing stream for a call that is already being
+                # streamed, so those that were held before the batch are left alone.
+                added = {
+                    cast(KRPC.Stream, outcome).id: return_type
+                    for (return_type, _), outcome in zip(calls, outcomes)
+                    if not isinstance(outcome, Exception)
+                    and cast(KRPC.Stream, outcome).id not in self._streams
+                }
+                for stream_id, return_type in added.items():
+                    self.get_stream(return_type, stream_id)
+                    self.remove_stream(stream_id)
+                raise errors[0]
+            streams = [
+                self.get_stream(return_type, cast(KRPC.Stream, outcome).id)
+                for (return_type, _), outcome in zip(calls, outcomes)
+            ]
+        configure: List[Sequence[object]] = []
+        if rate is not None:
+            configure += [(krpc.set_stream_rate, x.stream_id, rate) for x in streams]
+        if start and not start_when_added:
+            configure += [(krpc.start_stream, x.stream_id) for x in streams]
+        for outcome in self._client.call_many(configure):
+            if isinstance(outcome, Exception):
+                raise outcome
+        for stream in streams:
+            stream.configured(rate, start)
+        return streams
+
+    def wait_for_values(self, streams: Sequence[StreamImpl]) -> None:
+        """Wait until every one of the streams has a value, or the connection closes"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._closed or all(stream.updated for stream in streams)
+            )
+        self._check_failed(all(stream.updated for stream in streams))
+
     def get_stream(self, return_type: TypeBase, stream_id: int) -> StreamImpl:
         with self._update_lock:
             if stream_id not in self._streams:
@@ -152,6 +376,30 @@ class StreamManager:
                 self._client.krpc.remove_stream(stream_id)
                 del self._streams[stream_id]
 
+    @property
+    def decode_when_read(self) -> bool:
+        return self._decode_when_read
+
+    @decode_when_read.setter
+    def decode_when_read(self, value: bool) -> None:
+        self._decode_when_read = value
+
+    @property
+    def callback_executor(self) -> Optional[Executor]:
+        return self._executor
+
+    @callback_executor.setter
+    def callback_executor(self, value: Optional[Executor]) -> None:
+        self._executor = value
+
+    @property
+    def coalesce_callbacks(self) -> bool:
+        return self._coalesce
+
+    @coalesce_callbacks.setter
+    def coalesce_callbacks(self, value: bool) -> None:
+        self._coalesce = value
+
     @property
     def update_condition(self) -> threading.Condition:
         return self._condition
@@ -159,6 +407,53 @@ class StreamManager:
     def wait_for_update(self, timeout: Optional[float] = None) -> None:
         self._condition.wait(timeout=timeout)
 
+    @property
+    def frame(self) -> int:
+        return self._sequence // 2
+
+    def wait(
+        self, predicate: Callable[[], bool], timeout: Optional[float] = None
+    ) -> None:
+        """Wait until the predicate is true, checking it before the first wait and after
+        each update, or until the connection closes or a timeout occurs. Raises the error
+        that stopped updates arriving, if there was one and the predicate is not true.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: predicate() or self._closed, timeout=timeout
+            )
+            satisfied = predicate()
+        self._check_failed(satisfied)
+
+    def notify_changed(self) -> None:
+        """Wake everything waiting on the update condition, after a change to a stream
+        made other than by an update"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait_for_frame(
+        self, after: Optional[int] = None, timeout: Optional[float] = None
+    ) -> int:
+        if after is None:
+            after = self.frame
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.frame > after or self._closed, timeout=timeout
+            )
+        self._check_failed(self.frame > after)
+        return self.frame
+
+    def snapshot(self, streams: Iterable[StreamImpl]) -> Tuple[int, List[object]]:
+        streams = list(streams)
+        while True:
+            sequence = self._sequence
+            if sequence % 2 == 0:
+                values = [stream.value for stream in streams]
+                if self._sequence == sequence:
+                    return sequence // 2, values
+            # An update is being stored, so let the update thread finish it
+            time.sleep(0)
+
     @property
     def update_callbacks(self) -> List[Callable[[], None]]:
         with self._update_lock:
@@ -177,11 +472,42 @@ class StreamManager:
     ) -> List[Callable[[], None]]:
         with self._update_lock:
             self._callbacks = [x for x in self._callbacks if x != callback]
+            self._latest.pop(callback, None)
             return self._callbacks
 
-    def notify_closed(self) -> None:
+    def _run_callbacks(
+        self,
+        stream: Optional[StreamImpl],
+        callbacks: List[Callable[..., None]],
+        *args: object,
+    ) -> None:
+        """Run the callbacks of a stream, or the update callbacks if no stream is given,
+        on the update thread or through the callback executor if there is one"""
+        executor = self._executor
+        if executor is None:
+            for fn in callbacks:
+                _invoke_callback(fn, *args)
+        elif self._coalesce:
+            for fn in callbacks:
+                if stream is not None:
+                    latest = stream.latest(fn)
+                else:
+                    with self._update_lock:
+                        if fn not in self._latest:
+                            self._latest[fn] = _Latest(fn)
+                        latest = self._latest[fn]
+                latest.dispatch(executor, *args)
+        else:
+            for fn in callbacks:
+                _submit(executor, functools.partial(_invoke_callback, fn, *args))
+
+    def notify_closed(self, error: Optional[Exception] = None) -> None:
         """Wake everything waiting for a stream update, after the connection has closed and
-        no further update can arrive."""
+        no further update can arrive. The error is what stopped updates arriving, if it
+        was anything other than the connection being closed."""
+        if error is not None and self._error is None:
+            self._error = error
+        self._closed = True
         with self._update_lock:
             streams = list(self._streams.values())
         for stream in streams:
@@ -190,81 +516,103 @@ class StreamManager:
         with self._condition:
             self._condition.notify_all()
 
-    def update(self, results: Iterable[KRPC.StreamResult]) -> None:
-        # The update lock is held only to find the streams and decode their new values, and
-        # is released before any stream condition is taken. A thread waiting for an update
-        # holds a condition and then needs the update lock - Event.wait resets the stream
-        # value while holding it, as its documented use requires - so taking the two in the
-        # opposite order here deadlocks. The callbacks are read under the lock for the same
-        # reason: they run below without it held.
+    def _check_failed(self, satisfied: bool) -> None:
+        """Raise the error that stopped the update thread, for a wait it ended before
+        what was waited for happened"""
+        if not satisfied and self._error is not None:
+            raise StreamError(
+                "Stream updates are no longer being received: %s" % self._error
+            ) from self._error
+
+    def update(self, results: Iterable[StreamResult]) -> None:
+        # The update lock is never held while a stream condition is taken. A thread waiting
+        # for an update holds a condition and then needs the update lock - Event.wait resets
+        # the stream value while holding it, as its documented use requires - so taking the
+        # two in the opposite order here deadlocks. The callbacks are read under the lock
+        # for the same reason: they run below without it held.
         decoded = []
+        value: object
+        received = time.monotonic()
         with self._update_lock:
-            for result in results:
-                if result.id not in self._streams:
+            for stream_id, (error, data, is_null) in results:
+                if stream_id not in self._streams:
                     continue
 
                 # Check for an error response
-                stream = self._streams[result.id]
-                if result.result.HasField("error"):
-                    value = self._client._build_error(result.result.error)
-                elif result.result.is_null:
+                stream = self._streams[stream_id]
+                callbacks = stream.callbacks
+                history = stream.history
+                if error is not None:
+                    value = self._client._build_error(error)
+                elif is_null:
                     value = None
+                elif (
+                    self._decode_when_read
+                    and not callbacks
+                    and history is None
+                    and stream.return_type.python_type is not bool
+                ):
+                    # Nothing is called with the value or keeps it, so it is left to
+                    # whoever reads it to decode, which a value replaced before it is
+                    # read never is. A bool is decoded regardless, so that the frame an
+                    # event was triggered in is known however soon it is reset.
+                    value = _Encoded(self._client, data, stream.return_type)
                 else:
                     # Decode the return value
-                    value = Decoder.decode(
-                        self._client, result.result.value, stream.return_type
-                    )
-                decoded.append((result.id, stream, value, stream.callbacks))
+                    value = Decoder.decode(self._client, data, stream.return_type)
+                    if history is not None:
+                        history.append(received, value)
+                decoded.append((stream_id, stream, value, callbacks))
             update_callbacks = self._callbacks
 
-        # Store each value in the cache and notify anything waiting on it
-        for stream_id, stream, value, callbacks in decoded:
+        # Store each value in the cache, then notify anything waiting on it. Every value is
+        # stored under one hold of the update lock and no stream condition, so a snapshot
+        # never waits on a thread that holds a condition, and the callbacks see the whole
+        # of the update.
+        stored = []
+        with self._update_lock:
+            self._sequence += 1
+            for stream_id, stream, value, callbacks in decoded:
+                # The stream can be removed while its new value is being decoded, in which
+                # case remove() has already stored the error saying so and this value must
+                # not overwrite it - the stream is gone from the registry, so nothing would
+                # ever replace it and it would be returned forever.
+                if stream_id in self._streams:
+                    stream.store(value, (self._sequence + 1) // 2)
+                    stored.append((stream, value, callbacks))
+            self._sequence += 1
+        for stream, value, callbacks in stored:
             with stream.condition:
-                with self._update_lock:
-                    # The stream can be removed while its new value is being decoded, in
-                    # which case remove() has already stored the error saying so and this
-                    # value must not overwrite it - the stream is gone from the registry,
-                    # so nothing would ever replace it and it would be returned forever.
-                    if stream_id not in self._streams:
-                        continue
-                    stream.value = value
                 stream.condition.notify_all()
-            for fn in callbacks:
-                _invoke_callback(fn, value)
+            self._run_callbacks(stream, callbacks, value)
 
         with self._condition:
             self._condition.notify_all()
-        for fn in update_callbacks:
-            _invoke_callback(fn)
+        self._run_callbacks(None, update_callbacks)
 
 
-def update_thread(
-    manager: StreamManager, connection: Connection, stop: threading.Event
-) -> None:
+def update_thread(manager: StreamManager, connection: Connection) -> None:
+    """Apply the updates sent over the stream connection as each arrives. Reading the next
+    one blocks until it does, rather than polling for it, so the thread is idle between
+    updates; closing the client shuts the connection down, which wakes it to end."""
+    error: Optional[Exception] = None
     while True:
-
-        # Read the size and position of the update message
-        data = b""
-        while True:
-            try:
-                data += connection.partial_receive(1)
-                size = Decoder.decode_message_size(data)
-                break
-            except IndexError:
-                pass
-            except:  # noqa pylint: disable=bare-except
-                # Any failure here (the socket closing as the client shuts down,
-                # or the thread being interrupted) should just end the update thread.
-                return
-            if stop.is_set():
-                connection.close()
-                return
-
-        # Read and decode the update message
-        data = connection.receive(size)
-        update = cast(
-            KRPC.StreamUpdate, Decoder.decode_message(data, KRPC.StreamUpdate)
-        )
-
-        # Add the data to the cache
-        manager.update(update.results)
+        try:
+            # Read the update message, and decode it where it lies in the buffer
+            update = connection.receive_stream_update()
+            # Add the data to the cache
+            manager.update(update)
+        except socket.error:
+            # The connection was shut down as the client closes, or by the server
+            break
+        except Exception as exn:  # pylint: disable=broad-except
+            # An update that cannot be read leaves the connection out of step with the
+            # server, so no later update can be read either. Report it, as nothing else
+            # would, and fail anything waiting for an update rather than leave it blocked.
+            threading.excepthook(
+                threading.ExceptHookArgs(sys.exc_info() + (threading.current_thread(),))
+            )
+            error = exn
+            break
+    connection.close()
+    manager.notify_closed(error)
@@ -24,6 +24,10 @@ class ServerTestCase:
         rpc: str = "rpc",
         stream: Optional[str] = "stream",
         use_pregenerated_stubs: bool = True,
+        pipeline_window: Optional[int] = None,
+        rpc_connections: int = 1,
+        services_cache_dir: Optional[str] = None,
+        stream_update_interval: Optional[float] = None,
     ) -> Client:
         """Connect over whichever transport the harness started the server with, which
         it tells us about by port or by socket path. The rpc and stream arguments name
@@ -37,6 +41,10 @@ class ServerTestCase:
                 rpc_path=paths[rpc],  # type: ignore[arg-type]
                 stream_path=paths[stream] if stream is not None else None,
                 use_pregenerated_stubs=use_pregenerated_stubs,
+                pipeline_window=pipeline_window,
+                rpc_connections=rpc_connections,
+                services_cache_dir=services_cache_dir,
+                stream_update_interval=stream_update_interval,
             )
         ports = {
             "rpc": ServerTestCase.rpc_port(),
@@ -48,6 +56,10 @@ class ServerTestCase:
             rpc_port=ports[rpc],
             stream_port=ports[stream] if stream is not None else None,
             use_pregenerated_stubs=use_pregenerated_stubs,
+            pipeline_window=pipeline_window,
+            rpc_connections=rpc_connections,
+            services_cache_dir=services_cache_dir,
+            stream_update_interval=stream_update_interval,
         )
 
     @staticmethod
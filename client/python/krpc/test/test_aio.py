@@ -0,0 +1,177 @@
+import asyncio
+import os
+import socket
+from typing import Any, Dict, List
+import unittest
+import krpc.aio
+from krpc.encoder import Encoder
+from krpc.error import RPCError, StreamError
+from krpc.test.servertestcase import ServerTestCase
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+async def connect(use_pregenerated_stubs: bool = True) -> krpc.aio.Client:
+    """Connect over whichever transport the harness started the server with, as
+    ServerTestCase.connect does"""
+    rpc_path = os.getenv("RPC_PATH")
+    if rpc_path:
+        return await krpc.aio.connect_local(
+            name="python_client_test",
+            rpc_path=rpc_path,
+            stream_path=os.getenv("STREAM_PATH"),
+            use_pregenerated_stubs=use_pregenerated_stubs,
+        )
+    return await krpc.aio.connect(
+        name="python_client_test",
+        address="localhost",
+        rpc_port=ServerTestCase.rpc_port(),
+        stream_port=ServerTestCase.stream_port(),
+        use_pregenerated_stubs=use_pregenerated_stubs,
+    )
+
+
+class TestAio(unittest.IsolatedAsyncioTestCase):
+    use_pregenerated_stubs = True
+
+    async def asyncSetUp(self) -> None:
+        self.conn = await connect(self.use_pregenerated_stubs)
+
+    async def asyncTearDown(self) -> None:
+        await self.conn.close()
+
+    async def test_procedure(self) -> None:
+        service = self.conn.test_service
+        self.assertEqual("3.14159", await service.float_to_string(3.14159))
+        self.assertEqual("3.14159", await service.add_multiple_values(0.14159, 1, 2))
+
+    async def test_object(self) -> None:
+        obj = await self.conn.test_service.create_test_object("jeb")
+        self.assertEqual("jeb3.14159", await obj.float_to_string(3.14159))
+
+    async def test_property(self) -> None:
+        obj = await self.conn.test_service.create_test_object("jeb")
+        await self.conn.set(obj, "int_property", 42)
+        self.assertEqual(42, await obj.int_property)
+
+    async def test_property_assignment_rejected(self) -> None:
+        obj = await self.conn.test_service.create_test_object("jeb")
+        with self.assertRaises(RPCError):
+            obj.int_property = 42
+        with self.assertRaises(RPCError):
+            self.conn.test_service.string_property = "foo"
+        # Setting a property that has no setter fails before anything is sent
+        with self.assertRaises(RPCError):
+            await self.conn.set(obj, "no_such_property", 42)
+
+    async def test_error(self) -> None:
+        with self.assertRaises(ValueError):
+            await self.conn.test_service.throw_argument_exception()
+
+    async def test_many_in_flight(self) -> None:
+        service = self.conn.test_service
+        self.assertEqual(
+            [str(i) for i in range(100)],
+            await asyncio.gather(*[service.int32_to_string(i) for i in range(100)]),
+        )
+
+    async def test_stream(self) -> None:
+        obj = await self.conn.test_service.create_test_object("jeb")
+        await self.conn.set(obj, "int_property", 0)
+        stream = await self.conn.add_stream(getattr, obj, "int_property")
+        values = []
+        async for value in stream:
+            values.append(value)
+            if value == 3:
+                break
+            await self.conn.set(obj, "int_property", value + 1)
+        self.assertEqual([0, 1, 2, 3], values)
+        await stream.remove()
+        self.assertRaises(StreamError, stream)
+
+    async def test_stream_context_manager(self) -> None:
+        service = self.conn.test_service
+        async with self.conn.stream(service.float_to_string, 3.14159) as stream:
+            await stream.start()
+            self.assertEqual("3.14159", stream())
+        self.assertRaises(StreamError, stream)
+
+    async def test_stream_ends_when_removed(self) -> None:
+        stream = await self.conn.add_stream(
+            self.conn.test_service.float_to_string, 3.14159
+        )
+        await stream.start()
+        await stream.remove()
+        async for _ in stream:
+            self.fail("A removed stream has no values")
+
+    async def test_close_fails_calls_in_flight(self) -> None:
+        result = self.conn.test_service.float_to_string(3.14159)
+        await self.conn.close()
+        with self.assertRaises(socket.error):
+            await result
+        with self.assertRaises(socket.error):
+            await self.conn.test_service.float_to_string(3.14159)
+
+
+class TestAioConnection(unittest.IsolatedAsyncioTestCase):
+    """The client driven over a socket pair, with this end standing in for the server"""
+
+    async def asyncSetUp(self) -> None:
+        client, self.server = socket.socketpair()
+        self.addCleanup(self.server.close)
+        reader, writer = await asyncio.open_connection(sock=client)
+        client, self.stream_server = socket.socketpair()
+        self.addCleanup(self.stream_server.close)
+        stream_reader, stream_writer = await asyncio.open_connection(sock=client)
+        self.client = krpc.aio.Client(
+            krpc.aio.Connection(reader, writer),
+            krpc.aio.Connection(stream_reader, stream_writer),
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+
+    async def test_response_to_no_call(self) -> None:
+        self.server.sendall(Encoder.encode_message_with_size(KRPC.Response()))
+        await asyncio.wait_for(self.client._rpc_task, 10)
+        with self.assertRaises(RPCError):
+            await self.client._send(b"", None)
+
+    async def test_malformed_response(self) -> None:
+        future = self.client._send(b"", None)
+        # A response whose first field claims more bytes than the message holds
+        self.server.sendall(b"\x02\x0a\x05")
+        with self.assertRaisesRegex(ValueError, "Truncated"):
+            await asyncio.wait_for(future, 10)
+
+    async def test_malformed_stream_update(self) -> None:
+        reported: List[Dict[str, Any]] = []
+        asyncio.get_running_loop().set_exception_handler(
+            lambda _, context: reported.append(context)
+        )
+        stream = self.client._get_stream(1, self.client._types.sint32_type)
+        stream._started = True
+        waiter = asyncio.ensure_future(stream.wait())
+        # An update whose first field claims more bytes than the message holds
+        self.stream_server.sendall(b"\x02\x0a\x05")
+        await asyncio.wait_for(waiter, 10)
+        with self.assertRaises(StreamError) as context:
+            stream()
+        self.assertEqual(1, len(reported))
+        self.assertIs(reported[0]["exception"], context.exception.__cause__)
+        # A stream added once updates have stopped fails rather than waits forever
+        stream = self.client._get_stream(2, self.client._types.sint32_type)
+        stream._started = True
+        await asyncio.wait_for(stream.wait(), 10)
+        self.assertRaises(StreamError, stream)
+
+
+class TestAioDynamicServices(TestAio):
+    """The same calls, through services built from the definitions the server hands
+    over rather than the pre-generated stubs"""
+
+    use_pregenerated_stubs = False
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from krpc.error import RPCError
+from krpc.test.servertestcase import ServerTestCase
+
+
+class TestBatch(ServerTestCase, unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super(TestBatch, cls).setUpClass()
+
+    def test_results(self) -> None:
+        service = self.conn.test_service
+        obj = service.create_test_object("jeb")
+        with self.conn.batch() as batch:
+            procedure = batch.add(service.float_to_string, 3.14159)
+            arguments = batch.add(service.add_multiple_values, 0.14159, 1, 2)
+            method = batch.add(obj.float_to_string, 3.14159)
+            prop = batch.add(getattr, obj, "int_property")
+            collection = batch.add(service.increment_list, [0, 1, 2])
+        self.assertEqual(5, len(batch))
+        self.assertEqual("3.14159", procedure.result())
+        self.assertEqual("3.14159", arguments.result())
+        self.assertEqual("jeb3.14159", method.result())
+        self.assertEqual(0, prop.result())
+        self.assertEqual([1, 2, 3], collection.result())
+
+    def test_property_setter(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        with self.conn.batch() as batch:
+            setter = batch.add(setattr, obj, "int_property", 42)
+            getter = batch.add(getattr, obj, "int_property")
+        self.assertIsNone(setter.result())
+        self.assertEqual(42, getter.result())
+        self.assertRaises(RPCError, batch.add, setattr, obj, "foo", 42)
+
+    def test_result_before_execute(self) -> None:
+        batch = self.conn.batch()
+        call = batch.add(self.conn.test_service.float_to_string, 3.14159)
+        self.assertFalse(call.done)
+        self.assertRaises(RPCError, call.result)
+        batch.execute()
+        self.assertTrue(call.done)
+        self.assertEqual("3.14159", call.result())
+
+    def test_execute_twice(self) -> None:
+        batch = self.conn.batch()
+        batch.add(self.conn.test_service.float_to_string, 3.14159)
+        batch.execute()
+        self.assertRaises(RPCError, batch.execute)
+        self.assertRaises(
+            RPCError, batch.add, self.conn.test_service.float_to_string, 1
+        )
+
+    def test_empty(self) -> None:
+        with self.conn.batch() as batch:
+            pass
+        self.assertEqual(0, len(batch))
+
+    def test_not_executed_when_block_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            with self.conn.batch() as batch:
+                call = batch.add(self.conn.test_service.float_to_string, 3.14159)
+                raise ValueError
+        self.assertFalse(call.done)
+
+    def test_error_in_one_call(self) -> None:
+        # A call that fails reports its error, and does not stop the calls around it
+        service = self.conn.test_service
+        with self.conn.batch() as batch:
+            before = batch.add(service.float_to_string, 3.14159)
+            failed = batch.add(service.throw_argument_exception)
+            after = batch.add(service.float_to_string, 42)
+        self.assertEqual("3.14159", before.result())
+        self.assertRaises(ValueError, failed.result)
+        self.assertIsInstance(failed.outcome, ValueError)
+        self.assertEqual("42", after.result())
+
+    def test_incorrect_parameter_type(self) -> None:
+        batch = self.conn.batch()
+        self.assertRaises(
+            TypeError, batch.add, self.conn.test_service.float_to_string, "foo"
+        )
+
+    def test_null_result(self) -> None:
+        with self.conn.batch() as batch:
+            call = batch.add(self.conn.test_service.echo_test_object, None)
+        self.assertIsNone(call.result())
+
+    def test_call_many(self) -> None:
+        service = self.conn.test_service
+        obj = service.create_test_object("bob")
+        self.assertEqual(
+            ["3.14159", "bob3.14159", [1, 2, 3]],
+            self.conn.call_many(
+                [
+                    (service.float_to_string, 3.14159),
+                    (obj.float_to_string, 3.14159),
+                    (service.increment_list, [0, 1, 2]),
+                ]
+            ),
+        )
+
+    def test_call_many_error(self) -> None:
+        service = self.conn.test_service
+        results = self.conn.call_many(
+            [
+                (service.throw_invalid_operation_exception,),
+                (service.float_to_string, 3.14159),
+            ]
+        )
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertEqual("3.14159", results[1])
+
+    def test_call_many_empty(self) -> None:
+        self.assertEqual([], self.conn.call_many([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import time
+import unittest
+import krpc.cache
+from krpc.error import RPCError
+from krpc.test.servertestcase import ServerTestCase
+
+
+class TestCache(ServerTestCase, unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super(TestCache, cls).setUpClass()
+
+    def setUp(self) -> None:
+        self.cache = self.conn.cache
+        self.cache.max_size = krpc.cache.DEFAULT_MAX_SIZE
+        self.cache.clear()
+
+    def tearDown(self) -> None:
+        service = self.conn.test_service
+        for name in ("counter", "string_property", "float_to_string"):
+            self.cache.remove_policy(service, name)
+        self.cache.remove_policy(service.TestClass, "int_property")
+
+    def test_no_policy(self) -> None:
+        self.assertEqual(1, self.conn.test_service.counter("TestCache.test_no_policy"))
+        self.assertEqual(2, self.conn.test_service.counter("TestCache.test_no_policy"))
+        self.assertEqual(0, self.cache.hits)
+        self.assertEqual(0, self.cache.misses)
+        self.assertEqual(0, len(self.cache))
+
+    def test_immutable(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "counter", krpc.cache.IMMUTABLE)
+        self.assertEqual(1, service.counter("TestCache.test_immutable"))
+        self.assertEqual(1, service.counter("TestCache.test_immutable"))
+        self.assertEqual(1, service.counter("TestCache.test_immutable"))
+        # Each set of arguments has a value of its own
+        self.assertEqual(1, service.counter("TestCache.test_immutable2"))
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+        self.assertEqual(2, len(self.cache))
+
+    def test_remove_policy(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "counter", krpc.cache.IMMUTABLE)
+        self.assertEqual(1, service.counter("TestCache.test_remove_policy"))
+        self.cache.remove_policy(service, "counter")
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(2, service.counter("TestCache.test_remove_policy"))
+
+    def test_time_to_live(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "counter", krpc.cache.TimeToLive(0.2))
+        self.assertEqual(1, service.counter("TestCache.test_time_to_live"))
+        self.assertEqual(1, service.counter("TestCache.test_time_to_live"))
+        time.sleep(0.3)
+        self.assertEqual(2, service.counter("TestCache.test_time_to_live"))
+        self.assertRaises(ValueError, krpc.cache.TimeToLive, 0)
+
+    def test_until_game_time_changes(self) -> None:
+        service = self.conn.test_service
+        cache = krpc.cache.Cache(self.conn)
+        policy = krpc.cache.UNTIL_GAME_TIME_CHANGES
+        cache._put(b"call", policy, (None, b"value", False))
+        self.assertEqual((None, b"value", False), cache._get(b"call"))
+        cache._game_time_changed()
+        self.assertIsNone(cache._get(b"call"))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        # Without the SpaceCenter service, there is no game time to watch
+        if not hasattr(self.conn, "space_center"):
+            self.assertRaises(
+                RPCError, self.cache.set_policy, service, "counter", policy
+            )
+
+    def test_setting_property(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "string_property", krpc.cache.IMMUTABLE)
+        service.string_property = "foo"
+        self.assertEqual("foo", service.string_property)
+        self.assertEqual("foo", service.string_property)
+        service.string_property = "bar"
+        self.assertEqual("bar", service.string_property)
+        self.assertEqual(1, self.cache.hits)
+
+    def test_class_property(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service.TestClass, "int_property", krpc.cache.IMMUTABLE)
+        obj1 = service.create_test_object("TestCache.test_class_property")
+        obj2 = service.create_test_object("TestCache.test_class_property2")
+        obj1.int_property = 1
+        obj2.int_property = 2
+        self.assertEqual(1, obj1.int_property)
+        self.assertEqual(2, obj2.int_property)
+        self.assertEqual(1, obj1.int_property)
+        self.assertEqual(1, self.cache.hits)
+        obj1.int_property = 3
+        self.assertEqual(3, obj1.int_property)
+        self.assertEqual(2, obj2.int_property)
+
+    def test_setting_property_in_batch(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service.TestClass, "int_property", krpc.cache.IMMUTABLE)
+        obj = service.create_test_object("TestCache.test_setting_property_in_batch")
+        obj.int_property = 1
+        self.assertEqual(1, obj.int_property)
+        with self.conn.batch() as batch:
+            batch.add(setattr, obj, "int_property", 2)
+        self.assertEqual(2, obj.int_property)
+        self.conn.call_async(setattr, obj, "int_property", 3).result()
+        self.assertEqual(3, obj.int_property)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_setting_property_through_prepared_call(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "string_property", krpc.cache.IMMUTABLE)
+        prepared = self.conn.prepare(service, "string_property")
+        prepared("foo")
+        self.assertEqual("foo", service.string_property)
+        prepared("bar")
+        self.assertEqual("bar", service.string_property)
+        self.assertEqual(0, self.cache.hits)
+        obj = service.create_test_object("TestCache.test_prepared_class_property")
+        self.cache.set_policy(service.TestClass, "int_property", krpc.cache.IMMUTABLE)
+        prepared = self.conn.prepare(obj, "int_property")
+        prepared(1)
+        self.assertEqual(1, obj.int_property)
+        prepared(2)
+        self.assertEqual(2, obj.int_property)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_error_not_cached(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "float_to_string", krpc.cache.IMMUTABLE)
+        self.assertEqual("3.14159", service.float_to_string(3.14159))
+        self.assertEqual("3.14159", service.float_to_string(3.14159))
+        self.assertEqual(1, self.cache.hits)
+        self.assertRaises(TypeError, service.float_to_string, "foo")
+
+    def test_eviction(self) -> None:
+        service = self.conn.test_service
+        self.cache.set_policy(service, "counter", krpc.cache.IMMUTABLE)
+        self.cache.max_size = 2
+        service.counter("TestCache.test_eviction1")
+        service.counter("TestCache.test_eviction2")
+        service.counter("TestCache.test_eviction1")
+        service.counter("TestCache.test_eviction3")
+        self.assertEqual(2, len(self.cache))
+        # The least recently used value was dropped
+        self.assertEqual(1, service.counter("TestCache.test_eviction1"))
+        self.assertEqual(2, service.counter("TestCache.test_eviction2"))
+        self.assertRaises(ValueError, setattr, self.cache, "max_size", -1)
+
+    def test_not_a_procedure(self) -> None:
+        self.assertRaises(
+            RPCError,
+            self.cache.set_policy,
+            self.conn.test_service,
+            "foo",
+            krpc.cache.IMMUTABLE,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+from krpc.client import Client
+from krpc.error import RPCError
+from krpc.test.servertestcase import ServerTestCase
+
+
+class CallAsyncTest(unittest.TestCase):
+    """Calls made without waiting for their results, which behave the same whether or
+    not the client pipelines its requests. Each way of connecting supplies the client.
+    """
+
+    # A test case in its own right only through a client, so it is not collected as one
+    __test__ = False
+
+    conn: Client
+
+    def test_procedure(self) -> None:
+        future = self.conn.call_async(self.conn.test_service.float_to_string, 3.14159)
+        self.assertEqual("3.14159", future.result())
+
+    def test_property(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        setter = self.conn.call_async(setattr, obj, "int_property", 42)
+        getter = self.conn.call_async(getattr, obj, "int_property")
+        self.assertIsNone(setter.result())
+        self.assertEqual(42, getter.result())
+        self.assertEqual(42, obj.int_property)
+
+    def test_service_property(self) -> None:
+        service = self.conn.test_service
+        self.conn.call_async(setattr, service, "string_property", "foo").result()
+        self.assertEqual("foo", service.string_property)
+
+    def test_not_a_property(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        self.assertRaises(RPCError, self.conn.call_async, setattr, obj, "foo", 42)
+
+    def test_error(self) -> None:
+        future = self.conn.call_async(self.conn.test_service.throw_argument_exception)
+        self.assertRaises(ValueError, future.result)
+
+    def test_many_in_order(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        futures = [
+            self.conn.call_async(setattr, obj, "int_property", i) for i in range(100)
+        ]
+        last = self.conn.call_async(getattr, obj, "int_property")
+        for future in futures:
+            future.result()
+        self.assertEqual(99, last.result())
+
+    def test_threads(self) -> None:
+        service = self.conn.test_service
+
+        def worker() -> None:
+            for _ in range(10):
+                self.assertEqual("3.14159", service.float_to_string(3.14159))
+                self.assertEqual("42", service.int32_to_string(42))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+class TestCallAsync(ServerTestCase, CallAsyncTest):
+    __test__ = True
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super(TestCallAsync, cls).setUpClass()
+
+
+class TestCallAsyncPipelined(CallAsyncTest):
+    """Calls sent without waiting for the response to the one before"""
+
+    __test__ = True
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = ServerTestCase.connect(pipeline_window=8)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,8 @@ from typing import Callable
 import krpc
 import krpc.limits
 import krpc.schema.KRPC_pb2 as KRPC
+from krpc.decoder import Decoder
+from krpc.encoder import Encoder
 from krpc.error import RPCError
 from krpc.test.servertestcase import ServerTestCase
 
@@ -150,6 +152,26 @@ class TestClient(ServerTestCase, unittest.TestCase):
         finally:
             conn.close()
 
+    def test_dynamic_services_built_when_used(self) -> None:
+        conn = ServerTestCase.connect(
+            name="python_client_test_dynamic",
+            use_pregenerated_stubs=False,
+        )
+        try:
+            self.assertIn("test_service", conn._unbuilt_services)
+            self.assertIn("test_service", dir(conn))
+            # An object handed over before its service has been used has its members
+            obj = self.conn.test_service.create_test_object("jeb")
+            typ = conn._types.class_type("TestService", "TestClass")
+            data = Encoder.encode(obj._object_id, conn._types.uint64_type)
+            obj2 = Decoder.decode(conn, data, typ)
+            self.assertEqual("jeb3.14159", obj2.float_to_string(3.14159))
+            self.assertNotIn("test_service", conn._unbuilt_services)
+            self.assertEqual("3.14159", conn.test_service.float_to_string(3.14159))
+            self.assertRaises(AttributeError, getattr, conn, "not_a_service")
+        finally:
+            conn.close()
+
     def test_class_as_return_value(self) -> None:
         obj = self.conn.test_service.create_test_object("jeb")
         self.assertEqual("TestClass", type(obj).__name__)
@@ -625,6 +647,11 @@ class TestClient(ServerTestCase, unittest.TestCase):
                     "benchmark",
                     "stream",
                     "add_stream",
+                    "batch",
+                    "call_many",
+                    "cache",
+                    "call_async",
+                    "prepare",
                     "stream_update_condition",
                     "wait_for_stream_update",
                     "add_stream_update_callback",
@@ -656,6 +683,7 @@ class TestClient(ServerTestCase, unittest.TestCase):
                     "add_stream",
                     "start_stream",
                     "set_stream_rate",
+                    "set_stream_update_interval",
                     "remove_stream",
                     "add_event",
                     "game_scene",
@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+from typing import List
+from krpc.client import Client
+from krpc.test.servertestcase import ServerTestCase
+
+
+class TestConnectionPool(unittest.TestCase):
+    """A client that spreads the calls its threads make over several RPC connections"""
+
+    conn: Client
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = ServerTestCase.connect(rpc_connections=4)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+    def test_calls_from_threads(self) -> None:
+        failures: List[str] = []
+
+        def worker(index: int) -> None:
+            for value in range(20):
+                result = self.conn.test_service.int32_to_string(index * 100 + value)
+                if result != str(index * 100 + value):
+                    failures.append(result)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], failures)
+
+    def test_object(self) -> None:
+        # An object created through one connection can be used through any other
+        obj = self.conn.test_service.create_test_object("jeb")
+        results: List[str] = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(obj.float_to_string(3.14159))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(["jeb3.14159"] * 4, results)
+
+    def test_client_id(self) -> None:
+        # Calls to the KRPC service are always made through the client's own connection
+        ids = set(self.conn.krpc.get_client_id() for _ in range(8))
+        self.assertEqual(1, len(ids))
+
+    def test_stream(self) -> None:
+        with self.conn.stream(
+            self.conn.test_service.float_to_string, 3.14159
+        ) as stream:
+            self.assertEqual("3.14159", stream())
+
+    def test_event(self) -> None:
+        event = self.conn.test_service.on_timer(200)
+        with event.condition:
+            start_time = time.time()
+            event.wait()
+            self.assertGreater(time.time() - start_time, 0.15)
+            self.assertLess(time.time() - start_time, 2)
+            self.assertTrue(event.stream())
+
+    def test_invalid_connection_count(self) -> None:
+        self.assertRaises(ValueError, ServerTestCase.connect, rpc_connections=0)
+
+    def test_with_pipeline(self) -> None:
+        self.assertRaises(
+            ValueError, ServerTestCase.connect, rpc_connections=2, pipeline_window=8
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
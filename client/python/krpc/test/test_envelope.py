@@ -0,0 +1,115 @@
+import unittest
+from krpc import envelope
+from krpc.decoder import Decoder
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+class TestEnvelope(unittest.TestCase):
+    """The messages a call and a stream update are carried in are read and written
+    the same as protobuf would"""
+
+    def test_request(self) -> None:
+        call = envelope.encode_procedure(
+            "TestService", "Foo", None
+        ) + envelope.encode_argument(0, b"\x08\x01")
+        data = envelope.encode_request(
+            [call, envelope.encode_procedure("", "", (3, 7))]
+        )
+        size, prefix_length = Decoder.decode_size_prefix(data)
+        self.assertEqual(len(data), prefix_length + size)
+        expected = KRPC.Request()
+        expected.calls.add(service="TestService", procedure="Foo").arguments.add(
+            position=0, value=b"\x08\x01"
+        )
+        expected.calls.add(service_id=3, procedure_id=7)
+        self.assertEqual(expected, KRPC.Request.FromString(data[prefix_length:]))
+
+    def test_arguments(self) -> None:
+        call = b"".join(
+            [
+                envelope.encode_procedure("", "", (1, 2)),
+                envelope.encode_argument(0, b""),
+                envelope.encode_null_argument(1),
+                envelope.encode_argument(300, b"x" * 200),
+            ]
+        )
+        expected = KRPC.ProcedureCall(service_id=1, procedure_id=2)
+        expected.arguments.add(position=0, value=b"")
+        expected.arguments.add(position=1, is_null=True)
+        expected.arguments.add(position=300, value=b"x" * 200)
+        self.assertEqual(expected, KRPC.ProcedureCall.FromString(call))
+
+    def test_response(self) -> None:
+        response = KRPC.Response()
+        response.results.add(value=b"\x08\x01")
+        response.results.add(is_null=True)
+        response.results.add(value=b"x" * 200)
+        response.results.add().error.description = "foo"
+        error, results = envelope.decode_response(response.SerializeToString())
+        self.assertIsNone(error)
+        self.assertEqual(
+            [
+                (None, b"\x08\x01", False),
+                (None, b"", True),
+                (None, b"x" * 200, False),
+            ],
+            results[:3],
+        )
+        self.assertEqual(KRPC.Error(description="foo"), results[3][0])
+
+    def test_response_error(self) -> None:
+        response = KRPC.Response()
+        response.error.service = "TestService"
+        response.error.name = "Foo"
+        error, results = envelope.decode_response(response.SerializeToString())
+        self.assertEqual(response.error, error)
+        self.assertEqual([], results)
+
+    def test_empty_response(self) -> None:
+        self.assertEqual((None, []), envelope.decode_response(b""))
+
+    def test_large_response(self) -> None:
+        # Decoded where it lies rather than copied out first, with its value copied
+        value = bytes(range(256)) * 100
+        response = KRPC.Response()
+        response.results.add(value=value)
+        buffer = bytearray(response.SerializeToString())
+        with memoryview(buffer) as view:
+            _, results = envelope.decode_response(view)
+        self.assertIsInstance(results[0][1], bytes)
+        self.assertEqual(value, results[0][1])
+
+    def test_stream_update(self) -> None:
+        update = KRPC.StreamUpdate()
+        update.results.add(id=1).result.value = b"\x08\x01"
+        update.results.add(id=300).result.is_null = True
+        update.results.add(id=2).result.error.description = "foo"
+        update.results.add(id=3)
+        results = envelope.decode_stream_update(memoryview(update.SerializeToString()))
+        self.assertEqual(
+            [(1, (None, b"\x08\x01", False)), (300, (None, b"", True))], results[:2]
+        )
+        self.assertEqual(2, results[2][0])
+        self.assertEqual(KRPC.Error(description="foo"), results[2][1][0])
+        self.assertEqual((3, (None, b"", False)), results[3])
+
+    def test_unknown_fields(self) -> None:
+        # A field added to a message later is passed over
+        result = KRPC.ProcedureResult(value=b"foo").SerializeToString()
+        result += b"\x20\x96\x01" + b"\x2a\x02ab" + b"\x31" + b"\x00" * 8
+        data = b"\x12" + bytes([len(result)]) + result + b"\x38\x01"
+        self.assertEqual(
+            (None, [(None, b"foo", False)]), envelope.decode_response(data)
+        )
+
+    def test_truncated(self) -> None:
+        data = KRPC.Response(results=[KRPC.ProcedureResult(value=b"foo")])
+        encoded = data.SerializeToString()
+        for length in range(1, len(encoded)):
+            self.assertRaises(
+                (ValueError, IndexError), envelope.decode_response, encoded[:length]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
 import threading
 import time
+from typing import List
 import unittest
 
+import krpc
+from krpc.encoder import Encoder
+from krpc.event import Event
+from krpc.expr import call, const
+import krpc.schema.KRPC_pb2 as KRPC
 from krpc.test.servertestcase import ServerTestCase
 
 
@@ -120,6 +126,83 @@ class TestEvent(ServerTestCase, unittest.TestCase):
         self.assertTrue(called1.is_set())
         self.assertFalse(called2.is_set())
 
+    def test_wait_any(self) -> None:
+        slow = self.conn.test_service.on_timer(1000)
+        fast = self.conn.test_service.on_timer(200)
+        start_time = time.time()
+        self.assertIs(fast, krpc.wait_any([slow, fast]))
+        self.assertGreater(time.time() - start_time, 0.15)
+        self.assertLess(time.time() - start_time, 0.9)
+        self.assertFalse(slow.stream())
+
+    def test_wait_any_timeout(self) -> None:
+        event = self.conn.test_service.on_timer(1000)
+        start_time = time.time()
+        self.assertIsNone(krpc.wait_any([event], timeout=0.1))
+        self.assertGreater(time.time() - start_time, 0.05)
+        self.assertLess(time.time() - start_time, 0.9)
+
+    def test_wait_all(self) -> None:
+        events = [self.conn.test_service.on_timer(ms) for ms in (400, 200)]
+        start_time = time.time()
+        self.assertEqual(events, krpc.wait_all(events))
+        self.assertGreater(time.time() - start_time, 0.35)
+        self.assertLess(time.time() - start_time, 2)
+        self.assertTrue(all(event.stream() for event in events))
+
+    def test_wait_all_timeout(self) -> None:
+        slow = self.conn.test_service.on_timer(2000)
+        fast = self.conn.test_service.on_timer(200)
+        self.assertEqual([fast], krpc.wait_all([slow, fast], timeout=1))
+
+    def test_event_that_resets(self) -> None:
+        # Events whose streams are updated here rather than by the server, so that one
+        # can be triggered and reset before the waiter sees it
+        manager = self.conn._stream_manager
+        events = []
+        for stream_id in (1001, 1002):
+            event = Event(self.conn, KRPC.Event(stream=KRPC.Stream(id=stream_id)))
+            event.stream._stream.configured(None, True)
+            events.append(event)
+        self.addCleanup(manager._streams.pop, 1001)
+        self.addCleanup(manager._streams.pop, 1002)
+        true = Encoder.encode(True, self.conn._types.bool_type)
+        false = Encoder.encode(False, self.conn._types.bool_type)
+        manager.decode_when_read = True
+        self.addCleanup(setattr, manager, "decode_when_read", False)
+
+        def waiting() -> None:
+            # Waits reset the streams of their events to false once they have started
+            while not all(event.stream._stream.updated for event in events):
+                time.sleep(0.01)
+
+        # Triggered and reset before the waiter can check it
+        result: List[object] = []
+        thread = threading.Thread(
+            target=lambda: result.append(krpc.wait_any(events, timeout=5))
+        )
+        thread.start()
+        waiting()
+        with manager.update_condition:
+            manager.update([(1001, (None, true, False))])
+            manager.update([(1001, (None, false, False))])
+        thread.join()
+        self.assertEqual([events[0]], result)
+
+        # Triggered and reset before the other event is triggered
+        for event in events:
+            event.stream._stream._updated = False
+        thread = threading.Thread(
+            target=lambda: result.append(krpc.wait_all(events, timeout=5))
+        )
+        thread.start()
+        waiting()
+        manager.update([(1001, (None, true, False))])
+        manager.update([(1001, (None, false, False))])
+        manager.update([(1002, (None, true, False))])
+        thread.join()
+        self.assertEqual(events, result[1])
+
     def test_custom_event(self) -> None:
         expression = self.conn.krpc.Expression
 
@@ -148,6 +231,20 @@ class TestEvent(ServerTestCase, unittest.TestCase):
                 self.conn.test_service.counter("TestEvent.test_custom_event"), 21
             )
 
+    def test_custom_event_from_builder(self) -> None:
+        counter = call(
+            self.conn.test_service.counter, "TestEvent.test_custom_event_from_builder"
+        )
+        event = (const(2) * 10 == counter).event(self.conn)
+        with event.condition:
+            event.wait()
+            self.assertGreaterEqual(
+                self.conn.test_service.counter(
+                    "TestEvent.test_custom_event_from_builder"
+                ),
+                21,
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
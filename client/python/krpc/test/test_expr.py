@@ -0,0 +1,207 @@
+import threading
+import unittest
+from typing import Any, Callable, List, Tuple
+from krpc.expr import Expr, const, function, invoke, list_of, param, tuple_of
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+class Created:
+    """What the server would create for a call to a class of the KRPC service"""
+
+    def __init__(self, cls: str, method: str, args: Tuple[object, ...]) -> None:
+        self.cls = cls
+        self.method = method
+        self.args = args
+
+
+class Batch:
+    def __init__(self, client: "Client") -> None:
+        self.client = client
+        self.calls: List[Tuple[Callable[..., object], Tuple[object, ...]]] = []
+        self.results: List[Any] = []
+
+    def add(self, func: Callable[..., object], *args: object) -> Any:
+        self.calls.append((func, args))
+        return self
+
+    def execute(self) -> None:
+        self.client.requests.append(len(self.calls))
+        self.results = [func(*args) for func, args in self.calls]
+
+    def result(self) -> Any:
+        return self.results.pop(0)
+
+
+class Procedures:
+    def __init__(self, cls: str) -> None:
+        self.cls = cls
+
+    def __getattr__(self, method: str) -> Callable[..., Created]:
+        return lambda *args: Created(self.cls, method, args)
+
+
+class Service:
+    # pylint: disable=invalid-name
+    def __init__(self) -> None:
+        self.Expression = Procedures("Expression")
+        self.Type = Procedures("Type")
+
+
+class Client:
+    """Records the requests made to create an expression, rather than making them"""
+
+    def __init__(self) -> None:
+        self.krpc = Service()
+        self.requests: List[int] = []
+
+    def batch(self) -> Batch:
+        return Batch(self)
+
+
+class TestExpr(unittest.TestCase):
+    def test_constants(self) -> None:
+        self.assertEqual(("constant_double", [1.5]), self.node(const(1.5)))
+        self.assertEqual(("constant_int", [2]), self.node(const(2)))
+        self.assertEqual(("constant_bool", [True]), self.node(const(True)))
+        self.assertEqual(("constant_string", ["x"]), self.node(const("x")))
+        self.assertEqual(("constant_double", [2.0]), self.node(const(2, float)))
+        self.assertEqual(
+            ("constant_float", [2.0]), self.node(const(2, KRPC.Type.FLOAT))
+        )
+        self.assertRaises(ValueError, const, b"x")
+
+    def test_operators(self) -> None:
+        x = param("x", float)
+        expr = (x + 1) * 2 > 70000
+        self.assertEqual("greater_than", expr.method)
+        self.assertEqual(KRPC.Type.BOOL, expr.type.code)
+        product = expr.args[0]
+        self.assertEqual("multiply", product.method)
+        self.assertEqual(KRPC.Type.DOUBLE, product.type.code)
+        self.assertEqual(("add", x), (product.args[0].method, product.args[0].args[0]))
+        # Constants take the type of the expression they are combined with
+        self.assertEqual(("constant_double", [70000.0]), self.node(expr.args[1]))
+        self.assertEqual(("constant_double", [1.0]), self.node(product.args[0].args[1]))
+
+    def test_reflected_operators(self) -> None:
+        x = param("x", int)
+        expr = 10 - x
+        self.assertEqual("subtract", expr.method)
+        self.assertEqual(("constant_int", [10]), self.node(expr.args[0]))
+        self.assertIs(x, expr.args[1])
+
+    def test_constant_not_converted_when_it_would_change(self) -> None:
+        x = param("x", int)
+        self.assertEqual(("constant_int", [2]), self.node((x < 2.0).args[1]))
+        self.assertEqual(("constant_double", [2.5]), self.node((x < 2.5).args[1]))
+
+    def test_logical_operators(self) -> None:
+        x = param("x", int)
+        expr = ~((x > 1) & (x < 5)) | (x == 7)
+        self.assertEqual("or", expr.method)
+        self.assertEqual("not", expr.args[0].method)
+        self.assertEqual("and", expr.args[0].args[0].method)
+        self.assertEqual("equal", expr.args[1].method)
+
+    def test_no_truth_value(self) -> None:
+        x = param("x", int)
+        self.assertRaises(TypeError, bool, x > 1)
+        with self.assertRaises(TypeError):
+            1 < x < 5  # pylint: disable=pointless-statement
+
+    def test_cast(self) -> None:
+        expr = param("x", int).cast(float)
+        self.assertEqual("cast", expr.method)
+        self.assertEqual(KRPC.Type.DOUBLE, expr.type.code)
+        self.assertEqual(("Type", "double"), (expr.args[1].cls, expr.args[1].method))
+        self.assertRaises(ValueError, param("x", int).cast, list)
+
+    def test_collections(self) -> None:
+        values = list_of(1.0, 2.0, 3.0)
+        self.assertEqual("create_list", values.method)
+        self.assertEqual(KRPC.Type.LIST, values.type.code)
+        self.assertEqual(KRPC.Type.SINT32, values.count().type.code)
+        self.assertEqual(KRPC.Type.DOUBLE, values.sum().type.code)
+        self.assertEqual(KRPC.Type.DOUBLE, values[0].type.code)
+        self.assertEqual(("constant_int", [0]), self.node(values[0].args[1]))
+        self.assertEqual(
+            ("constant_double", [2.0]), self.node(values.contains(2).args[1])
+        )
+        self.assertEqual(KRPC.Type.TUPLE, tuple_of(1, "x").type.code)
+
+    def test_lambdas(self) -> None:
+        values = list_of(1.0, 2.0, 3.0)
+        expr = values.select(lambda x: x * 2).where(lambda x: x > 3).count() == 2
+        select = expr.args[0].args[0].args[0]
+        self.assertEqual("select", select.method)
+        fn = select.args[1]
+        self.assertEqual("function", fn.method)
+        parameters, body = fn.args
+        self.assertEqual(1, len(parameters))
+        self.assertEqual("parameter", parameters[0].method)
+        self.assertIs(parameters[0], body.args[0])
+        self.assertEqual(KRPC.Type.LIST, select.type.code)
+        self.assertEqual(KRPC.Type.DOUBLE, select.type.types[0].code)
+
+    def test_parameter_names_unique_across_threads(self) -> None:
+        values = list_of(1, 2, 3)
+        names: List[str] = []
+
+        def build() -> None:
+            for _ in range(200):
+                fn = values.select(lambda x: x + 1).args[1]
+                names.append(fn.args[0][0].args[0])
+
+        threads = [threading.Thread(target=build) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(800, len(set(names)))
+
+    def test_aggregate(self) -> None:
+        values = list_of(1, 2, 3)
+        expr = values.aggregate(lambda acc, x: acc + x)
+        self.assertEqual("aggregate", expr.method)
+        self.assertEqual(2, len(expr.args[1].args[0]))
+        expr = values.aggregate(lambda acc, x: acc + x.cast(float), seed=0.5)
+        self.assertEqual("aggregate_with_seed", expr.method)
+        self.assertEqual(KRPC.Type.DOUBLE, expr.type.code)
+
+    def test_element_type_required(self) -> None:
+        values = Expr("create_list", [[]], None)
+        self.assertRaises(ValueError, values.select, lambda x: x)
+        self.assertEqual("select", values.select(lambda x: x + 1, int).method)
+
+    def test_build(self) -> None:
+        client = Client()
+        x = param("x", float)
+        expr = invoke(function([x], x * 2 + 1), {"x": 3.0}) == 7
+        result = expr.build(client)  # type: ignore[arg-type]
+        self.assertEqual(("Expression", "equal"), (result.cls, result.method))
+        # One request for each level of the expression: the type of the parameter and
+        # the four constants, the parameter, the product, the sum, the function, its
+        # invocation and the comparison
+        self.assertEqual([5, 1, 1, 1, 1, 1, 1], client.requests)
+        invoked = result.args[0]
+        self.assertEqual("invoke", invoked.method)
+        self.assertEqual(["x"], list(invoked.args[1].keys()))
+        self.assertEqual("constant_double", invoked.args[1]["x"].method)
+        fn = invoked.args[0]
+        parameter = fn.args[0][0]
+        self.assertEqual("parameter", parameter.method)
+        self.assertIs(parameter, fn.args[1].args[0].args[0])
+
+    def test_shared_nodes_built_once(self) -> None:
+        client = Client()
+        x = param("x", int)
+        ((x + x) * x).build(client)  # type: ignore[arg-type]
+        self.assertEqual([1, 1, 1, 1], client.requests)
+
+    @staticmethod
+    def node(expr: Expr) -> Tuple[str, List[object]]:
+        return expr.method, expr.args
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,18 @@ class ScriptedSocket:
             return b""
         return self.chunks.pop(0)
 
+    def recv_into(self, buffer: memoryview) -> int:
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        # A read fills no more than the room it is given, and leaves the rest for the
+        # next one
+        if len(chunk) > len(buffer):
+            self.chunks.insert(0, chunk[len(buffer) :])
+            chunk = chunk[: len(buffer)]
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
     def close(self) -> None:
         pass
 
@@ -46,16 +58,21 @@ class TestReceiveMessage(unittest.TestCase):
         message = conn.receive_message(KRPC.Response)
         return message.results[0].value  # type: ignore[attr-defined,no-any-return]
 
+    @staticmethod
+    def waiting(conn: Connection) -> bytes:
+        """The data read from the socket that has not been consumed yet"""
+        return bytes(conn._view[conn._start : conn._end])
+
     def test_whole_message_in_one_read(self) -> None:
         conn = self.connection(self.encoded(b"foo"))
         self.assertEqual(b"foo", self.receive(conn))
-        self.assertEqual(b"", conn._buffer)
+        self.assertEqual(b"", self.waiting(conn))
 
     def test_message_split_across_reads(self) -> None:
         data = self.encoded(b"foo")
         conn = self.connection(data[:1], data[1:3], data[3:])
         self.assertEqual(b"foo", self.receive(conn))
-        self.assertEqual(b"", conn._buffer)
+        self.assertEqual(b"", self.waiting(conn))
 
     def test_size_prefix_split_across_reads(self) -> None:
         # A payload this size needs a two byte size prefix, so the read can end
@@ -64,20 +81,54 @@ class TestReceiveMessage(unittest.TestCase):
         data = self.encoded(value)
         conn = self.connection(data[:1], data[1:])
         self.assertEqual(value, self.receive(conn))
-        self.assertEqual(b"", conn._buffer)
+        self.assertEqual(b"", self.waiting(conn))
 
     def test_two_messages_in_one_read(self) -> None:
         conn = self.connection(self.encoded(b"foo") + self.encoded(b"bar"))
         self.assertEqual(b"foo", self.receive(conn))
         self.assertEqual(b"bar", self.receive(conn))
-        self.assertEqual(b"", conn._buffer)
+        self.assertEqual(b"", self.waiting(conn))
 
     def test_message_and_the_start_of_the_next_in_one_read(self) -> None:
         second = self.encoded(b"bar")
         conn = self.connection(self.encoded(b"foo") + second[:2], second[2:])
         self.assertEqual(b"foo", self.receive(conn))
         self.assertEqual(b"bar", self.receive(conn))
-        self.assertEqual(b"", conn._buffer)
+        self.assertEqual(b"", self.waiting(conn))
+
+    def test_message_larger_than_the_buffer(self) -> None:
+        value = b"x" * (3 * len(Connection("localhost", 0)._buffer))
+        data = self.encoded(value)
+        conn = self.connection(data[:100], data[100:])
+        self.assertEqual(value, self.receive(conn))
+        self.assertEqual(b"", self.waiting(conn))
+
+    def test_message_reaching_past_the_end_of_the_buffer(self) -> None:
+        # The start of the message is moved to the front of the buffer to make room for
+        # the rest of it, rather than the buffer growing
+        conn = self.connection()
+        size = len(conn._buffer)
+        first = self.encoded(b"x" * (size - 100))
+        second = self.encoded(b"y" * 1000)
+        conn._socket.chunks = [first + second[:50], second[50:]]  # type: ignore[attr-defined]
+        self.assertEqual(b"x" * (size - 100), self.receive(conn))
+        self.assertEqual(b"y" * 1000, self.receive(conn))
+        self.assertEqual(size, len(conn._buffer))
+        self.assertEqual(b"", self.waiting(conn))
+
+    def test_buffer_reused(self) -> None:
+        messages = [self.encoded(str(i).encode() * 1000) for i in range(100)]
+        conn = self.connection(*messages)
+        buffer = conn._buffer
+        for i in range(100):
+            self.assertEqual(str(i).encode() * 1000, self.receive(conn))
+        self.assertIs(buffer, conn._buffer)
+
+    def test_receive_after_message(self) -> None:
+        conn = self.connection(self.encoded(b"foo") + b"bar" + self.encoded(b"baz"))
+        self.assertEqual(b"foo", self.receive(conn))
+        self.assertEqual(b"bar", conn.receive(3))
+        self.assertEqual(b"baz", self.receive(conn))
 
     def test_connection_closed_partway_through_a_message(self) -> None:
         data = self.encoded(b"foo")
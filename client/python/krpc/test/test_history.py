@@ -0,0 +1,72 @@
+import unittest
+from array import array
+from krpc.history import History
+from krpc.types import Types
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.types = Types()
+
+    def test_numbers(self) -> None:
+        history = History(3, self.types.double_type)
+        self.assertEqual((array("d"), array("d")), history.last())
+        history.append(1.0, 10.5)
+        history.append(2.0, 20.5)
+        self.assertEqual((array("d", [1, 2]), array("d", [10.5, 20.5])), history.last())
+        self.assertEqual((array("d", [2]), array("d", [20.5])), history.last(1))
+        self.assertEqual((array("d"), array("d")), history.last(0))
+
+    def test_oldest_replaced_once_full(self) -> None:
+        history = History(3, self.types.sint32_type)
+        for i in range(5):
+            history.append(float(i), i * 10)
+        times, values = history.last()
+        self.assertEqual(array("d", [2, 3, 4]), times)
+        self.assertEqual(array("i", [20, 30, 40]), values)
+        self.assertEqual((array("d", [3, 4]), array("i", [30, 40])), history.last(2))
+        self.assertEqual(history.last(), history.last(10))
+
+    def test_tuples_of_numbers(self) -> None:
+        vector = self.types.tuple_type(
+            self.types.float_type, self.types.float_type, self.types.float_type
+        )
+        history = History(2, vector)
+        self.assertEqual(3, history.width)
+        for i in range(3):
+            history.append(float(i), (i, i + 0.5, -i))
+        times, values = history.last()
+        self.assertEqual(array("d", [1, 2]), times)
+        self.assertEqual(array("f", [1, 1.5, -1, 2, 2.5, -2]), values)
+
+    def test_other_values(self) -> None:
+        history = History(2, self.types.string_type)
+        for value in ("foo", "bar", "baz"):
+            history.append(0.0, value)
+        self.assertEqual(["bar", "baz"], history.last()[1])
+        mixed = self.types.tuple_type(self.types.float_type, self.types.string_type)
+        history = History(2, mixed)
+        self.assertEqual(1, history.width)
+        history.append(0.0, (1.0, "foo"))
+        self.assertEqual([(1.0, "foo")], history.last()[1])
+
+    def test_bools(self) -> None:
+        # Given back as bools, as the stream's value is, rather than as numbers
+        history = History(2, self.types.bool_type)
+        history.append(0.0, True)
+        history.append(1.0, False)
+        values = history.last()[1]
+        self.assertEqual([True, False], values)
+        self.assertEqual([bool, bool], [type(value) for value in values])
+        pair = self.types.tuple_type(self.types.bool_type, self.types.bool_type)
+        history = History(2, pair)
+        history.append(0.0, (True, False))
+        self.assertEqual([(True, False)], history.last()[1])
+
+    def test_capacity(self) -> None:
+        self.assertEqual(5, History(5, self.types.bool_type).capacity)
+        self.assertRaises(ValueError, History, 0, self.types.bool_type)
+
+
+if __name__ == "__main__":
+    unittest.main()
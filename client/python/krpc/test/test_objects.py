@@ -1,4 +1,10 @@
+import gc
+import threading
+import time
+from typing import List
 import unittest
+import weakref
+from krpc.types import ClassBase
 from krpc.test.servertestcase import ServerTestCase
 
 
@@ -82,6 +88,48 @@ class TestObjects(ServerTestCase, unittest.TestCase):
         self.assertEqual(obj1._object_id, obj2._object_id)
         self.assertNotEqual(obj1._object_id, obj3._object_id)
 
+    def test_identity(self) -> None:
+        # The same remote object is always the same proxy
+        obj1 = self.conn.test_service.create_test_object("jeb")
+        obj2 = self.conn.test_service.create_test_object("bob")
+        self.assertIs(obj1, self.conn.test_service.echo_test_object(obj1))
+        self.assertIsNot(obj1, obj2)
+        self.conn.test_service.object_property = obj1
+        self.assertIs(obj1, self.conn.test_service.object_property)
+
+        # A proxy that nothing holds is freed, and another is made in its place
+        proxy = weakref.ref(obj2)
+        object_id = obj2._object_id
+        del obj2
+        gc.collect()
+        self.assertIsNone(proxy())
+        obj3 = self.conn.test_service.echo_test_object(
+            self.conn.test_service.TestClass(self.conn, object_id)
+        )
+        self.assertEqual(object_id, obj3._object_id)
+
+    def test_identity_across_threads(self) -> None:
+        # Threads handed the same object at once are all given the same proxy
+        class SlowProxy(ClassBase):
+            """Takes long enough to create that every thread misses the lookup first"""
+
+            def __init__(self, client: object, object_id: int) -> None:
+                time.sleep(0.05)
+                super().__init__(client, object_id)  # type: ignore[arg-type]
+
+        proxies: List[ClassBase] = []
+
+        def lookup() -> None:
+            proxies.append(self.conn._remote_object(SlowProxy, 42))
+
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4, len(proxies))
+        self.assertTrue(all(proxy is proxies[0] for proxy in proxies))
+
 
 if __name__ == "__main__":
     unittest.main()
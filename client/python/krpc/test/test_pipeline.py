@@ -0,0 +1,194 @@
+import socket
+import threading
+import unittest
+from typing import List
+import krpc.schema.KRPC_pb2 as KRPC
+from krpc.connection import Connection
+from krpc.encoder import Encoder
+from krpc.envelope import Response
+from krpc.error import RPCError
+from krpc.pipeline import Pipeline
+
+
+def request(name: str) -> KRPC.Request:
+    message = KRPC.Request()
+    message.calls.add(service="Test", procedure=name)
+    return message
+
+
+def value(response: Response) -> bytes:
+    _, results = response
+    return results[0][1]
+
+
+class EchoServer:
+    """The server end of a connection. It records the requests it receives, and answers
+    them in order with the name of the procedure each calls when told to."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.connection = Connection("localhost", 0)
+        self.connection._socket = sock
+        self.received: List[str] = []
+        self.received_condition = threading.Condition()
+        self.answered = 0
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self) -> None:
+        try:
+            while True:
+                message = self.connection.receive_message(KRPC.Request)
+                name = message.calls[0].procedure  # type: ignore[attr-defined]
+                with self.received_condition:
+                    self.received.append(name)
+                    self.received_condition.notify_all()
+        except socket.error:
+            pass
+
+    def answer(self, count: int = 1) -> None:
+        self.wait_for_requests(self.answered + count)
+        for name in self.received[self.answered : self.answered + count]:
+            response = KRPC.Response()
+            response.results.add(value=name.encode())
+            self.connection.send_message(response)
+        self.answered += count
+
+    def wait_for_requests(self, count: int) -> None:
+        with self.received_condition:
+            self.received_condition.wait_for(
+                lambda: len(self.received) >= count, timeout=10
+            )
+
+
+class TestPipeline(unittest.TestCase):
+    """The pipeline is driven over a socket pair, with this end standing in for the
+    server, so what is in flight and when responses arrive is up to the test"""
+
+    def setUp(self) -> None:
+        client, server = socket.socketpair()
+        self.server = EchoServer(server)
+        self.connection = Connection("localhost", 0)
+        self.connection._socket = client
+
+    def tearDown(self) -> None:
+        self.server.connection.close()
+        self.connection.close()
+
+    def test_responses_matched_in_order(self) -> None:
+        pipeline = Pipeline(self.connection, 8)
+        futures = [pipeline.submit(request(str(i)), value) for i in range(8)]
+        # Every request is sent before the first response is received
+        self.server.wait_for_requests(8)
+        self.assertEqual([str(i) for i in range(8)], self.server.received)
+        self.server.answer(8)
+        self.assertEqual(
+            [str(i).encode() for i in range(8)],
+            [future.result(timeout=10) for future in futures],
+        )
+        pipeline.close()
+
+    def test_window_limits_requests_in_flight(self) -> None:
+        pipeline = Pipeline(self.connection, 2)
+        pipeline.submit(request("0"), value)
+        pipeline.submit(request("1"), value)
+        submitted = threading.Event()
+
+        def submit() -> None:
+            pipeline.submit(request("2"), value)
+            submitted.set()
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        self.assertFalse(submitted.wait(0.1))
+        self.server.answer()
+        self.assertTrue(submitted.wait(10))
+        thread.join()
+        self.server.answer(2)
+        pipeline.close()
+
+    def test_decode_error(self) -> None:
+        def decode(response: Response) -> bytes:
+            raise ValueError(value(response))
+
+        pipeline = Pipeline(self.connection, 2)
+        failed = pipeline.submit(request("foo"), decode)
+        succeeded = pipeline.submit(request("bar"), value)
+        self.server.answer(2)
+        self.assertRaises(ValueError, failed.result, 10)
+        self.assertEqual(b"bar", succeeded.result(timeout=10))
+        pipeline.close()
+
+    def test_cancelled_request(self) -> None:
+        pipeline = Pipeline(self.connection, 4)
+        cancelled = pipeline.submit(request("foo"), value)
+        succeeded = pipeline.submit(request("bar"), value)
+        self.assertTrue(cancelled.cancel())
+        self.server.answer(2)
+        self.assertEqual(b"bar", succeeded.result(timeout=10))
+        # Requests in flight when the pipeline closes are failed around it too
+        cancelled = pipeline.submit(request("baz"), value)
+        failed = pipeline.submit(request("qux"), value)
+        self.assertTrue(cancelled.cancel())
+        self.server.wait_for_requests(4)
+        pipeline.close()
+        self.assertRaises(socket.error, failed.result, 10)
+
+    def test_close_fails_requests_in_flight(self) -> None:
+        pipeline = Pipeline(self.connection, 2)
+        future = pipeline.submit(request("foo"), value)
+        self.server.wait_for_requests(1)
+        pipeline.close()
+        self.assertRaises(socket.error, future.result, 10)
+        self.assertRaises(socket.error, pipeline.submit, request("bar"), value)
+
+    def test_connection_closed_by_server(self) -> None:
+        pipeline = Pipeline(self.connection, 2)
+        future = pipeline.submit(request("foo"), value)
+        self.server.wait_for_requests(1)
+        self.server.connection.shutdown()
+        self.assertRaises(socket.error, future.result, 10)
+        pipeline.close()
+
+    def test_malformed_response(self) -> None:
+        pipeline = Pipeline(self.connection, 2)
+        future = pipeline.submit(request("foo"), value)
+        self.server.wait_for_requests(1)
+        # A response whose first field claims more bytes than the message holds
+        self.server.connection.send(b"\x02\x0a\x05")
+        self.assertRaisesRegex(ValueError, "Truncated", future.result, 10)
+        self.assertRaises(ValueError, pipeline.submit, request("bar"), value)
+        pipeline.close()
+
+    def test_response_to_no_request(self) -> None:
+        pipeline = Pipeline(self.connection, 2)
+        self.server.received.append("foo")
+        self.server.answer()
+        pipeline._thread.join(10)
+        self.assertFalse(pipeline._thread.is_alive())
+        self.assertRaises(RPCError, pipeline.submit, request("bar"), value)
+        pipeline.close()
+
+    def test_call_from_callback(self) -> None:
+        pipeline = Pipeline(self.connection, 2)
+        errors: List[Exception] = []
+
+        def callback(_: object) -> None:
+            try:
+                pipeline.call(Encoder.encode_message_with_size(request("bar")), value)
+            except RPCError as exn:
+                errors.append(exn)
+
+        future = pipeline.submit(request("foo"), value)
+        future.add_done_callback(callback)
+        self.server.answer()
+        self.assertEqual(b"foo", future.result(timeout=10))
+        self.assertEqual(1, len(errors))
+        pipeline.close()
+
+    def test_invalid_window(self) -> None:
+        self.assertRaises(ValueError, Pipeline, self.connection, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from krpc.client import Client
+from krpc.decoder import Decoder
+from krpc.error import RPCError
+from krpc.test.servertestcase import ServerTestCase
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+class PreparedCallTest(unittest.TestCase):
+    """Calls prepared ahead of time, which behave the same whether or not the client
+    pipelines its requests. Each way of connecting supplies the client."""
+
+    # A test case in its own right only through a client, so it is not collected as one
+    __test__ = False
+
+    conn: Client
+
+    def test_procedure(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "float_to_string")
+        self.assertEqual("3.14159", prepared(3.14159))
+        self.assertEqual("2.5", prepared(2.5))
+
+    def test_several_arguments(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "add_multiple_values")
+        self.assertEqual("3.14159", prepared(0.14159, 1, 2))
+        self.assertEqual("3.14159", prepared(0.14159, y=1, z=2))
+
+    def test_optional_arguments(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "optional_arguments")
+        self.assertEqual("jebfoobarnull", prepared("jeb"))
+        self.assertEqual("jebbobbillnull", prepared("jeb", "bob", "bill"))
+        self.assertEqual("jebfoobillnull", prepared("jeb", z="bill"))
+        self.assertRaises(TypeError, prepared)
+        self.assertRaises(TypeError, prepared, "jeb", w="bill")
+
+    def test_null_argument(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "echo_test_object")
+        self.assertIsNone(prepared(None))
+        obj = self.conn.test_service.create_test_object("jeb")
+        self.assertEqual(obj, prepared(obj))
+
+    def test_coerced_argument(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "float_to_string")
+        self.assertEqual("42", prepared(42))
+        self.assertRaises(TypeError, prepared, "foo")
+
+    def test_method(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        prepared = self.conn.prepare(obj, "float_to_string")
+        self.assertEqual("jeb3.14159", prepared(3.14159))
+
+    def test_property(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        prepared = self.conn.prepare(obj, "int_property")
+        self.assertIsNone(prepared(42))
+        self.assertEqual(42, prepared())
+        self.assertEqual(42, obj.int_property)
+
+    def test_service_property(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "string_property")
+        prepared("foo")
+        self.assertEqual("foo", prepared())
+        self.assertEqual("foo", self.conn.test_service.string_property)
+
+    def test_error(self) -> None:
+        prepared = self.conn.prepare(self.conn.test_service, "throw_argument_exception")
+        self.assertRaises(ValueError, prepared)
+
+    def test_same_request(self) -> None:
+        # The request is framed by hand, but is the one the call would otherwise make
+        obj = self.conn.test_service.create_test_object("jeb")
+        prepared = self.conn.prepare(obj, "float_to_string")
+        data = prepared._call.encode((3.14159,), {})  # type: ignore[union-attr]
+        size, prefix_length = Decoder.decode_size_prefix(data)
+        self.assertEqual(len(data), prefix_length + size)
+        request = KRPC.Request()
+        request.calls.append(self.conn.get_call(obj.float_to_string, 3.14159))
+        self.assertEqual(request, KRPC.Request.FromString(data[prefix_length:]))
+
+    def test_not_a_remote_member(self) -> None:
+        obj = self.conn.test_service.create_test_object("jeb")
+        self.assertRaises(RPCError, self.conn.prepare, obj, "foo")
+        self.assertRaises(RPCError, self.conn.prepare, obj, "__eq__")
+
+
+class TestPreparedCall(ServerTestCase, PreparedCallTest):
+    __test__ = True
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super(TestPreparedCall, cls).setUpClass()
+
+
+class TestPreparedCallPipelined(PreparedCallTest):
+    """Prepared calls sent without waiting for the response to the one before"""
+
+    __test__ = True
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.conn = ServerTestCase.connect(pipeline_window=8)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from typing import Dict
+from krpc.client import ClientBase
+import krpc.schema.KRPC_pb2 as KRPC
+
+
+class FakeClient(ClientBase):
+    """A client whose calls are built but never made"""
+
+    def _invoke(self, *args: object, **kwargs: object) -> object:
+        raise NotImplementedError
+
+
+def service(name: str, service_id: int, procedure_ids: Dict[str, int]) -> KRPC.Service:
+    """A service with procedures taking no arguments, with the given ids"""
+    message = KRPC.Service(name=name, id=service_id)
+    for procedure_name, procedure_id in procedure_ids.items():
+        message.procedures.add(name=procedure_name, id=procedure_id)
+    return message
+
+
+class TestProcedureIds(unittest.TestCase):
+    """Calls name their service and procedure by the ids the server reports for them,
+    and by name where it reports none"""
+
+    def build_call(self, *services: KRPC.Service) -> KRPC.ProcedureCall:
+        client = FakeClient()
+        client._load_services(services, False)
+        return client._build_call("TestService", "Foo", [], [], None)
+
+    def test_ids(self) -> None:
+        call = self.build_call(service("TestService", 7, {"Foo": 3, "Bar": 4}))
+        self.assertEqual(7, call.service_id)
+        self.assertEqual(3, call.procedure_id)
+        self.assertEqual("", call.service)
+        self.assertEqual("", call.procedure)
+
+    def test_server_without_ids(self) -> None:
+        call = self.build_call(service("TestService", 0, {"Foo": 0}))
+        self.assertEqual("TestService", call.service)
+        self.assertEqual("Foo", call.procedure)
+        self.assertEqual(0, call.service_id)
+        self.assertEqual(0, call.procedure_id)
+
+    def test_procedure_without_id(self) -> None:
+        call = self.build_call(service("TestService", 7, {"Foo": 0, "Bar": 4}))
+        self.assertEqual("TestService", call.service)
+        self.assertEqual("Foo", call.procedure)
+
+    def test_unknown_procedure(self) -> None:
+        call = self.build_call(service("TestService", 7, {"Bar": 4}))
+        self.assertEqual("TestService", call.service)
+        self.assertEqual("Foo", call.procedure)
+
+    def test_service_name(self) -> None:
+        client = FakeClient()
+        client._load_services([service("TestService", 7, {"Foo": 3})], False)
+        call = client._build_call("TestService", "Foo", [], [], None)
+        self.assertEqual("TestService", client._service_name(call))
+        call = client._build_call("KRPC", "GetStatus", [], [], None)
+        self.assertEqual("KRPC", client._service_name(call))
+
+
+if __name__ == "__main__":
+    unittest.main()
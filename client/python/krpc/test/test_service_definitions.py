@@ -1,12 +1,18 @@
+import sys
 import unittest
 import warnings
+from importlib.machinery import ModuleSpec
 from inspect import signature
-from typing import Dict, List, NamedTuple
-from krpc.client import _stub_definitions
+from types import ModuleType
+from unittest import mock
+from typing import Dict, List, NamedTuple, Tuple
+import krpc.service
+import krpc.services
+from krpc.client import ClientBase, _stub_definitions
 from krpc.definitions import register_all
 from krpc.encoder import Encoder
 from krpc.service import create_service, service_definitions
-from krpc.types import Types
+from krpc.types import ClassBase, Types
 import krpc.schema.KRPC_pb2 as KRPC
 
 
@@ -101,6 +107,65 @@ def struct_using_service(
     return service
 
 
+def arithmetic_service(name: str) -> KRPC.Service:
+    """A service with two procedures of the same shape, each taking a parameter named like
+    those that the functions invoking them are built with, and one with a default value
+    """
+    types = Types()
+    service = KRPC.Service()
+    service.name = name
+    for procedure_name in ("Add", "Subtract"):
+        procedure = service.procedures.add()
+        procedure.name = procedure_name
+        for parameter_name in ("Invoke", "ReturnType"):
+            parameter = procedure.parameters.add()
+            parameter.name = parameter_name
+            parameter.type.CopyFrom(types.sint32_type.protobuf_type)
+        parameter.has_default_value = True
+        parameter.default_value = Encoder.encode(2, types.sint32_type)
+        procedure.return_type.CopyFrom(types.sint32_type.protobuf_type)
+    return service
+
+
+def documented_service(name: str) -> KRPC.Service:
+    """A service documenting itself and each of its members"""
+    types = Types()
+    service = KRPC.Service()
+    service.name = name
+    service.documentation = "<doc><summary>A service.</summary></doc>"
+    cls = service.classes.add()
+    cls.name = "Thing"
+    cls.documentation = "<doc><summary>A class.</summary></doc>"
+    enumeration = service.enumerations.add()
+    enumeration.name = "Mode"
+    enumeration.documentation = "<doc><summary>An enumeration.</summary></doc>"
+    value = enumeration.values.add()
+    value.name = "Fast"
+    value.value = 1
+    value.documentation = "<doc><summary>A value.</summary></doc>"
+    procedure = service.procedures.add()
+    procedure.name = "Frob"
+    procedure.documentation = (
+        '<doc><summary>A procedure.</summary><param name="thing">A thing.</param></doc>'
+    )
+    parameter = procedure.parameters.add()
+    parameter.name = "thing"
+    parameter.type.CopyFrom(types.class_type(name, "Thing").protobuf_type)
+    getter = service.procedures.add()
+    getter.name = "get_Speed"
+    getter.documentation = "<doc><summary>A property.</summary></doc>"
+    getter.deprecated = True
+    getter.deprecated_reason = 'Use <see cref="M:%s.Frob" /> instead.' % name
+    getter.return_type.CopyFrom(types.float_type.protobuf_type)
+    method = service.procedures.add()
+    method.name = "Thing_Wibble"
+    method.documentation = "<doc><summary>A method.</summary></doc>"
+    parameter = method.parameters.add()
+    parameter.name = "this"
+    parameter.type.CopyFrom(types.class_type(name, "Thing").protobuf_type)
+    return service
+
+
 def unknown_type() -> KRPC.Type:
     typ = KRPC.Type()
     typ.code = UNKNOWN_TYPE_CODE
@@ -213,6 +278,72 @@ class TestServiceDefinitions(unittest.TestCase):
         self.assertEqual(["value"], struct_type.field_names)
         self.assertIsNot(Thing, struct_type.python_type)
 
+    def test_procedures_invoke_the_client(self) -> None:
+        invocations: List[Tuple[object, ...]] = []
+
+        class RecordingClient(FakeClient):  # pylint: disable=abstract-method
+            def _invoke(self, *args: object, **kwargs: object) -> object:
+                invocations.append(args)
+                return 42
+
+        client = RecordingClient()
+        service = arithmetic_service("ServiceA")
+        register_all(client._types, service_definitions(service))
+        created = create_service(client, service)  # type: ignore[arg-type]
+        self.assertEqual(42, created.add(1, 3))  # type: ignore[attr-defined]
+        self.assertEqual(42, created.subtract(return_type=3, invoke=1))  # type: ignore[attr-defined]
+        self.assertEqual(42, created.add(1))  # type: ignore[attr-defined]
+        sint32_type = client._types.sint32_type
+        self.assertEqual(
+            [
+                ("ServiceA", "Add", [1, 3], [sint32_type, sint32_type], sint32_type),
+                (
+                    "ServiceA",
+                    "Subtract",
+                    [1, 3],
+                    [sint32_type, sint32_type],
+                    sint32_type,
+                ),
+            ],
+            invocations[:2],
+        )
+        self.assertEqual("2", str(invocations[2][2][1]))
+        parameters = signature(created.add).parameters  # type: ignore[attr-defined]
+        self.assertEqual(["invoke", "return_type"], list(parameters))
+        self.assertEqual("2", str(parameters["return_type"].default))
+        # Functions of the same shape are built from the same code
+        self.assertIs(
+            created.add.__code__,  # type: ignore[attr-defined]
+            created.subtract.__code__,  # type: ignore[attr-defined]
+        )
+
+    def test_documentation_parsed_when_read(self) -> None:
+        with mock.patch(
+            "krpc.service._parse_documentation",
+            wraps=krpc.service._parse_documentation,
+        ) as parse:
+            client = self.create_services([documented_service("ServiceA")])
+            # Other than that of an enumeration, which pydoc reads without going through
+            # a descriptor
+            self.assertEqual(
+                [mock.call("<doc><summary>An enumeration.</summary></doc>")],
+                parse.call_args_list,
+            )
+            service = getattr(client, "ServiceA")
+            self.assertEqual("A service.", service.__doc__)
+            self.assertEqual(2, parse.call_count)
+        self.assertEqual("A class.", service.Thing.__doc__)
+        self.assertEqual("An enumeration.", service.Mode.__doc__)
+        self.assertEqual("A value.", service.Mode.fast.__doc__)
+        self.assertEqual(
+            "A procedure.\n\nArgs:\n    thing: A thing.", service.frob.__doc__
+        )
+        self.assertEqual(
+            "Deprecated. Use frob instead.\n\nA property.",
+            type(service).speed.__doc__,
+        )
+        self.assertEqual("A method.", service.Thing.wibble.__doc__)
+
     def test_defined_by_no_service(self) -> None:
         with self.assertRaises(RuntimeError) as cm:
             self.create_services([default_service("ServiceA", "ServiceB")])
@@ -220,5 +351,83 @@ class TestServiceDefinitions(unittest.TestCase):
         self.assertIn("ServiceB.Mode", str(cm.exception))
 
 
+class GeneratedStub:
+    """The stub generated for a service, with the types it defines left for each test"""
+
+    _classes: Dict[str, type] = {}
+    _enumerations: Dict[str, type] = {}
+    _structs: Dict[str, type] = {}
+
+    def __init__(self, client: object) -> None:
+        self._client = client
+
+
+class LoadingClient(ClientBase):
+    """A client that loads the services it is given, without a connection to a server"""
+
+    def _invoke(self, *args: object, **kwargs: object) -> object:
+        raise NotImplementedError
+
+
+class TestStubs(unittest.TestCase):
+    """The stubs of a service are imported, and its types registered from them, when they
+    are first used rather than when the client connects"""
+
+    def setUp(self) -> None:
+        class Thing(ClassBase):
+            pass
+
+        class TestService(GeneratedStub):
+            _classes = {"Thing": Thing}
+
+        module = ModuleType("krpc.services.testservice")
+        module.__spec__ = ModuleSpec(module.__name__, None)
+        setattr(module, "TestService", TestService)
+        self.stub_class = TestService
+        self.thing = Thing
+        for patcher in (
+            mock.patch.dict(sys.modules, {module.__name__: module}),
+            mock.patch.dict(krpc.services.__dict__),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def service() -> KRPC.Service:
+        service = KRPC.Service()
+        service.name = "TestService"
+        cls = service.classes.add()
+        cls.name = "Thing"
+        return service
+
+    def test_loaded_when_used(self) -> None:
+        client = LoadingClient()
+        client._load_services([self.service()], True)
+        self.assertNotIn("TestService", krpc.services.__dict__)
+        self.assertNotIn("test_service", client.__dict__)
+        class_type = client._types.class_type("TestService", "Thing")
+        self.assertIs(self.thing, class_type.python_type)
+        self.assertIs(self.stub_class, getattr(krpc.services, "TestService"))
+        self.assertIsInstance(client.test_service, self.stub_class)
+
+    def test_referred_to_by_a_service_without_stubs(self) -> None:
+        client = LoadingClient()
+        user = struct_using_service("ServiceA", "TestService")
+        thing = self.service()
+        struct = thing.structs.add()
+        struct.name = "Thing"
+        thing.ClearField("classes")
+        client._load_services([user, thing], True)
+        self.assertFalse(client._types.struct_type("TestService", "Thing").has_fields)
+
+    def test_not_used(self) -> None:
+        client = LoadingClient()
+        client._load_services([self.service()], False)
+        self.assertNotIn("TestService", krpc.services.__dict__)
+        self.assertIsNot(
+            self.thing, client._types.class_type("TestService", "Thing").python_type
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
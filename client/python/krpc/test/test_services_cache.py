@@ -0,0 +1,99 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+import krpc.client
+from krpc.test.servertestcase import ServerTestCase
+
+
+class TestServicesCache(ServerTestCase, unittest.TestCase):
+    """The definitions of the services a server provides, cached on disk by the clients
+    that connect to it"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super(TestServicesCache, cls).setUpClass()
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, "services")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect_cached(self) -> krpc.client.Client:
+        return ServerTestCase.connect(
+            name="python_client_test_services_cache",
+            services_cache_dir=self.cache_dir,
+        )
+
+    def cached(self) -> str:
+        (name,) = os.listdir(self.cache_dir)
+        return os.path.join(self.cache_dir, name)
+
+    def test_cached(self) -> None:
+        conn = self.connect_cached()
+        try:
+            status = conn.krpc.get_status()
+            self.assertEqual(
+                "%s-%s.services" % (status.version, status.services_hash),
+                os.path.basename(self.cached()),
+            )
+            with open(self.cached(), "rb") as cache_file:
+                data = cache_file.read()
+            self.assertEqual(status.services_hash, hashlib.sha256(data).hexdigest())
+        finally:
+            conn.close()
+
+    def test_read_from_cache(self) -> None:
+        self.connect_cached().close()
+        with mock.patch(
+            "krpc.client._write_services_cache",
+            wraps=krpc.client._write_services_cache,
+        ) as write:
+            conn = self.connect_cached()
+        try:
+            write.assert_not_called()
+            self.assertEqual("3.14159", conn.test_service.float_to_string(3.14159))
+        finally:
+            conn.close()
+
+    def test_stale_cache(self) -> None:
+        # A file that does not hold the services the server reports is replaced
+        self.connect_cached().close()
+        path = self.cached()
+        with open(path, "wb") as cache_file:
+            cache_file.write(b"\x0a\x00")
+        conn = self.connect_cached()
+        try:
+            self.assertEqual("3.14159", conn.test_service.float_to_string(3.14159))
+            with open(path, "rb") as cache_file:
+                data = cache_file.read()
+            self.assertEqual(
+                conn.krpc.get_status().services_hash, hashlib.sha256(data).hexdigest()
+            )
+        finally:
+            conn.close()
+
+    def test_cache_not_writable(self) -> None:
+        # A directory that cannot be created leaves the client working without a cache
+        with open(self.cache_dir, "wb"):
+            pass
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            conn = self.connect_cached()
+        try:
+            self.assertTrue(
+                any("Could not cache" in str(w.message) for w in caught),
+                "expected a warning that the services could not be cached",
+            )
+            self.assertEqual("3.14159", conn.test_service.float_to_string(3.14159))
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
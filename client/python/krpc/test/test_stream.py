@@ -1,11 +1,16 @@
 import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 import time
+from typing import Callable, List, Tuple
 import unittest
 
-import krpc.schema.KRPC_pb2 as KRPC
-from krpc.error import StreamError
+import krpc
+from krpc.error import RPCError, StreamError
 from krpc import streammanager
+from krpc.encoder import Encoder
 from krpc.streammanager import StreamManager
+import krpc.schema.KRPC_pb2 as KRPC
 from krpc.test.servertestcase import ServerTestCase
 
 
@@ -88,6 +93,44 @@ class TestStream(ServerTestCase, unittest.TestCase):
                         self.fail("Timed out waiting for stream to update")
                     i += 1
 
+    def test_update_interval(self) -> None:
+        # Each update carries the latest value of the counter, however many times it was
+        # evaluated since the last, and updates arrive no closer together than asked for
+        conn = self.connect(stream_update_interval=0.1)
+        try:
+            updates = []
+            with conn.stream(
+                conn.test_service.counter, "TestStream.test_update_interval"
+            ) as x:
+                x.add_callback(
+                    lambda value: updates.append((time.perf_counter(), value))
+                )
+                x.start()
+                time.sleep(1)
+            self.assertGreater(len(updates), 1)
+            for (earlier, first), (later, second) in zip(updates, updates[1:]):
+                self.assertLess(first, second)
+                self.assertGreater(later - earlier, 0.05)
+        finally:
+            conn.close()
+
+    def test_history(self) -> None:
+        with self.conn.stream(
+            self.conn.test_service.counter, "TestStream.test_history"
+        ) as x:
+            self.assertRaises(StreamError, x.history)
+            x.keep_history(3)
+            for _ in range(5):
+                count = x()
+                while count == x():
+                    self.wait()
+            times, values = x.history()
+            self.assertEqual(3, len(times))
+            self.assertEqual(array("i", sorted(values)), values)
+            self.assertEqual(array("d", sorted(times)), times)
+            self.assertEqual(values[-1], x())
+            self.assertEqual(values[-2:], x.history(2)[1])
+
     def test_struct_counter(self) -> None:
         service = self.conn.test_service
         with self.conn.stream(
@@ -213,6 +256,90 @@ class TestStream(ServerTestCase, unittest.TestCase):
         self.assertEqual("42", s1())
         self.assertEqual("43", s2())
 
+    def test_add_streams(self) -> None:
+        service = self.conn.test_service
+        requests = []
+        send_encoded = self.conn._send_encoded
+
+        def counted(*args: object) -> object:
+            requests.append(args)
+            return send_encoded(*args)  # type: ignore[arg-type]
+
+        self.conn._send_encoded = counted  # type: ignore[method-assign]
+        try:
+            streams = self.conn.add_streams(
+                [
+                    (service.int32_to_string, 42),
+                    (service.float_to_string, 0.5),
+                    (getattr, service, "string_property"),
+                ]
+            )
+        finally:
+            del self.conn._send_encoded
+        try:
+            # Added and started in a single request, and each has its first value
+            self.assertEqual(1, len(requests))
+            self.assertEqual(
+                ["42", "0.5", service.string_property], [x() for x in streams]
+            )
+            self.assertTrue(all(x._stream.started for x in streams))
+        finally:
+            for x in streams:
+                x.remove()
+
+    def test_add_streams_with_rate(self) -> None:
+        service = self.conn.test_service
+        streams = self.conn.add_streams(
+            [(service.counter, "TestStream.test_add_streams_with_rate")], rate=5
+        )
+        try:
+            self.assertEqual(5, streams[0].rate)
+            self.assertGreaterEqual(streams[0](), 0)
+        finally:
+            streams[0].remove()
+        streams = self.conn.add_streams([(service.int32_to_string, 1)], start=False)
+        try:
+            self.assertFalse(streams[0]._stream.started)
+            self.assertEqual("1", streams[0]())
+        finally:
+            streams[0].remove()
+        self.assertRaises(
+            StreamError,
+            self.conn.add_streams,
+            [(setattr, service, "string_property", "foo")],
+        )
+
+    def test_add_streams_failure_keeps_existing_streams(self) -> None:
+        service = self.conn.test_service
+        stream = self.conn.add_stream(service.int32_to_string, 7)
+        try:
+            manager = self.conn._stream_manager
+            before = set(manager._streams)
+            return_type = self.conn._get_return_type(service.int32_to_string, 7)
+            missing = KRPC.ProcedureCall(service="TestService", procedure="Missing")
+            self.assertRaises(
+                RPCError,
+                manager.add_streams,
+                [
+                    (return_type, self.conn.get_call(service.int32_to_string, 7)),
+                    (return_type, self.conn.get_call(service.int32_to_string, 8)),
+                    (return_type, self.conn.get_call(service.int32_to_string, 8)),
+                    (return_type, missing),
+                ],
+                None,
+                True,
+            )
+            # The stream that was already held is still registered, and still on the
+            # server, and the one the batch added is gone again
+            self.assertEqual(before, set(manager._streams))
+            call = self.conn.get_call(service.int32_to_string, 7)
+            self.assertEqual(
+                stream._stream.stream_id, self.conn.krpc.add_stream(call, False).id
+            )
+            self.assertEqual("7", stream())
+        finally:
+            stream.remove()
+
     def test_remove_then_add_stream(self) -> None:
         stream = self.conn.add_stream(self.conn.test_service.int32_to_string, 0)
         self.assertEqual("0", stream())
@@ -451,17 +578,131 @@ class TestStream(ServerTestCase, unittest.TestCase):
                 del manager._streams[1]
                 return "a stale value"
 
-        result = KRPC.StreamResult(id=1)
-        result.result.value = b"whatever"
         decoder = streammanager.Decoder
         streammanager.Decoder = RemovingDecoder  # type: ignore[misc]
         try:
-            manager.update([result])
+            manager.update([(1, (None, b"whatever", False))])
         finally:
             streammanager.Decoder = decoder  # type: ignore[misc]
 
         self.assertIsInstance(stream.value, StreamError)
 
+    def test_lazy_values(self) -> None:
+        self.conn.lazy_stream_values = True
+        try:
+            with self.conn.stream(self.conn.test_service.float_to_string, 3.14159) as x:
+                for _ in range(5):
+                    self.assertEqual("3.14159", x())
+                    self.wait()
+        finally:
+            self.conn.lazy_stream_values = False
+
+    def test_lazy_values_decoded_when_read(self) -> None:
+        # A value is decoded the first time it is read and not again, and one that is
+        # replaced before it is read is never decoded. A stream with callbacks has its
+        # values decoded when they arrive, as the callbacks are called with them.
+        manager = StreamManager(None)
+        manager.decode_when_read = True
+        read = manager.get_stream(self.conn._types.string_type, 1)
+        called = manager.get_stream(self.conn._types.string_type, 2)
+        values = []
+        called.add_callback(values.append)
+        decoded = []
+
+        class RecordingDecoder:
+            # pylint: disable=unused-argument
+            @staticmethod
+            def decode(client: object, data: bytes, typ: object) -> str:
+                decoded.append(data)
+                return data.decode()
+
+        decoder = streammanager.Decoder
+        streammanager.Decoder = RecordingDecoder  # type: ignore[misc]
+        try:
+            manager.update([(1, (None, b"first", False)), (2, (None, b"a", False))])
+            manager.update([(1, (None, b"second", False)), (2, (None, b"b", False))])
+            self.assertEqual(["a", "b"], values)
+            self.assertEqual([b"a", b"b"], decoded)
+            self.assertEqual("second", read.value)
+            self.assertEqual("second", read.value)
+            self.assertEqual([b"a", b"b", b"second"], decoded)
+        finally:
+            streammanager.Decoder = decoder  # type: ignore[misc]
+
+    def test_snapshot(self) -> None:
+        service = self.conn.test_service
+        with self.conn.stream(service.float_to_string, 0.123) as x0, self.conn.stream(
+            service.counter, "TestStream.test_snapshot"
+        ) as x1:
+            frame, values = self.conn.snapshot([x0, x1])
+            self.assertEqual("0.123", values[0])
+            self.assertLessEqual(frame, self.conn.stream_frame)
+            # The counter changes every time it is evaluated, so there is always a later
+            # update with a higher count
+            later = self.conn.wait_for_frame(frame, timeout=10)
+            self.assertGreater(later, frame)
+            self.assertLess(values[1], self.conn.snapshot([x1])[1][0])
+
+    def test_snapshot_from_one_update(self) -> None:
+        # Values read while updates are being stored all come from the same update
+        typ = self.conn._types.sint32_type
+        manager = StreamManager(None)
+        streams = [manager.get_stream(typ, stream_id) for stream_id in range(1, 11)]
+        self.assertEqual(0, manager.wait_for_frame(timeout=0.01))
+        done = threading.Event()
+
+        def write() -> None:
+            for i in range(1000):
+                data = Encoder.encode(i, typ)
+                manager.update([(s, (None, data, False)) for s in range(1, 11)])
+            done.set()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        last = 0
+        while not done.is_set():
+            if streams[0].updated:
+                frame, values = manager.snapshot(streams)
+                self.assertEqual([values[0]] * 10, values)
+                self.assertEqual(frame - 1, values[0])
+                self.assertLessEqual(last, frame)
+                last = frame
+        thread.join()
+        self.assertEqual(1000, manager.frame)
+        self.assertEqual((1000, [999] * 10), manager.snapshot(streams))
+
+    def test_wait_any(self) -> None:
+        counter = self.conn.add_stream(
+            self.conn.test_service.counter, "TestStream.test_wait_any"
+        )
+        other = self.conn.add_stream(self.conn.test_service.int32_to_string, 42)
+        self.assertEqual("42", other())
+        counter()
+        self.assertIs(counter, krpc.wait_any([other, counter]))
+        self.assertEqual([counter], krpc.wait_all([other, counter], timeout=0.1))
+
+    def test_wait_any_removed_stream(self) -> None:
+        x = self.conn.add_stream(self.conn.test_service.int32_to_string, 42)
+        x.remove()
+        self.assertRaises(StreamError, krpc.wait_any, [x])
+
+    def test_waits_fail_once_updates_stop(self) -> None:
+        typ = self.conn._types.sint32_type
+        manager = StreamManager(None)
+        stream = manager.get_stream(typ, 1)
+        error = ValueError("Truncated message")
+        thread = threading.Timer(0.1, manager.notify_closed, (error,))
+        thread.start()
+        with self.assertRaises(StreamError) as context:
+            manager.wait(lambda: stream.updated)
+        thread.join()
+        self.assertIs(error, context.exception.__cause__)
+        self.assertRaises(StreamError, manager.wait_for_values, [stream])
+        self.assertRaises(StreamError, manager.wait_for_frame)
+        # A wait for something that has already happened succeeds
+        manager.update([(1, (None, Encoder.encode(1, typ), False))])
+        manager.wait_for_values([stream])
+
     def test_remove_while_holding_condition(self) -> None:
         # The update thread must not hold the update lock while waiting for a stream's
         # condition. A caller holding that condition - which is how waiting for an update
@@ -517,6 +758,113 @@ class TestStream(ServerTestCase, unittest.TestCase):
         # Updates kept arriving, and the callback added after the one that raised ran
         self.assertTrue(stop.is_set())
 
+    def test_callback_executor(self) -> None:
+        # A slow callback run by an executor does not hold up the updates of other streams
+        service = self.conn.test_service
+        slow_called = threading.Event()
+        release = threading.Event()
+        stop = threading.Event()
+
+        def slow_callback(x: str) -> None:  # pylint: disable=unused-argument
+            slow_called.set()
+            release.wait(10)
+
+        def callback(x: int) -> None:
+            if x > 5:
+                stop.set()
+
+        self.assertIsNone(self.conn.stream_callback_executor)
+        with ThreadPoolExecutor() as executor:
+            self.conn.stream_callback_executor = executor.submit
+            try:
+                with self.conn.stream(
+                    service.float_to_string, 0.5
+                ) as x0, self.conn.stream(
+                    service.counter, "TestStream.test_callback_executor"
+                ) as x1:
+                    x0.add_callback(slow_callback)
+                    x0.start()
+                    self.assertTrue(slow_called.wait(10))
+                    x1.add_callback(callback)
+                    x1.start()
+                    self.assertTrue(stop.wait(10))
+            finally:
+                release.set()
+                self.conn.stream_callback_executor = None
+
+    def manager_with_executor(
+        self, coalesce: bool
+    ) -> Tuple[StreamManager, List[Callable[[], None]]]:
+        pending: List[Callable[[], None]] = []
+        manager = StreamManager(None)
+        manager.callback_executor = pending.append
+        manager.coalesce_callbacks = coalesce
+        return manager, pending
+
+    def test_callbacks_run_by_executor(self) -> None:
+        typ = self.conn._types.sint32_type
+        manager, pending = self.manager_with_executor(False)
+        stream = manager.get_stream(typ, 1)
+        values: List[int] = []
+        updates: List[None] = []
+        stream.add_callback(values.append)
+        manager.add_update_callback(lambda: updates.append(None))
+        for i in range(3):
+            manager.update([(1, (None, Encoder.encode(i, typ), False))])
+        # Nothing has run on the thread that applied the updates
+        self.assertEqual(([], []), (values, updates))
+        for fn in pending:
+            fn()
+        self.assertEqual(([0, 1, 2], [None] * 3), (values, updates))
+
+    def test_coalesced_callbacks(self) -> None:
+        typ = self.conn._types.sint32_type
+        manager, pending = self.manager_with_executor(True)
+        stream = manager.get_stream(typ, 1)
+        values: List[int] = []
+
+        def callback(x: int) -> None:
+            values.append(x)
+            if x == 2:
+                # A value that arrives while the callback is running is passed to it
+                # once it returns, rather than running it again alongside itself
+                manager.update([(1, (None, Encoder.encode(3, typ), False))])
+
+        stream.add_callback(callback)
+        for i in range(3):
+            manager.update([(1, (None, Encoder.encode(i, typ), False))])
+        # The callback was handed to the executor once, and runs with the latest value
+        self.assertEqual(1, len(pending))
+        pending.pop()()
+        self.assertEqual([2, 3], values)
+        self.assertEqual([], pending)
+        manager.update([(1, (None, Encoder.encode(4, typ), False))])
+        pending.pop()()
+        self.assertEqual([2, 3, 4], values)
+
+    def test_executor_that_refuses_callbacks(self) -> None:
+        typ = self.conn._types.sint32_type
+        manager = StreamManager(None)
+        stream = manager.get_stream(typ, 1)
+        stream.add_callback(lambda x: None)
+
+        def shut_down(fn: Callable[[], None]) -> None:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+        manager.callback_executor = shut_down
+        reported = []
+        excepthook = threading.excepthook
+        threading.excepthook = reported.append
+        try:
+            for coalesce in (False, True):
+                manager.coalesce_callbacks = coalesce
+                manager.update([(1, (None, Encoder.encode(1, typ), False))])
+        finally:
+            threading.excepthook = excepthook
+        # Reported rather than raised, and the value was stored regardless
+        self.assertEqual(2, len(reported))
+        self.assertEqual(1, stream.value)
+
     def test_remove_callback(self) -> None:
         called1 = threading.Event()
         called2 = threading.Event()
@@ -0,0 +1,100 @@
+import socket
+import threading
+import unittest
+from typing import Iterable, List, Optional
+import krpc.schema.KRPC_pb2 as KRPC
+from krpc.connection import Connection
+from krpc.encoder import Encoder
+from krpc.envelope import StreamResult
+from krpc.streammanager import update_thread
+
+
+def stream_update(*stream_ids: int) -> bytes:
+    message = KRPC.StreamUpdate()
+    for stream_id in stream_ids:
+        message.results.add(id=stream_id).result.value = b"\x01"
+    return Encoder.encode_message_with_size(message)
+
+
+class RecordingManager:
+    """Stands in for a client's stream manager, recording the ids of the streams in each
+    update it is given"""
+
+    def __init__(self) -> None:
+        self.updates: List[List[int]] = []
+        self.condition = threading.Condition()
+        self.closed: List[Optional[Exception]] = []
+
+    def update(self, results: Iterable[StreamResult]) -> None:
+        with self.condition:
+            self.updates.append([stream_id for stream_id, _ in results])
+            self.condition.notify_all()
+
+    def notify_closed(self, error: Optional[Exception] = None) -> None:
+        self.closed.append(error)
+
+    def wait_for_updates(self, count: int) -> List[List[int]]:
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.updates) >= count, timeout=10)
+            return self.updates
+
+
+class TestUpdateThread(unittest.TestCase):
+    """The thread that applies the updates a client receives over its stream connection"""
+
+    def setUp(self) -> None:
+        client_socket, self.server = socket.socketpair()
+        self.addCleanup(self.server.close)
+        self.connection = Connection("localhost", 0)
+        self.connection._socket = client_socket
+        self.manager = RecordingManager()
+        self.thread = threading.Thread(
+            target=update_thread,
+            args=(self.manager, self.connection),
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    def test_updates_applied_as_they_arrive(self) -> None:
+        self.server.sendall(stream_update(1, 2))
+        self.assertEqual([[1, 2]], self.manager.wait_for_updates(1))
+        # Updates that arrive together are applied one at a time, and one split over
+        # several reads once all of it has arrived
+        data = stream_update(3) + stream_update(4, 5)
+        self.server.sendall(data[:3])
+        self.server.sendall(data[3:])
+        self.assertEqual([[1, 2], [3], [4, 5]], self.manager.wait_for_updates(3))
+
+    def test_ends_when_shut_down(self) -> None:
+        self.server.sendall(stream_update(1))
+        self.manager.wait_for_updates(1)
+        self.connection.shutdown()
+        self.thread.join(timeout=10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(-1, self.connection._socket.fileno())
+
+    def test_ends_when_closed_by_the_server(self) -> None:
+        self.server.sendall(stream_update(1)[:2])
+        self.server.close()
+        self.thread.join(timeout=10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual([], self.manager.updates)
+        self.assertEqual([None], self.manager.closed)
+
+    def test_ends_on_malformed_update(self) -> None:
+        reported: List[threading.ExceptHookArgs] = []
+        excepthook = threading.excepthook
+        threading.excepthook = reported.append
+        self.addCleanup(setattr, threading, "excepthook", excepthook)
+        # An update whose first field claims more bytes than the message holds
+        self.server.sendall(b"\x02\x0a\x05")
+        self.thread.join(timeout=10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(1, len(reported))
+        self.assertEqual(1, len(self.manager.closed))
+        self.assertIsNotNone(self.manager.closed[0])
+        self.assertIs(reported[0].exc_value, self.manager.closed[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import collections
 import functools
+import threading
 import weakref
 from enum import Enum
 from typing import (
@@ -15,6 +16,7 @@ from typing import (
     Optional,
     Tuple,
     Type,
+    Union,
     cast,
 )
 
@@ -31,6 +33,35 @@ class UnknownTypeError(ValueError):
     """
 
 
+class LazyDoc:
+    """A docstring worked out the first time it is read, rather than when the type or member
+    it documents is created. Set as the __doc__ of a type, it is the docstring of the type
+    and of its instances."""
+
+    def __init__(self, parse: Callable[[], Optional[str]]) -> None:
+        self._parse: Optional[Callable[[], Optional[str]]] = parse
+        self._doc: Optional[str] = None
+
+    @property
+    def value(self) -> Optional[str]:
+        parse = self._parse
+        if parse is not None:
+            self._doc = parse()
+            self._parse = None
+        return self._doc
+
+    def __get__(self, obj: object, objtype: Optional[type] = None) -> Optional[str]:
+        return self.value
+
+
+# A docstring, or one to be worked out when it is first read
+Doc = Union[str, LazyDoc, None]
+
+
+def _doc_value(doc: Doc) -> Optional[str]:
+    return doc.value if isinstance(doc, LazyDoc) else doc
+
+
 VALUE_TYPES = {
     KRPC.Type.DOUBLE: float,
     KRPC.Type.FLOAT: float,
@@ -103,6 +134,12 @@ def _protobuf_type(
     return protobuf_type
 
 
+# The types a service defines, whose registration can be put off
+_DEFERRABLE_TYPE_CODES = frozenset(
+    [KRPC.Type.CLASS, KRPC.Type.ENUMERATION, KRPC.Type.STRUCT]
+)
+
+
 class Types:
     """A type store. Used to obtain type objects from protocol buffer type
     strings, and stores python types for services and service defined
@@ -122,6 +159,12 @@ class Types:
         # the hot path of every remote procedure call; a lookup here costs a tuple
         # hash instead of building and serializing a protobuf message.
         self._type_cache: dict[tuple[object, ...], TypeBase] = {}
+        # What registers the types of a service whose registration has been put off until
+        # one of them is first used, by the name of the service. Loading a service's types
+        # holds the lock, so that a thread that finds a type missing while another thread
+        # is still loading it waits for it, rather than making a type of its own.
+        self._deferred: dict[str, Callable[[], None]] = {}
+        self._deferred_lock = threading.RLock()
 
         # The value types are the same objects for the lifetime of the store, so
         # they are resolved once here rather than on every access
@@ -157,7 +200,13 @@ class Types:
         self._types[key] = typ
         self._type_cache[(KRPC.Type.ENUMERATION, service, name)] = typ
 
-    def as_type(self, protobuf_type: KRPC.Type, doc: str | None = None) -> TypeBase:
+    def defer(self, service: str, load: Callable[[], None]) -> None:
+        """Put off registering the class, enumeration and structure types of a service
+        until one of them is first used, when the given function is called to do it"""
+        with self._deferred_lock:
+            self._deferred[service] = load
+
+    def as_type(self, protobuf_type: KRPC.Type, doc: Doc = None) -> TypeBase:
         """Return a type object given a protocol buffer type"""
 
         # Get cached type
@@ -165,6 +214,14 @@ class Types:
         if key in self._types:
             return self._types[key]
 
+        if protobuf_type.code in _DEFERRABLE_TYPE_CODES:
+            with self._deferred_lock:
+                load = self._deferred.pop(protobuf_type.service, None)
+                if load is not None:
+                    load()
+            if key in self._types:
+                return self._types[key]
+
         typ: TypeBase
         if protobuf_type.code in VALUE_TYPES:
             typ = ValueType(protobuf_type)
@@ -194,9 +251,7 @@ class Types:
     def is_none_type(cls, protobuf_type: KRPC.Type) -> bool:
         return protobuf_type.code == KRPC.Type.NONE
 
-    def class_type(
-        self, service: str, name: str, doc: Optional[str] = None
-    ) -> ClassType:
+    def class_type(self, service: str, name: str, doc: Doc = None) -> ClassType:
         """Get a class type"""
         key = (KRPC.Type.CLASS, service, name)
         typ = self._type_cache.get(key)
@@ -206,7 +261,7 @@ class Types:
         return cast(ClassType, typ)
 
     def enumeration_type(
-        self, service: str, name: str, doc: Optional[str] = None
+        self, service: str, name: str, doc: Doc = None
     ) -> EnumerationType:
         """Get an enumeration type"""
         key = (KRPC.Type.ENUMERATION, service, name)
@@ -218,9 +273,7 @@ class Types:
             self._type_cache[key] = typ
         return cast(EnumerationType, typ)
 
-    def struct_type(
-        self, service: str, name: str, doc: Optional[str] = None
-    ) -> StructType:
+    def struct_type(self, service: str, name: str, doc: Doc = None) -> StructType:
         """Get a structure type"""
         key = (KRPC.Type.STRUCT, service, name)
         typ = self._type_cache.get(key)
@@ -230,7 +283,7 @@ class Types:
         return cast(StructType, typ)
 
     def exception_type(
-        self, service: str, name: str, doc: Optional[str] = None
+        self, service: str, name: str, doc: Doc = None
     ) -> Type[Exception]:
         """Get an exception type"""
         key = (service, name)
@@ -425,7 +478,7 @@ class ClassType(TypeBase):
     """A class type, represented by a uint64 identifier"""
 
     def __init__(
-        self, protobuf_type: KRPC.Type, doc: Optional[str], typ: Optional[type] = None
+        self, protobuf_type: KRPC.Type, doc: Doc, typ: Optional[type] = None
     ) -> None:
         if protobuf_type.code != KRPC.Type.CLASS:
             raise ValueError("Not a class type")
@@ -443,7 +496,7 @@ class EnumerationType(TypeBase):
     """An enumeration type, represented by an sint32 value"""
 
     def __init__(
-        self, protobuf_type: KRPC.Type, doc: Optional[str], typ: Optional[type] = None
+        self, protobuf_type: KRPC.Type, doc: Doc, typ: Optional[type] = None
     ) -> None:
         if protobuf_type.code != KRPC.Type.ENUMERATION:
             raise ValueError("Not an enum type")
@@ -476,7 +529,7 @@ class StructType(TypeBase):
     """A structure type, whose value is the values of its fields"""
 
     def __init__(
-        self, protobuf_type: KRPC.Type, doc: Optional[str], typ: Optional[type] = None
+        self, protobuf_type: KRPC.Type, doc: Doc, typ: Optional[type] = None
     ) -> None:
         if protobuf_type.code != KRPC.Type.STRUCT:
             raise ValueError("Not a struct type")
@@ -611,27 +664,36 @@ class DynamicType:
         cls,
         name: str,
         func: Callable,  # type: ignore[type-arg]
-        doc: Optional[str] = None,
-    ) -> object:
+        doc: Doc = None,
+    ) -> None:
         """Add a method"""
         func.__name__ = name
-        func.__doc__ = doc
-        setattr(cls, name, func)
-        return getattr(cls, name)
+        cls._add_member(name, func, func, doc)
 
     @classmethod
     def _add_class_method(
         cls,
         name: str,
         func: Callable,  # type: ignore[type-arg]
-        doc: Optional[str] = None,
-    ) -> object:
+        doc: Doc = None,
+    ) -> None:
         """Add a static method"""
         func.__name__ = name
-        func.__doc__ = doc
-        static_func = classmethod(func)
-        setattr(cls, name, static_func)
-        return getattr(cls, name)
+        cls._add_member(name, classmethod(func), func, doc)
+
+    @classmethod
+    def _add_member(
+        cls,
+        name: str,
+        member: object,
+        func: Callable,  # type: ignore[type-arg]
+        doc: Doc,
+    ) -> None:
+        if isinstance(doc, LazyDoc):
+            member = _DocumentedOnLookup(cls, name, member, func, doc)
+        else:
+            func.__doc__ = doc
+        setattr(cls, name, member)
 
     @classmethod
     def _add_property(
@@ -639,14 +701,64 @@ class DynamicType:
         name: str,
         getter: Optional[Callable] = None,  # type: ignore[type-arg]
         setter: Optional[Callable] = None,  # type: ignore[type-arg]
-        doc: Optional[str] = None,
-    ) -> object:
+        doc: Doc = None,
+    ) -> None:
         """Add a property"""
         if getter is None and setter is None:
             raise ValueError("Either getter or setter must be provided")
-        prop = property(getter, setter, doc=doc)
+        if isinstance(doc, LazyDoc):
+            prop: property = _LazyDocProperty(getter, setter, doc=doc)
+        else:
+            prop = property(getter, setter, doc=doc)
         setattr(cls, name, prop)
-        return getattr(cls, name)
+
+
+class _DocumentedOnLookup:
+    """Stands in for a method of a class until it is first looked up, when the function is
+    given its docstring and the method is put in its place. A function's docstring cannot
+    be worked out when it is read, so this is the latest it can be done."""
+
+    def __init__(
+        self,
+        cls: type,
+        name: str,
+        member: object,
+        func: Callable,  # type: ignore[type-arg]
+        doc: LazyDoc,
+    ) -> None:
+        self._cls = cls
+        self._name = name
+        self._member = member
+        self._func = func
+        self._doc = doc
+
+    def __get__(self, obj: object, objtype: Optional[type] = None) -> object:
+        self._func.__doc__ = self._doc.value
+        setattr(self._cls, self._name, self._member)
+        return self._member.__get__(obj, objtype)  # type: ignore[attr-defined]
+
+
+class _LazyDocProperty(property):
+    """A property whose docstring is worked out the first time it is read"""
+
+    def __init__(
+        self,
+        fget: Optional[Callable] = None,  # type: ignore[type-arg]
+        fset: Optional[Callable] = None,  # type: ignore[type-arg]
+        fdel: Optional[Callable] = None,  # type: ignore[type-arg]
+        doc: Doc = None,
+    ) -> None:
+        super().__init__(fget, fset, fdel)
+        self._doc = doc
+
+    @property
+    def __doc__(self) -> Optional[str]:
+        return _doc_value(self._doc)
+
+    @__doc__.setter
+    def __doc__(self, value: Optional[str]) -> None:
+        # Set by property.__init__ to the docstring of the getter, which has none
+        pass
 
 
 class ClassBase:
@@ -695,7 +807,7 @@ class DynamicClassBase(ClassBase, DynamicType):
         )  # type: ignore[attr-defined]
 
 
-def _create_class_type(service_name: str, class_name: str, doc: Optional[str]) -> type:
+def _create_class_type(service_name: str, class_name: str, doc: Doc) -> type:
     return type(
         str(class_name),
         (DynamicClassBase,),
@@ -703,29 +815,53 @@ def _create_class_type(service_name: str, class_name: str, doc: Optional[str]) -
     )
 
 
+class _EnumerationDoc(str):
+    """The docstring of an enumeration. Set as its __doc__, it is also what the docstring of
+    each of its values is read through, and those are worked out the first time they are
+    read. The docstring of the enumeration itself is a string from the start, as pydoc reads
+    it from the class without going through a descriptor."""
+
+    _doc: Optional[str]
+    _values: Mapping[str, Doc]
+
+    def __new__(cls, doc: Optional[str], values: Mapping[str, Doc]) -> _EnumerationDoc:
+        self = super().__new__(cls, doc or "")
+        self._doc = doc
+        self._values = values
+        return self
+
+    def __get__(self, obj: object, objtype: Optional[type] = None) -> Optional[str]:
+        if obj is None:
+            return self._doc
+        return _doc_value(self._values.get(obj.name))  # type: ignore[attr-defined]
+
+
 def _create_enum_type(
-    enum_name: str, values: Mapping[str, Mapping[str, object]], doc: Optional[str]
+    enum_name: str, values: Mapping[str, Mapping[str, object]], doc: Doc
 ) -> Enum:
     typ = Enum(
         enum_name,
         dict((name, x["value"]) for name, x in values.items()),  # type: ignore[misc]
     )
-    setattr(typ, "__doc__", doc)
-    for name in values.keys():
-        setattr(getattr(typ, name), "__doc__", values[name]["doc"])
+    setattr(
+        typ,
+        "__doc__",
+        _EnumerationDoc(
+            _doc_value(doc),
+            dict((name, cast(Doc, x["doc"])) for name, x in values.items()),
+        ),
+    )
     return typ  # type: ignore[return-value]
 
 
-def _create_struct_type(
-    struct_name: str, field_names: List[str], doc: Optional[str]
-) -> type:
+def _create_struct_type(struct_name: str, field_names: List[str], doc: Doc) -> type:
     typ = collections.namedtuple(struct_name, field_names)  # type: ignore[misc]
     setattr(typ, "__doc__", doc)
     return typ
 
 
 def _create_exception_type(
-    service_name: str, class_name: str, doc: Optional[str]
+    service_name: str, class_name: str, doc: Doc
 ) -> Type[Exception]:
     if service_name == "KRPC" and class_name in EXCEPTION_TYPES:
         return EXCEPTION_TYPES[class_name]
@@ -0,0 +1,98 @@
+"""Waiting for any or all of several events and streams at once.
+
+Every update the client receives notifies the one condition variable its stream manager
+holds, so a single thread waits on that condition and checks the whole set after each
+update, rather than a thread waiting on the condition of each event or stream in turn.
+"""
+
+from __future__ import annotations
+from typing import Iterable, List, Optional, Sequence, Union
+from krpc.event import Event
+from krpc.stream import Stream
+from krpc.streammanager import StreamImpl
+
+Waitable = Union[Event, Stream]
+
+
+def wait_any(
+    items: Iterable[Waitable], timeout: Optional[float] = None
+) -> Optional[Waitable]:
+    """Block until any of the events is triggered or any of the streams is updated, or
+    a timeout occurs. Returns the first of them that was, in the order given, or None if
+    none was.
+
+    An event is waited on in the same way as by :meth:`krpc.event.Event.wait`, so one
+    that has already been triggered is waited on until it is triggered again. A stream
+    is waited on until it receives a new value."""
+    fired = _wait(list(items), 1, timeout)
+    return fired[0] if fired else None
+
+
+def wait_all(
+    items: Iterable[Waitable], timeout: Optional[float] = None
+) -> List[Waitable]:
+    """Block until all of the events have been triggered and the streams have been
+    updated, or a timeout occurs. Returns those that were, in the order given, which is
+    all of them unless the timeout occurred first."""
+    items = list(items)
+    return _wait(items, len(items), timeout)
+
+
+def _wait(
+    items: Sequence[Waitable], count: int, timeout: Optional[float]
+) -> List[Waitable]:
+    if not items:
+        return []
+    streams = [_stream(item) for item in items]
+    manager = streams[0]._client._stream_manager
+    if any(stream._client._stream_manager is not manager for stream in streams):
+        raise ValueError("The events and streams must all belong to the same client")
+
+    for stream in streams:
+        _check(stream)
+    after = manager.frame
+    for item, stream in zip(items, streams):
+        if isinstance(item, Event):
+            if not stream.started:
+                item.start()
+            stream.value = False
+        elif not stream.started:
+            stream.start()
+
+    pairs = list(zip(items, streams))
+    fired: List[Waitable] = []
+
+    def ready() -> bool:
+        fired[:] = [item for item, stream in pairs if _fired(item, stream, after)]
+        return len(fired) >= count
+
+    manager.wait(ready, timeout)
+    return fired
+
+
+def _stream(item: Waitable) -> StreamImpl:
+    if isinstance(item, Event):
+        return item.stream._stream
+    if isinstance(item, Stream):
+        return item._stream
+    raise TypeError(
+        "Can only wait for events and streams, not %s" % type(item).__name__
+    )
+
+
+def _fired(item: Waitable, stream: StreamImpl, after: int) -> bool:
+    """Whether an event has been triggered, or a stream updated since the given frame.
+    An event that has been triggered counts even if it has been reset since, so one that
+    fires between two checks, or before the others in a wait for all of them, is not
+    missed. Raises the error the stream holds instead of its value, if it does."""
+    _check(stream)
+    if isinstance(item, Event):
+        return stream.triggered > after
+    return stream.updated and stream.frame > after
+
+
+def _check(stream: StreamImpl) -> None:
+    """Raise the error a stream holds instead of a value. A removed stream holds the one
+    saying so whether or not it ever had a value."""
+    if isinstance(stream._value, Exception):
+        raise stream._value
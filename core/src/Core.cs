@@ -27,6 +27,8 @@ namespace KRPC
         List<RequestContinuation> rpcContinuations = new List<RequestContinuation> ();
         Dictionary<IClient<NoMessage,StreamUpdate>, Dictionary<ulong, Service.Stream>> streams = new Dictionary<IClient<NoMessage,StreamUpdate>, Dictionary<ulong, Service.Stream>> ();
         Dictionary<IClient<NoMessage,StreamUpdate>, StreamUpdate> cachedStreamUpdates = new Dictionary<IClient<NoMessage,StreamUpdate>, StreamUpdate> ();
+        Dictionary<IClient<NoMessage,StreamUpdate>, long> streamUpdateIntervals = new Dictionary<IClient<NoMessage,StreamUpdate>, long> ();
+        Dictionary<IClient<NoMessage,StreamUpdate>, Stopwatch> streamUpdateTimers = new Dictionary<IClient<NoMessage,StreamUpdate>, Stopwatch> ();
         Dictionary<ulong, IClient<NoMessage, StreamUpdate>> removeStreams = new Dictionary<ulong, IClient<NoMessage, StreamUpdate>> ();
         ulong nextStreamId = 0;
 
@@ -109,6 +111,8 @@ namespace KRPC
             streamClients.Remove (client.Guid);
             streams.Remove (client);
             cachedStreamUpdates.Remove (client);
+            streamUpdateIntervals.Remove (client);
+            streamUpdateTimers.Remove (client);
         }
 
         /// <summary>
@@ -544,8 +548,10 @@ namespace KRPC
                             changed |= stream.Changed;
                         }
                     }
-                    // If anything changed, produce an update
-                    if (changed) {
+                    // If anything changed, produce an update. A stream that changes again before
+                    // a client that asked for fewer updates is due one stays changed, so the next
+                    // update it is sent carries the latest result of every stream that changed.
+                    if (changed && StreamUpdateDue (streamClient)) {
                         var streamUpdate = cachedStreamUpdates [streamClient];
                         streamUpdate.Results.Clear ();
                         foreach (var stream in clientStreams) {
@@ -582,6 +588,22 @@ namespace KRPC
             TimePerStreamUpdate = (float)streamTimer.ElapsedSeconds ();
         }
 
+        /// <summary>
+        /// Whether a stream client is due an update. It always is, unless it asked for updates
+        /// no more often than an interval and was sent one less than that interval ago.
+        /// </summary>
+        bool StreamUpdateDue (IClient<NoMessage,StreamUpdate> streamClient)
+        {
+            Stopwatch timer;
+            if (!streamUpdateTimers.TryGetValue (streamClient, out timer))
+                return true;
+            if (timer.IsRunning && timer.ElapsedMilliseconds < streamUpdateIntervals [streamClient])
+                return false;
+            timer.Reset ();
+            timer.Start ();
+            return true;
+        }
+
         /// <summary>
         /// Add a stream to the server.
         /// </summary>
@@ -641,6 +663,30 @@ namespace KRPC
             Logger.WriteLine("Set rate for stream for client " + streamClient.Address, Logger.Severity.Debug);
         }
 
+        /// <summary>
+        /// Set the minimum interval between the stream updates sent to a client, in seconds.
+        /// </summary>
+        internal void SetStreamUpdateInterval (IClient rpcClient, float interval)
+        {
+            if (interval < 0 || float.IsNaN (interval) || float.IsInfinity (interval))
+                throw new ArgumentOutOfRangeException (nameof (interval), "Interval must be a finite number of seconds, no less than zero");
+            var id = rpcClient.Guid;
+            if (!streamClients.ContainsKey (id))
+                throw new InvalidOperationException ("No stream client is connected for this RPC client");
+            var streamClient = streamClients [id];
+
+            var milliseconds = (long)(interval * 1000.0f);
+            if (milliseconds == 0) {
+                streamUpdateIntervals.Remove (streamClient);
+                streamUpdateTimers.Remove (streamClient);
+            } else {
+                streamUpdateIntervals [streamClient] = milliseconds;
+                if (!streamUpdateTimers.ContainsKey (streamClient))
+                    streamUpdateTimers [streamClient] = new Stopwatch ();
+            }
+            Logger.WriteLine ("Set stream update interval for client " + streamClient.Address + " to " + milliseconds + " ms", Logger.Severity.Debug);
+        }
+
         /// <summary>
         /// Remove a stream from the server, for a given client.
         /// </summary>
@@ -90,6 +90,7 @@ namespace KRPC.Server.ProtocolBuffers
             result.Documentation = service.Documentation;
             result.Deprecated = service.Deprecated;
             result.DeprecatedReason = service.DeprecatedReason;
+            result.Id = service.Id;
             return result;
         }
 
@@ -105,6 +106,7 @@ namespace KRPC.Server.ProtocolBuffers
             result.Documentation = procedure.Documentation;
             result.Deprecated = procedure.Deprecated;
             result.DeprecatedReason = procedure.DeprecatedReason;
+            result.Id = procedure.Id;
             return result;
         }
 
@@ -320,6 +322,7 @@ namespace KRPC.Server.ProtocolBuffers
             result.StreamRpcsExecuted = status.StreamRpcsExecuted;
             result.StreamRpcRate = status.StreamRpcRate;
             result.TimePerStreamUpdate = status.TimePerStreamUpdate;
+            result.ServicesHash = status.ServicesHash;
             return result;
         }
 
@@ -2,6 +2,7 @@ using System;
 using System.Collections.Generic;
 using System.Linq;
 using System.Linq.Expressions;
+using System.Security.Cryptography;
 using KRPC.Service.Attributes;
 using KRPC.Service.Messages;
 using LinqExpression = System.Linq.Expressions.Expression;
@@ -58,9 +59,30 @@ namespace KRPC.Service.KRPC
             status.StreamRpcsExecuted = core.StreamRPCsExecuted;
             status.StreamRpcRate = core.StreamRPCRate;
             status.TimePerStreamUpdate = core.TimePerStreamUpdate;
+            status.ServicesHash = ServicesHash;
             return status;
         }
 
+        static string servicesHash;
+
+        /// <summary>
+        /// A hash of the value returned by GetServices, as a lower case hexadecimal SHA-256 of
+        /// its encoding. The services do not change once they have been scanned, so it is
+        /// worked out the first time it is asked for.
+        /// </summary>
+        static string ServicesHash {
+            get {
+                if (servicesHash == null) {
+                    var data = Server.ProtocolBuffers.Encoder.Encode (GetServices ()).ToByteArray ();
+                    using (var sha256 = SHA256.Create ()) {
+                        var hash = sha256.ComputeHash (data);
+                        servicesHash = BitConverter.ToString (hash).Replace ("-", string.Empty).ToLowerInvariant ();
+                    }
+                }
+                return servicesHash;
+            }
+        }
+
         /// <summary>
         /// Returns information on all services, procedures, classes, properties etc. provided by the server.
         /// Can be used by client libraries to automatically create functionality such as stubs.
@@ -71,8 +93,10 @@ namespace KRPC.Service.KRPC
             var services = new Messages.Services ();
             foreach (var serviceSignature in Services.Instance.Signatures.Values) {
                 var service = new Messages.Service (serviceSignature.Name);
+                service.Id = serviceSignature.Id;
                 foreach (var procedureSignature in serviceSignature.Procedures.Values) {
                     var procedure = new Procedure (procedureSignature.Name);
+                    procedure.Id = procedureSignature.Id;
                     if (procedureSignature.HasReturnType) {
                         procedure.ReturnType = procedureSignature.ReturnType;
                         procedure.ReturnIsNullable = procedureSignature.ReturnIsNullable;
@@ -260,6 +284,18 @@ namespace KRPC.Service.KRPC
             Core.Instance.SetStreamRate (CallContext.Client, id, rate);
         }
 
+        /// <summary>
+        /// Set the minimum interval between the stream updates sent to the client, in seconds.
+        /// The streams that change within an interval are sent together in one update once it
+        /// has passed, each with its latest result. Zero, the default, sends an update whenever
+        /// a stream changes.
+        /// </summary>
+        [KRPCProcedure]
+        public static void SetStreamUpdateInterval (float interval)
+        {
+            Core.Instance.SetStreamUpdateInterval (CallContext.Client, interval);
+        }
+
         /// <summary>
         /// Remove a streaming request.
         /// </summary>
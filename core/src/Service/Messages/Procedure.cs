@@ -8,6 +8,8 @@ namespace KRPC.Service.Messages
     {
         public string Name { get; private set; }
 
+        public uint Id { get; set; }
+
         public IList<Parameter> Parameters { get; private set; }
 
         public bool HasReturnType {
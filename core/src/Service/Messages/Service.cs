@@ -7,6 +7,8 @@ namespace KRPC.Service.Messages
     {
         public string Name { get; private set; }
 
+        public uint Id { get; set; }
+
         public IList<Procedure> Procedures { get; private set; }
 
         public IList<Class> Classes { get; private set; }
@@ -41,6 +41,8 @@ namespace KRPC.Service.Messages
 
         public float TimePerStreamUpdate { get; set; }
 
+        public string ServicesHash { get; set; }
+
         public Status (string version)
         {
             Version = version;
@@ -1,6 +1,7 @@
 using System;
 using System.Collections.Generic;
 using System.Linq;
+using System.Security.Cryptography;
 using NUnit.Framework;
 
 namespace KRPC.Test.Service.KRPC
@@ -22,6 +23,19 @@ namespace KRPC.Test.Service.KRPC
             Core.Instance.Version = null;
         }
 
+        [Test]
+        public void GetServicesHash ()
+        {
+            var status = global::KRPC.Service.KRPC.KRPC.GetStatus ();
+            var services = global::KRPC.Service.KRPC.KRPC.GetServices ();
+            var data = global::KRPC.Server.ProtocolBuffers.Encoder.Encode (services).ToByteArray ();
+            using (var sha256 = SHA256.Create ()) {
+                var hash = BitConverter.ToString (sha256.ComputeHash (data)).Replace ("-", string.Empty).ToLowerInvariant ();
+                Assert.AreEqual (hash, status.ServicesHash);
+            }
+            Assert.AreEqual (status.ServicesHash, global::KRPC.Service.KRPC.KRPC.GetStatus ().ServicesHash);
+        }
+
         [Test]
         public void GetServices ()
         {
@@ -30,10 +44,17 @@ namespace KRPC.Test.Service.KRPC
             Assert.AreEqual (5, services.ServicesList.Count);
 
             var service = services.ServicesList.First (x => x.Name == "KRPC");
-            Assert.AreEqual (69, service.Procedures.Count);
+            Assert.AreEqual (70, service.Procedures.Count);
             Assert.AreEqual (2, service.Classes.Count);
             Assert.AreEqual (1, service.Enumerations.Count);
 
+            var signature = global::KRPC.Service.Services.Instance.Signatures ["KRPC"];
+            Assert.AreEqual (signature.Id, service.Id);
+            foreach (var proc in service.Procedures) {
+                Assert.AreNotEqual (0, proc.Id);
+                Assert.AreEqual (signature.Procedures [proc.Name].Id, proc.Id);
+            }
+
             int foundProcedures = 0;
             foreach (var proc in service.Procedures) {
                 if (proc.Name == "GetClientID") {
@@ -69,6 +90,11 @@ namespace KRPC.Test.Service.KRPC
                     MessageAssert.HasParameter(proc, 0, typeof(ulong), "id");
                     MessageAssert.HasParameter(proc, 1, typeof(float), "rate");
                     MessageAssert.HasDocumentation(proc);
+                } else if (proc.Name == "SetStreamUpdateInterval") {
+                    MessageAssert.HasNoReturnType(proc);
+                    MessageAssert.HasParameters(proc, 1);
+                    MessageAssert.HasParameter(proc, 0, typeof(float), "interval");
+                    MessageAssert.HasDocumentation(proc);
                 } else if (proc.Name == "RemoveStream") {
                     MessageAssert.HasNoReturnType (proc);
                     MessageAssert.HasParameters (proc, 1);
@@ -97,7 +123,7 @@ namespace KRPC.Test.Service.KRPC
                 }
                 foundProcedures++;
             }
-            Assert.AreEqual (12, foundProcedures);
+            Assert.AreEqual (13, foundProcedures);
 
             bool foundEnumeration = false;
             foreach (var enumeration in service.Enumerations) {
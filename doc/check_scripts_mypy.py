@@ -35,6 +35,12 @@ ALLOWED = {
     ("DockingGuidance.py", "arg-type"),
 }
 
+# Example scripts that are not checked at all:
+# - Asyncio.py uses the asyncio client, whose calls return awaitables through
+#   stubs typed for the synchronous client. It can be checked once the asyncio
+#   client has stubs of its own.
+SKIPPED = {"Asyncio.py"}
+
 ERROR_LINE = re.compile(r"^(?P<path>[^:]+):\d+: error: .*\[(?P<code>[a-z-]+)\]$")
 
 # The other shape the skipped None-guards produce: passing an unguarded
@@ -55,7 +61,7 @@ def main():
             os.path.join(dirpath, f)
             for f in filenames
             # skip the empty __init__.py files rules_python adds to runfiles
-            if f.endswith(".py") and f != "__init__.py"
+            if f.endswith(".py") and f != "__init__.py" and f not in SKIPPED
         )
     if not scripts:
         print("no example scripts found under " + SCRIPTS_DIR)
@@ -0,0 +1,20 @@
+import asyncio
+import krpc.aio
+
+
+async def main() -> None:
+    conn = await krpc.aio.connect(name="Asyncio example")
+    vessel = await conn.space_center.active_vessel
+    flight = await vessel.flight()
+    altitude, speed = await asyncio.gather(flight.mean_altitude, flight.speed)
+    print(altitude, speed)
+
+    async with conn.stream(getattr, flight, "mean_altitude") as stream:
+        async for value in stream:
+            print(value)
+            if value > 1000:
+                break
+    await conn.close()
+
+
+asyncio.run(main())
@@ -0,0 +1,10 @@
+import krpc
+
+conn = krpc.connect()
+vessel = conn.space_center.active_vessel
+flight = vessel.flight()
+with conn.batch() as batch:
+    altitude = batch.add(getattr, flight, "mean_altitude")
+    speed = batch.add(getattr, flight, "speed")
+    mass = batch.add(getattr, vessel, "mass")
+print(altitude.result(), speed.result(), mass.result())
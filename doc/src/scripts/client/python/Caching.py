@@ -0,0 +1,12 @@
+import krpc
+from krpc.cache import IMMUTABLE, UNTIL_GAME_TIME_CHANGES
+
+conn = krpc.connect()
+conn.cache.set_policy(conn.space_center.Part, "title", IMMUTABLE)
+conn.cache.set_policy(
+    conn.space_center.Flight, "mean_altitude", UNTIL_GAME_TIME_CHANGES
+)
+vessel = conn.space_center.active_vessel
+for part in vessel.parts.all:
+    print(part.title)
+print(conn.cache.hits, conn.cache.misses)
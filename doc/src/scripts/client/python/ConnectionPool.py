@@ -0,0 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+import krpc
+
+conn = krpc.connect(rpc_connections=4)
+vessel = conn.space_center.active_vessel
+parts = vessel.parts.all
+with ThreadPoolExecutor(max_workers=4) as executor:
+    titles = list(executor.map(lambda part: part.title, parts))
+print(titles)
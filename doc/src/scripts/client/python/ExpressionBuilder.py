@@ -0,0 +1,17 @@
+import krpc
+from krpc.expr import call
+
+conn = krpc.connect()
+vessel = conn.space_center.active_vessel
+flight = vessel.flight()
+
+# Build the expression on the client
+altitude = call(getattr, flight, "mean_altitude")
+expr = (altitude > 1000) & (altitude < 2000)
+
+# Create it on the server, and an event from it
+event = expr.event(conn)
+
+with event.condition:
+    event.wait()
+    print("Altitude between 1000m and 2000m")
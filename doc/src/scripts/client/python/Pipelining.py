@@ -0,0 +1,9 @@
+import krpc
+
+conn = krpc.connect(pipeline_window=8)
+control = conn.space_center.active_vessel.control
+for i in range(100):
+    conn.call_async(setattr, control, "throttle", i / 100)
+    conn.call_async(setattr, control, "pitch", i / 200)
+result = conn.call_async(getattr, control, "throttle")
+print(result.result())
@@ -0,0 +1,9 @@
+import krpc
+
+conn = krpc.connect()
+vessel = conn.space_center.active_vessel
+throttle = conn.prepare(vessel.control, "throttle")
+altitude = conn.prepare(vessel.flight(), "mean_altitude")
+while altitude() < 10000:
+    throttle(0.7)
+throttle(0)
@@ -0,0 +1,17 @@
+import krpc
+from krpc.expr import call
+
+conn = krpc.connect()
+vessel = conn.space_center.active_vessel
+orbit = vessel.orbit
+resources = vessel.resources
+
+apoapsis = (call(getattr, orbit, "apoapsis_altitude") > 100000).event(conn)
+fuel = (call(resources.amount, "LiquidFuel") < 10).event(conn)
+
+# Wait for whichever happens first, on this thread
+fired = krpc.wait_any([apoapsis, fuel])
+if fired is apoapsis:
+    print("Apoapsis reached 100km")
+else:
+    print("Out of fuel")
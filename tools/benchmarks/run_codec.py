@@ -0,0 +1,155 @@
+"""Python client codec benchmarks: `bazel run //tools/benchmarks:codec`.
+
+What the python client pays to write a request and read the response to it, and to read a
+stream update, apart from everything else a call costs. The messages these are carried in are
+written and read by krpc.envelope rather than as protobuf messages; each case is measured both
+ways, so that the two can be read against each other on whichever protobuf backend is installed.
+No server is involved, so a run takes seconds.
+
+Every figure is a time per operation, so lower is always better.
+
+The backend is protobuf's choice, made when it is first imported. To measure against another
+one, say so in the environment:
+
+    PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python bazel run //tools/benchmarks:codec
+"""
+
+import sys
+import time
+
+from google.protobuf.internal import api_implementation
+
+from krpc import envelope
+from krpc.decoder import Decoder
+from krpc.encoder import Encoder
+import krpc.schema.KRPC_pb2 as KRPC
+from tools.benchmarks import runner
+from tools.benchmarks.report import Result
+
+SUITE = "client, python"
+SCENARIO = "envelopes"
+
+# How long one timed loop should run for, and how many of them to take. Nothing here waits on
+# anything but the interpreter, so a short loop is steady.
+TARGET_SECONDS = 0.1
+SAMPLES = 7
+
+# How many results the stream update carries: a handful of streams updating together, which is
+# what a program watching a vessel has.
+STREAM_RESULTS = 10
+
+# The encoded arguments of the call a request carries: an object and a float, the shape of the
+# most common call to a method.
+ARGUMENTS = [b"\x2a", b"\x6e\x86\x1b\xf0\xf9\x21\x09\x40"]
+
+# The encoded value a result carries: a double.
+VALUE = b"\x6e\x86\x1b\xf0\xf9\x21\x09\x40"
+
+
+def main():
+    args = runner.arguments(__doc__.splitlines()[0])
+    results = measure()
+    environment = {"protobuf backend": api_implementation.Type()}
+    runner.report(results, SUITE, environment, args.json)
+    return 0
+
+
+def measure():
+    block = "%s, %s protobuf" % (SCENARIO, api_implementation.Type())
+    response = KRPC.Response()
+    response.results.add(value=VALUE)
+    response_data = memoryview(bytearray(response.SerializeToString()))
+    update = KRPC.StreamUpdate()
+    for stream_id in range(STREAM_RESULTS):
+        update.results.add(id=stream_id).result.value = VALUE
+    update_data = memoryview(bytearray(update.SerializeToString()))
+
+    def encode_message():
+        request = KRPC.Request()
+        call = request.calls.add(service_id=7, procedure_id=12)
+        for position, value in enumerate(ARGUMENTS):
+            call.arguments.add(position=position, value=value)
+        return Encoder.encode_message_with_size(request)
+
+    def encode_envelope():
+        parts = [envelope.encode_procedure("", "", (7, 12))]
+        for position, value in enumerate(ARGUMENTS):
+            parts.append(envelope.encode_argument(position, value))
+        return envelope.encode_request([b"".join(parts)])
+
+    def decode_message():
+        message = KRPC.Response()
+        message.ParseFromString(response_data)
+        if message.HasField("error"):
+            raise AssertionError
+        result = message.results[0]
+        if result.HasField("error") or result.is_null:
+            raise AssertionError
+        return result.value
+
+    def decode_envelope():
+        error, results = envelope.decode_response(response_data)
+        if error is not None:
+            raise AssertionError
+        error, value, is_null = results[0]
+        if error is not None or is_null:
+            raise AssertionError
+        return value
+
+    def update_message():
+        message = KRPC.StreamUpdate()
+        message.ParseFromString(update_data)
+        for result in message.results:
+            if result.result.HasField("error") or result.result.is_null:
+                raise AssertionError
+            _ = result.id, result.result.value
+
+    def update_envelope():
+        for _, (error, _, is_null) in envelope.decode_stream_update(update_data):
+            if error is not None or is_null:
+                raise AssertionError
+
+    if decoded(encode_message()) != decoded(encode_envelope()):
+        raise AssertionError("The request is not the one protobuf encodes")
+    return [
+        timed(block, "encode a request, protobuf message", encode_message),
+        timed(block, "encode a request, envelope", encode_envelope),
+        timed(block, "decode a response, protobuf message", decode_message),
+        timed(block, "decode a response, envelope", decode_envelope),
+        timed(
+            block,
+            "decode a stream update of %d, protobuf message" % STREAM_RESULTS,
+            update_message,
+        ),
+        timed(
+            block,
+            "decode a stream update of %d, envelope" % STREAM_RESULTS,
+            update_envelope,
+        ),
+    ]
+
+
+def decoded(data):
+    """The request encoded, with its size, in the given data. The fields of a message can
+    come in any order, so two encodings of it are compared by what they decode to."""
+    size, prefix_length = Decoder.decode_size_prefix(data)
+    return KRPC.Request.FromString(data[prefix_length : prefix_length + size])
+
+
+def timed(block, case, operation):
+    """Time the operation in a loop, several times over, in microseconds per operation."""
+    start = time.perf_counter()
+    operation()
+    once = max(time.perf_counter() - start, 1e-7)
+    iterations = max(int(TARGET_SECONDS / once), 1)
+    samples = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        samples.append((time.perf_counter() - start) * 1e6 / iterations)
+    return Result(SUITE, block, case, samples, unit="us", iterations=iterations)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
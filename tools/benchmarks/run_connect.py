@@ -0,0 +1,159 @@
+"""Python client start up benchmarks: `bazel run //tools/benchmarks:connect`.
+
+What a program pays before its first call: importing the client, and connecting it to a
+server. A connection is taken apart into the steps it is made of - the handshake on the RPC
+connection, the handshake on the stream connection, fetching the definitions of the services
+with GetServices, registering the types they define - alongside what the whole of it took,
+and what creating every service then takes on top, which the client leaves until each is
+first used. What the steps do not add up to is the rest of setting up the client.
+
+A connection is made with the pregenerated stubs and without them, since which of the two
+builds the services is most of what the later steps cost, and over both transports a client
+can reach a server on, TCP/IP and a local socket.
+
+Every figure is a time per connection, so lower is always better.
+
+    bazel run //tools/benchmarks:connect -- --json before.json
+"""
+
+import contextlib
+import sys
+import time
+from unittest import mock
+
+import krpc
+import krpc.client
+import krpc.services
+from krpc.utils import snake_case
+import krpc.schema.KRPC_pb2 as KRPC
+from tools.benchmarks import run_import, runner, testserver
+from tools.benchmarks.report import Result
+
+SUITE = "client, python"
+SCENARIO = "connecting"
+
+# How many timed samples to take, and how many connections each is the average of. A
+# connection takes milliseconds, and the server has to notice each one closing, so a sample
+# is a handful of them rather than a timed loop.
+SAMPLES = 9
+CONNECTIONS = 10
+
+# The steps timed in each connection, in the order they are reported
+RPC_HANDSHAKE = "open the RPC connection"
+STREAM_HANDSHAKE = "open the stream connection"
+GET_SERVICES = "GetServices"
+REGISTER = "register the types of every service"
+CONNECT = "connect, in all"
+CREATE = "create every service"
+STEPS = (RPC_HANDSHAKE, STREAM_HANDSHAKE, GET_SERVICES, REGISTER, CONNECT, CREATE)
+
+
+class Steps:
+    """The time taken by each step of the connections made while it is installed, summed
+    over all of them."""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STEPS, 0.0)
+
+    @contextlib.contextmanager
+    def timing(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[step] += time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Time the steps of every connection made, by wrapping the functions that take them.
+        They are the client's own, so the wrappers reach past its public interface."""
+        # pylint: disable=protected-access
+        handshake = krpc._handshake
+        services_data = krpc.client.Client._services_data
+        register_all = krpc.client.register_all
+
+        def timed_handshake(connection, request):
+            stream = request.type == KRPC.ConnectionRequest.STREAM
+            with self.timing(STREAM_HANDSHAKE if stream else RPC_HANDSHAKE):
+                return handshake(connection, request)
+
+        def timed_services_data(client, cache_dir):
+            with self.timing(GET_SERVICES):
+                return services_data(client, cache_dir)
+
+        def timed_register_all(types, definitions):
+            with self.timing(REGISTER):
+                register_all(types, definitions)
+
+        with mock.patch("krpc._handshake", timed_handshake), mock.patch.object(
+            krpc.client.Client, "_services_data", timed_services_data
+        ), mock.patch("krpc.client.register_all", timed_register_all):
+            yield
+
+
+def main():
+    args = runner.arguments(__doc__.splitlines()[0])
+    results, environment = measure(args.server)
+    runner.report(results, SUITE, environment, args.json)
+    return 0
+
+
+def measure(server):
+    """Measure connecting over every transport, with the stubs and without them where there
+    are any, then importing the client, and say what it ran against."""
+    results = []
+    environment = {}
+    for transport in testserver.transports():
+        with testserver.serving(server, transport=transport) as endpoint:
+            with testserver.connect("benchmark_connect", endpoint) as conn:
+                testserver.warm_up(conn)
+                services = [
+                    service.name for service in conn.krpc.get_services().services
+                ]
+                environment.setdefault("server", conn.krpc.get_status().version)
+            stubs = [name for name in services if krpc.services.has_stub(name)]
+            environment.setdefault("services", ", ".join(services))
+            environment.setdefault("stubs", ", ".join(stubs) or "not generated")
+            attributes = [snake_case(name) for name in services]
+            for use_stubs in (True, False) if stubs else (False,):
+                block = "%s over %s, %s stubs" % (
+                    SCENARIO,
+                    testserver.LABELS[transport],
+                    "with" if use_stubs else "without",
+                )
+                results += measure_connection(block, endpoint, use_stubs, attributes)
+    return results + run_import.measure(), environment
+
+
+def measure_connection(block, endpoint, use_stubs, attributes):
+    """The time each step of connecting takes, in milliseconds per connection."""
+
+    def connect(steps):
+        with steps.timing(CONNECT):
+            conn = endpoint.open("benchmark_connect", use_pregenerated_stubs=use_stubs)
+        try:
+            with steps.timing(CREATE):
+                for attribute in attributes:
+                    getattr(conn, attribute)
+        finally:
+            conn.close()
+
+    # The first connections pay for what the process has yet to import and the server has
+    # yet to compile, which is not what a connection costs
+    connect(Steps())
+    samples = {step: [] for step in STEPS}
+    for _ in range(SAMPLES):
+        steps = Steps()
+        with steps.installed():
+            for _ in range(CONNECTIONS):
+                connect(steps)
+        for step, seconds in steps.seconds.items():
+            samples[step].append(seconds * 1e3 / CONNECTIONS)
+    return [
+        Result(SUITE, block, step, samples[step], unit="ms", iterations=CONNECTIONS)
+        for step in STEPS
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Python client import benchmarks: `bazel run //tools/benchmarks:imports`.
+
+What a program pays to import the python client before it has made a single call. A command
+line tool that connects, calls a procedure or two and exits pays this on every run, and for
+such a tool it can be most of the time the run takes. Each sample is a fresh interpreter,
+since a module is only imported once per process, timed from inside it so that starting the
+interpreter is not part of the figure.
+
+Every figure is a time per import, so lower is always better.
+
+The stubs for the game's services are only measured where they have been generated; a client
+built without them reports the cases that do not need them.
+"""
+
+import os
+import subprocess
+import sys
+
+from krpc.services import has_stub
+from tools.benchmarks import runner
+from tools.benchmarks.report import Result
+
+SUITE = "client, python"
+SCENARIO = "imports"
+
+# How many fresh interpreters to time each case in. Each costs tens of milliseconds to start,
+# so this is what bounds how long a run takes.
+SAMPLES = 15
+
+# The code a fresh interpreter times, between taking the time and printing what it took
+IMPORT = "import krpc"
+STUBS = "import krpc.services\nkrpc.services.SpaceCenter"
+
+TIMED = """import time
+start = time.perf_counter()
+%s
+print((time.perf_counter() - start) * 1e3)
+"""
+
+
+def main():
+    args = runner.arguments(__doc__.splitlines()[0])
+    results = measure()
+    environment = {
+        "python": sys.version.split()[0],
+        "stubs": "generated" if has_stub("SpaceCenter") else "not generated",
+    }
+    runner.report(results, SUITE, environment, args.json)
+    return 0
+
+
+def measure():
+    results = [timed("import krpc", IMPORT)]
+    if has_stub("SpaceCenter"):
+        results.append(timed("import krpc and the SpaceCenter stubs", STUBS))
+    return results
+
+
+def timed(case, code):
+    """Time the code in fresh interpreters, in milliseconds per run of it."""
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    samples = []
+    for _ in range(SAMPLES):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMED % code],
+            env=environment,
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True,
+        ).stdout
+        samples.append(float(output.split()[-1]))
+    return Result(SUITE, SCENARIO, case, samples, unit="ms", iterations=1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Python client service creation benchmarks: `bazel run //tools/benchmarks:services`.
+
+What the python client pays, when it connects, to build the services a server provides from
+their definitions rather than from stubs generated ahead of time. That is how it uses a
+service it has no stubs for, such as one a mod adds to the game, and it is paid again by
+every client that connects. The definitions are fetched from the server once and everything
+timed runs in memory, so no round trip is part of any figure.
+
+Every figure is a time per operation, so lower is always better.
+
+A run starts its own TestServer, whose services are the test ones. To measure the services a
+game provides, point the run at a game that is already running:
+
+    RPC_PORT=50000 STREAM_PORT=50001 bazel run //tools/benchmarks:services
+"""
+
+import sys
+import time
+
+from krpc.definitions import register_all
+from krpc.service import create_service, service_definitions
+from krpc.types import Types
+from tools.benchmarks import runner, testserver
+from tools.benchmarks.report import Result
+
+SUITE = "client, python"
+SCENARIO = "services without stubs"
+
+# How long one timed loop should run for, and how many of them to take. Nothing here waits on
+# anything but the interpreter, so a short loop is steady.
+TARGET_SECONDS = 0.2
+SAMPLES = 7
+
+
+class Client:
+    """As much of a client as creating a service needs. Nothing built here is called, so
+    there is no connection behind it."""
+
+    def __init__(self, types):
+        self._types = types
+
+    def _invoke(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def _build_call(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def main():
+    args = runner.arguments(__doc__.splitlines()[0])
+    services, environment = definitions(args.server)
+    results = measure(services)
+    runner.report(results, SUITE, environment, args.json)
+    return 0
+
+
+def definitions(server):
+    """The definitions of the services a server provides, and what they came from."""
+    with testserver.connection("benchmark_services", server) as (conn, _):
+        services = list(conn.krpc.get_services().services)
+        environment = {"server": conn.krpc.get_status().version}
+    environment["services"] = ", ".join(service.name for service in services)
+    environment["procedures"] = sum(len(service.procedures) for service in services)
+    return services, environment
+
+
+def measure(services):
+    def register():
+        types = Types()
+        register_all(
+            types,
+            [
+                definition
+                for service in services
+                for definition in service_definitions(service)
+            ],
+        )
+        return types
+
+    def create():
+        client = Client(register())
+        for service in services:
+            create_service(client, service)
+
+    return [
+        timed("register the types of every service", register),
+        timed("register the types and create every service", create),
+    ]
+
+
+def timed(case, operation):
+    """Time the operation in a loop, several times over, in milliseconds per operation."""
+    start = time.perf_counter()
+    operation()
+    once = max(time.perf_counter() - start, 1e-7)
+    iterations = max(int(TARGET_SECONDS / once), 1)
+    samples = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        samples.append((time.perf_counter() - start) * 1e3 / iterations)
+    return Result(SUITE, SCENARIO, case, samples, unit="ms", iterations=iterations)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
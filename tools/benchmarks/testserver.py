@@ -76,14 +76,18 @@ class Endpoint:
         self.rpc = rpc
         self.stream = stream
 
-    def open(self, name):
-        """Open a python client on this endpoint."""
+    def open(self, name, **options):
+        """Open a python client on this endpoint, passing on any other options to connect."""
         if self.transport == LOCAL_SOCKET:
             return krpc.connect_local(
-                name=name, rpc_path=self.rpc, stream_path=self.stream
+                name=name, rpc_path=self.rpc, stream_path=self.stream, **options
             )
         return krpc.connect(
-            name=name, address="localhost", rpc_port=self.rpc, stream_port=self.stream
+            name=name,
+            address="localhost",
+            rpc_port=self.rpc,
+            stream_port=self.stream,
+            **options,
         )
 
     def variables(self):
@@ -152,6 +156,23 @@ def connection(name, executable=None, frame_pacing=True, transport=TCP):
             yield conn, frame_pacing
 
 
+@contextlib.contextmanager
+def serving(executable=None, frame_pacing=True, transport=TCP):
+    """Yield where a TestServer is listening, starting one unless the environment names a
+    server that is already running. For a runner that opens clients of its own, rather than
+    measuring through the one ``connection`` hands it."""
+    external = from_environment()
+    if external is not None:
+        yield external
+        return
+    if executable is None:
+        raise ValueError(
+            "no TestServer to run, and nothing in the environment names one to connect to"
+        )
+    with running(executable, frame_pacing=frame_pacing, transport=transport) as found:
+        yield found
+
+
 @contextlib.contextmanager
 def connect(name, endpoint):
     conn = endpoint.open(name)